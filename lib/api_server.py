@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+
+"""
+Local JSON HTTP API over the Event Planner models.
+
+A stdlib-only asyncio server: the event loop parses requests and writes
+responses, while every model call runs in a bounded thread pool. Clients
+may pipeline requests on a keep-alive connection; responses always come
+back in request order, and a write waits for the requests before it (and
+holds back the ones after it) so pipelined reads see its effect. Large
+responses are gzipped when the client accepts it, and an event's attendee
+list is streamed as chunked JSON so it never has to fit in memory.
+
+    python lib/api_server.py --port 8080 --workers 8
+    python lib/api_server.py --tenant acme
+
+    GET  /health
+    GET  /events                    ?name= for a partial name match
+    GET  /events/<id>
+    POST /events
+    GET  /events/<id>/attendees     streamed
+    GET  /events/<id>/activities
+    GET  /attendees                 ?email=, ?name= or ?q= (fuzzy)
+    GET  /attendees/<id>
+    POST /attendees
+    GET  /activities                ?name=
+    GET  /activities/<id>
+    POST /activities
+
+Unfiltered GET /events, /attendees and /activities return one page in ID
+order: ?limit= rows (default 100, at most 1000) with IDs above ?after=.
+Pass the last ID of a page as `after` to get the next; a short page is
+the last.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import select
+
+from models import SESSION, ValidationError, Event, Attendee, Activity, set_tenant, upgrade_schema
+from models.venue_index import DEFAULT_EVENT_DURATION, VenueConflictError
+from models.write_path import WriteConflictError
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+MAX_PIPELINE = 32          # responses a connection may have outstanding
+MAX_HEADER_COUNT = 100
+MAX_BODY_SIZE = 1024 * 1024
+GZIP_MIN_SIZE = 1024       # bytes; smaller bodies aren't worth compressing
+GZIP_LEVEL = 5
+STREAM_BATCH_SIZE = 500    # attendees fetched per streamed chunk
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class HttpError(Exception):
+    """An error response with a status code and a JSON message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    @property
+    def accepts_gzip(self):
+        return 'gzip' in self.headers.get('accept-encoding', '').lower()
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HttpError(400, "Request body must be JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object")
+        return data
+
+
+class Response:
+    """A complete response body, sent with Content-Length"""
+
+    def __init__(self, status, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def write(self, writer, keep_alive, server):
+        headers = dict(self.headers, **{'Content-Length': str(len(self.body))})
+        writer.write(_head(self.status, headers, keep_alive) + self.body)
+        await writer.drain()
+
+
+class StreamingResponse:
+    """A response produced chunk by chunk, sent with chunked encoding.
+
+    `chunks` is a plain iterator; each chunk is pulled in the worker pool,
+    since producing it may hit the database.
+    """
+
+    def __init__(self, status, chunks, headers=None):
+        self.status = status
+        self.chunks = chunks
+        self.headers = headers or {}
+
+    async def write(self, writer, keep_alive, server):
+        loop = asyncio.get_running_loop()
+        headers = dict(self.headers, **{'Transfer-Encoding': 'chunked'})
+        writer.write(_head(self.status, headers, keep_alive))
+        while True:
+            chunk = await loop.run_in_executor(server.executor, next, self.chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()  # don't outrun a slow client
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _head(status, headers, keep_alive):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+
+# Serialization
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _to_dict(obj):
+    return {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+
+
+def json_response(status, payload, compress=False):
+    body = json.dumps(payload, default=_json_default).encode()
+    headers = {'Content-Type': 'application/json'}
+    if compress and len(body) >= GZIP_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    return Response(status, body, headers)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.flush()
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{field} must be an ISO date and time, e.g. 2030-06-01T09:00")
+
+
+def _parse_time(value, field):
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{field} must be a time, e.g. 09:30")
+
+
+def _page(request):
+    """(after_id, limit) from the ?after= and ?limit= query parameters"""
+    try:
+        after_id = int(request.query.get('after', 0))
+        limit = int(request.query.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise HttpError(400, "after and limit must be integers")
+    if after_id < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HttpError(400, f"after must be 0 or more and limit between 1 and {MAX_PAGE_SIZE}")
+    return after_id, limit
+
+
+def _required(data, *fields):
+    missing = [field for field in fields if field not in data]
+    if missing:
+        raise HttpError(400, f"Missing field(s): {', '.join(missing)}")
+
+
+# Handlers run in the worker pool and return (status, payload), where the
+# payload is JSON-serializable or an iterator of already-encoded chunks
+def health(request):
+    return 200, {'status': 'ok'}
+
+
+def list_events(request):
+    if 'name' in request.query:
+        events = Event.find_by_name(request.query['name'])
+    else:
+        events = Event.find_page(*_page(request))
+    return 200, [_to_dict(event) for event in events]
+
+
+def get_event(request, event_id):
+    event = Event.find_by_id(event_id)
+    if event is None:
+        raise HttpError(404, f"Event {event_id} not found")
+    return 200, dict(_to_dict(event),
+                     attendee_count=len(event.attendees),
+                     activity_count=len(event.activities))
+
+
+def create_event(request):
+    data = request.json()
+    _required(data, 'name', 'date', 'location')
+    event = Event.create(
+        data['name'],
+        data.get('description'),
+        _parse_datetime(data['date'], 'date'),
+        data['location'],
+        budget=data.get('budget', 0.0),
+        status=data.get('status', 'Planning'),
+        duration=data.get('duration', DEFAULT_EVENT_DURATION),
+    )
+    return 201, _to_dict(event)
+
+
+def stream_event_attendees(request, event_id):
+    if Event.get_revision(event_id) is None:
+        raise HttpError(404, f"Event {event_id} not found")
+    return 200, _attendee_chunks(event_id)
+
+
+def _attendee_chunks(event_id, batch_size=STREAM_BATCH_SIZE):
+    table = Attendee.__table__
+    yield b'['
+    last_id = 0
+    first = True
+    while True:
+        # Keyset pages with a short session each, since successive chunks
+        # may be produced on different worker threads
+        session = SESSION()
+        try:
+            rows = session.execute(
+                select(table)
+                .where(table.c.event_id == event_id, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).mappings().all()
+        finally:
+            session.close()
+        if not rows:
+            break
+        chunk = ','.join(json.dumps(dict(row), default=_json_default) for row in rows)
+        yield (chunk if first else ',' + chunk).encode()
+        first = False
+        last_id = rows[-1]['id']
+        if len(rows) < batch_size:
+            break
+    yield b']'
+
+
+def list_event_activities(request, event_id):
+    if Event.get_revision(event_id) is None:
+        raise HttpError(404, f"Event {event_id} not found")
+    return 200, [_to_dict(activity) for activity in Activity.find_by_event(event_id)]
+
+
+def list_attendees(request):
+    query = request.query
+    if 'email' in query:
+        attendee = Attendee.find_by_email(query['email'])
+        return 200, [_to_dict(attendee)] if attendee else []
+    if 'name' in query:
+        return 200, [_to_dict(attendee) for attendee in Attendee.find_by_name(query['name'])]
+    if 'q' in query:
+        return 200, [dict(_to_dict(attendee), score=round(score, 3))
+                     for attendee, score in Attendee.fuzzy_search(query['q'])]
+    return 200, [_to_dict(attendee) for attendee in Attendee.find_page(*_page(request))]
+
+
+def get_attendee(request, attendee_id):
+    attendee = Attendee.find_by_id(attendee_id)
+    if attendee is None:
+        raise HttpError(404, f"Attendee {attendee_id} not found")
+    return 200, _to_dict(attendee)
+
+
+def create_attendee(request):
+    data = request.json()
+    _required(data, 'name', 'email', 'event_id')
+    if Event.get_revision(data['event_id']) is None:
+        raise HttpError(404, f"Event {data['event_id']} not found")
+    attendee = Attendee.create(
+        data['name'],
+        data['email'],
+        data['event_id'],
+        phone=data.get('phone'),
+        rsvp_status=data.get('rsvp_status', 'Pending'),
+        dietary_restrictions=data.get('dietary_restrictions'),
+    )
+    return 201, _to_dict(attendee)
+
+
+def list_activities(request):
+    if 'name' in request.query:
+        activities = Activity.find_by_name(request.query['name'])
+    else:
+        activities = Activity.find_page(*_page(request))
+    return 200, [_to_dict(activity) for activity in activities]
+
+
+def get_activity(request, activity_id):
+    activity = Activity.find_by_id(activity_id)
+    if activity is None:
+        raise HttpError(404, f"Activity {activity_id} not found")
+    return 200, _to_dict(activity)
+
+
+def create_activity(request):
+    data = request.json()
+    _required(data, 'name', 'start_time', 'duration', 'event_id')
+    if Event.get_revision(data['event_id']) is None:
+        raise HttpError(404, f"Event {data['event_id']} not found")
+    activity = Activity.create(
+        data['name'],
+        _parse_time(data['start_time'], 'start_time'),
+        data['duration'],
+        data['event_id'],
+        description=data.get('description'),
+        cost=data.get('cost', 0.0),
+        max_participants=data.get('max_participants'),
+    )
+    return 201, _to_dict(activity)
+
+
+ROUTES = [
+    ('GET', r'/health', health),
+    ('GET', r'/events', list_events),
+    ('POST', r'/events', create_event),
+    ('GET', r'/events/(\d+)', get_event),
+    ('GET', r'/events/(\d+)/attendees', stream_event_attendees),
+    ('GET', r'/events/(\d+)/activities', list_event_activities),
+    ('GET', r'/attendees', list_attendees),
+    ('POST', r'/attendees', create_attendee),
+    ('GET', r'/attendees/(\d+)', get_attendee),
+    ('GET', r'/activities', list_activities),
+    ('POST', r'/activities', create_activity),
+    ('GET', r'/activities/(\d+)', get_activity),
+]
+COMPILED_ROUTES = [(method, re.compile(pattern + r'\Z'), handler) for method, pattern, handler in ROUTES]
+
+
+def build_response(request):
+    """Route a request and turn the handler's result (or error) into a response"""
+    try:
+        allowed = []
+        for method, pattern, handler in COMPILED_ROUTES:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            allowed.append(method)
+            if method == request.method or (method == 'GET' and request.method == 'HEAD'):
+                status, payload = handler(request, *(int(group) for group in match.groups()))
+                break
+        else:
+            if allowed:
+                raise HttpError(405, f"Method {request.method} not allowed; use {', '.join(allowed)}")
+            raise HttpError(404, f"No route for {request.path}")
+    except HttpError as e:
+        return json_response(e.status, {'error': e.message})
+    except ValidationError as e:
+        return json_response(400, {'error': str(e), 'errors': e.errors})
+    except VenueConflictError as e:
+        return json_response(409, {'error': str(e),
+                                   'clashes': [{'id': id, 'name': name} for id, name in e.clashes]})
+    except WriteConflictError as e:
+        return json_response(503, {'error': str(e)})
+    except (ValueError, TypeError) as e:
+        return json_response(400, {'error': str(e)})
+    except Exception as e:
+        return json_response(500, {'error': f"Internal error: {e}"})
+
+    if request.method == 'HEAD':
+        return Response(status, b'', {'Content-Type': 'application/json'})
+    if isinstance(payload, (list, dict)):
+        return json_response(status, payload, compress=request.accepts_gzip)
+
+    headers = {'Content-Type': 'application/json'}
+    if request.accepts_gzip:
+        payload = _gzip_chunks(payload)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    return StreamingResponse(status, iter(payload), headers)
+
+
+class ApiServer:
+    """asyncio HTTP front end with model calls in a bounded thread pool"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS,
+                 max_pipeline=MAX_PIPELINE):
+        self.host = host
+        self.port = port
+        self.max_pipeline = max_pipeline
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+        self.server = None
+        self._connections = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # resolves port 0
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        """Stop accepting connections and let open ones finish"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        connection.add_done_callback(self._connections.discard)
+        responses = asyncio.Queue(maxsize=self.max_pipeline)
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        barrier = None     # the latest write on this connection
+        since_barrier = []  # reads started after it
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await responses.put((self._ready(json_response(e.status, {'error': e.message})), False))
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                if request.method in SAFE_METHODS:
+                    waits = [barrier] if barrier else []
+                    task = asyncio.create_task(self._respond(request, waits))
+                    since_barrier = [t for t in since_barrier if not t.done()] + [task]
+                else:
+                    waits = since_barrier + ([barrier] if barrier else [])
+                    task = asyncio.create_task(self._respond(request, waits))
+                    barrier, since_barrier = task, []
+
+                await responses.put((task, request.keep_alive))
+                if not request.keep_alive:
+                    break
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _ready(self, response):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        return future
+
+    async def _respond(self, request, waits):
+        if waits:
+            await asyncio.gather(*waits, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, build_response, request)
+
+    async def _send_responses(self, responses, writer):
+        broken = False
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            task, keep_alive = item
+            if broken:
+                task.cancel()
+                continue
+            try:
+                response = await task
+                await response.write(writer, keep_alive, self)
+            except Exception:
+                # The client went away or a stream failed part-way; either
+                # way nothing more can be sent on this connection
+                broken = True
+                writer.close()
+                continue
+            if not keep_alive:
+                broken = True
+
+    async def _read_request(self, reader):
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HttpError(431, "Request line too long")
+        if not line:
+            return None
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise HttpError(400, "Malformed request line")
+        method, target, version = parts
+
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HttpError(431, "Header line too long")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > MAX_HEADER_COUNT:
+                raise HttpError(431, "Too many headers")
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HttpError(411, "Send request bodies with Content-Length")
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, f"Request body over {MAX_BODY_SIZE} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, version, headers, body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Event Planner models as a local JSON API")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="database worker threads")
+    parser.add_argument('--tenant', help="organization database to serve instead of the shared one")
+    args = parser.parse_args(argv)
+    if args.tenant:
+        # Process-wide, so the worker threads use it too
+        set_tenant(args.tenant)
+    upgrade_schema()
+
+    server = ApiServer(args.host, args.port, args.workers)
+
+    async def run():
+        await server.start()
+        database = f" for organization '{args.tenant}'" if args.tenant else ""
+        print(f"🌐 Event Planner API listening on http://{server.host}:{server.port}{database}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n👋 API server stopped")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
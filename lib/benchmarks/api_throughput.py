@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark request throughput of the local JSON API.
+
+Seeds a temporary database, starts the API server in a background thread,
+then opens --connections keep-alive connections that each send --requests
+GET requests, --pipeline at a time, over a mix of lookups, listings and
+streamed attendee lists. Reports requests per second, latency and how much
+gzip saved on the wire.
+
+    python lib/benchmarks/api_throughput.py --connections 16 --requests 500 --pipeline 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(events, attendees_per_event):
+    from datetime import datetime, time as clock
+    from models import Event, Attendee, Activity
+
+    event_ids = []
+    for n in range(events):
+        event = Event.create(f"API Bench {n}", None, datetime(2030, 2, 1 + n % 28, 9), f"Room {n}")
+        event_ids.append(event.id)
+        Attendee.bulk_create([
+            {'name': f"Guest {n}-{i}", 'email': f"guest{n}-{i}@example.com", 'event_id': event.id}
+            for i in range(attendees_per_event)
+        ])
+        Activity.bulk_create([
+            {'name': f"Talk {n}-{i}", 'start_time': clock(9 + i, 0), 'duration': 45, 'event_id': event.id}
+            for i in range(5)
+        ])
+    return event_ids
+
+
+def make_paths(event_ids, attendees_per_event):
+    def guest():
+        return f"guest{random.randrange(len(event_ids))}-{random.randrange(attendees_per_event)}"
+
+    choices = [
+        (5, lambda: f"/events/{random.choice(event_ids)}"),
+        (5, lambda: f"/attendees/{random.randint(1, len(event_ids) * attendees_per_event)}"),
+        (5, lambda: f"/attendees?email={guest()}@example.com"),
+        (3, lambda: f"/events/{random.choice(event_ids)}/activities"),
+        (1, lambda: f"/events/{random.choice(event_ids)}/attendees"),
+        (1, lambda: "/events"),
+    ]
+    weights = [weight for weight, _ in choices]
+    makers = [maker for _, maker in choices]
+    return lambda: random.choices(makers, weights)[0]()
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        size = 0
+        while True:
+            length = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(length + 2)
+            size += length
+            if length == 0:
+                break
+        return status, size
+    length = int(headers.get('content-length', 0))
+    await reader.readexactly(length)
+    return status, length
+
+
+async def client(port, requests, pipeline, next_path, use_gzip, latencies, stats):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    encoding = "Accept-Encoding: gzip\r\n" if use_gzip else ""
+    sent = 0
+    while sent < requests:
+        batch = min(pipeline, requests - sent)
+        started = time.perf_counter()
+        writer.write(b"".join(
+            f"GET {next_path()} HTTP/1.1\r\nHost: localhost\r\n{encoding}\r\n".encode()
+            for _ in range(batch)
+        ))
+        await writer.drain()
+        for _ in range(batch):
+            status, size = await read_response(reader)
+            stats['bytes'] += size
+            if status >= 400:
+                stats['errors'] += 1
+        latencies.append((time.perf_counter() - started) / batch)
+        sent += batch
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_clients(port, connections, requests, pipeline, next_path, use_gzip):
+    latencies = []
+    stats = {'bytes': 0, 'errors': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(port, requests, pipeline, next_path, use_gzip, latencies, stats)
+        for _ in range(connections)
+    ])
+    return time.perf_counter() - started, sorted(latencies), stats
+
+
+def start_server(workers):
+    from api_server import ApiServer
+
+    server = ApiServer(port=0, workers=workers)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name='api-server', daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=16, help="concurrent client connections")
+    parser.add_argument('--requests', type=int, default=500, help="requests per connection")
+    parser.add_argument('--pipeline', type=int, default=8, help="requests in flight per connection")
+    parser.add_argument('--workers', type=int, default=8, help="server database worker threads")
+    parser.add_argument('--events', type=int, default=10, help="events to seed")
+    parser.add_argument('--attendees', type=int, default=1000, help="attendees per event")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'api.db')}"
+        from models import Base, ENGINE, WRITE_ENGINE
+
+        Base.metadata.create_all(ENGINE)
+        event_ids = seed(args.events, args.attendees)
+        next_path = make_paths(event_ids, args.attendees)
+        server, loop = start_server(args.workers)
+
+        print(f"{'Mode':<10} {'Requests':<9} {'Errors':<7} {'Seconds':<8} {'Req/sec':<8} "
+              f"{'Avg ms':<7} {'MB sent'}")
+        print("-" * 62)
+        for label, use_gzip in [('identity', False), ('gzip', True)]:
+            random.seed(0)
+            elapsed, latencies, stats = asyncio.run(run_clients(
+                server.port, args.connections, args.requests, args.pipeline, next_path, use_gzip))
+            total = args.connections * args.requests
+            average = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+            print(f"{label:<10} {total:<9} {stats['errors']:<7} {elapsed:<8.2f} {total / elapsed:<8.0f} "
+                  f"{average:<7.2f} {stats['bytes'] / 1e6:.1f}")
+
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        server.close()
+        ENGINE.dispose()
+        WRITE_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
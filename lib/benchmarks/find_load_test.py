@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+Load-test the model finders from many threads at once.
+
+Seeds a temporary database, then has every thread call a random mix of
+Event/Attendee/Activity find_* methods (plus the occasional write through
+the shared write path) until each has done --ops calls. Reports throughput,
+latency percentiles, failures and the state of both connection pools.
+
+    python lib/benchmarks/find_load_test.py --threads 32 --ops 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(events, attendees_per_event, activities_per_event):
+    from datetime import datetime, time as clock
+    from models import Event, Attendee, Activity
+
+    event_ids = []
+    for n in range(events):
+        event = Event.create(f"Load Test {n}", None, datetime(2030, 1, 1 + n % 28, 9),
+                             f"Hall {n}")
+        event_ids.append(event.id)
+        Attendee.bulk_create([
+            {'name': f"Guest {n}-{i}", 'email': f"guest{n}-{i}@example.com", 'event_id': event.id}
+            for i in range(attendees_per_event)
+        ])
+        Activity.bulk_create([
+            {'name': f"Session {n}-{i}", 'start_time': clock(9 + i % 8, 0), 'duration': 30,
+             'event_id': event.id}
+            for i in range(activities_per_event)
+        ])
+    return event_ids
+
+
+def make_calls(event_ids, attendees_per_event):
+    from datetime import time as clock
+    from models import Event, Attendee, Activity
+
+    def random_event():
+        return random.choice(event_ids)
+
+    def random_guest():
+        return f"guest{random.randrange(len(event_ids))}-{random.randrange(attendees_per_event)}"
+
+    def write():
+        Activity.create(f"Drop-in {random.random():.6f}", clock(12, 0), 15, random_event())
+
+    return [
+        ('Event.find_by_id', lambda: Event.find_by_id(random_event())),
+        ('Event.find_by_name', lambda: Event.find_by_name("Load Test 1")),
+        ('Attendee.find_by_id', lambda: Attendee.find_by_id(random.randint(1, len(event_ids) * attendees_per_event))),
+        ('Attendee.find_by_event', lambda: Attendee.find_by_event(random_event())),
+        ('Attendee.find_by_email', lambda: Attendee.find_by_email(f"{random_guest()}@example.com")),
+        ('Attendee.find_by_name', lambda: Attendee.find_by_name(random_guest().replace('guest', 'Guest '))),
+        ('Activity.find_by_event', lambda: Activity.find_by_event(random_event())),
+        ('Activity.find_by_name', lambda: Activity.find_by_name("Session 0")),
+    ], ('Activity.create', write)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def run(threads, ops, calls, write_call, write_ratio):
+    latencies = []
+    failures = {}
+    lock = threading.Lock()
+
+    def worker(_):
+        mine = []
+        errors = {}
+        for _ in range(ops):
+            name, call = write_call if random.random() < write_ratio else random.choice(calls)
+            started = time.perf_counter()
+            try:
+                call()
+            except Exception as e:
+                key = f"{name}: {type(e).__name__}"
+                errors[key] = errors.get(key, 0) + 1
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+            for key, count in errors.items():
+                failures[key] = failures.get(key, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return sorted(latencies), failures, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32, help="concurrent threads")
+    parser.add_argument('--ops', type=int, default=500, help="calls per thread")
+    parser.add_argument('--events', type=int, default=20, help="events to seed")
+    parser.add_argument('--attendees', type=int, default=200, help="attendees per event")
+    parser.add_argument('--activities', type=int, default=10, help="activities per event")
+    parser.add_argument('--write-ratio', type=float, default=0.02, help="fraction of calls that write")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        from models import Base, ENGINE, WRITE_ENGINE
+
+        Base.metadata.create_all(ENGINE)
+        event_ids = seed(args.events, args.attendees, args.activities)
+        calls, write_call = make_calls(event_ids, args.attendees)
+
+        latencies, failures, elapsed = run(args.threads, args.ops, calls, write_call, args.write_ratio)
+
+        total = len(latencies)
+        print(f"{'Threads':<9} {'Calls':<8} {'Seconds':<9} {'Calls/sec':<10} "
+              f"{'p50 ms':<8} {'p95 ms':<8} {'p99 ms'}")
+        print("-" * 64)
+        print(f"{args.threads:<9} {total:<8} {elapsed:<9.2f} {total / elapsed:<10.0f} "
+              f"{percentile(latencies, 0.50) * 1000:<8.2f} "
+              f"{percentile(latencies, 0.95) * 1000:<8.2f} "
+              f"{percentile(latencies, 0.99) * 1000:.2f}")
+        print(f"\nRead pool:  {ENGINE.pool.status()}")
+        print(f"Write pool: {WRITE_ENGINE.pool.status()}")
+        if failures:
+            print("\n❌ Failures:")
+            for key, count in sorted(failures.items()):
+                print(f"   {key} x{count}")
+        else:
+            print("\n✅ No failures")
+
+        ENGINE.dispose()
+        WRITE_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+Measure per-call latency of the model finders.
+
+Compares each finder with the statement it used to build on every call
+(session.query(...).filter(...)) against the current finder, which binds
+parameters into a prebuilt statement whose SQL comes from the engine's
+compiled cache. Both run against the same seeded temporary database.
+
+    python lib/benchmarks/finder_latency.py --calls 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(events, attendees_per_event):
+    from datetime import datetime, time as clock
+    from models import Event, Attendee, Activity
+
+    for n in range(events):
+        event = Event.create(f"Latency {n}", None, datetime(2030, 3, 1 + n % 28, 9), f"Suite {n}")
+        Attendee.bulk_create([
+            {'name': f"Guest {n}-{i}", 'email': f"guest{n}-{i}@example.com", 'event_id': event.id}
+            for i in range(attendees_per_event)
+        ])
+        Activity.bulk_create([
+            {'name': f"Slot {n}-{i}", 'start_time': clock(9 + i, 0), 'duration': 30, 'event_id': event.id}
+            for i in range(5)
+        ])
+
+
+def legacy_finders():
+    """The finders as they were: a new Query built and compiled per call"""
+    from models import SESSION, Event, Attendee, Activity
+
+    def query(build):
+        session = SESSION()
+        try:
+            return build(session)
+        finally:
+            session.close()
+
+    def event_with_children(session):
+        event = session.query(Event).filter(Event.id == 2).first()
+        _ = len(event.attendees)
+        _ = len(event.activities)
+        return event
+
+    return {
+        'Event.find_by_id': lambda: query(event_with_children),
+        'Attendee.find_by_id': lambda: query(
+            lambda s: s.query(Attendee).filter(Attendee.id == 7).first()),
+        'Attendee.find_by_event': lambda: query(
+            lambda s: s.query(Attendee).filter(Attendee.event_id == 2).all()),
+        'Attendee.find_by_email': lambda: query(
+            lambda s: s.query(Attendee).filter(Attendee.email == "guest1-3@example.com").first()),
+        'Attendee.find_by_name': lambda: query(
+            lambda s: s.query(Attendee).filter(Attendee.name.ilike('%Guest 1-3%')).all()),
+        'Activity.find_by_id': lambda: query(
+            lambda s: s.query(Activity).filter(Activity.id == 3).first()),
+        'Activity.find_by_event': lambda: query(
+            lambda s: s.query(Activity).filter(Activity.event_id == 2).all()),
+    }
+
+
+def current_finders():
+    from models import Event, Attendee, Activity
+
+    return {
+        'Event.find_by_id': lambda: Event.find_by_id(2),
+        'Attendee.find_by_id': lambda: Attendee.find_by_id(7),
+        'Attendee.find_by_event': lambda: Attendee.find_by_event(2),
+        'Attendee.find_by_email': lambda: Attendee.find_by_email("guest1-3@example.com"),
+        'Attendee.find_by_name': lambda: Attendee.find_by_name('Guest 1-3'),
+        'Activity.find_by_id': lambda: Activity.find_by_id(3),
+        'Activity.find_by_event': lambda: Activity.find_by_event(2),
+    }
+
+
+def per_call(func, calls):
+    func()  # first call compiles; measure the steady state
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help="calls per finder")
+    parser.add_argument('--events', type=int, default=5, help="events to seed")
+    parser.add_argument('--attendees', type=int, default=20, help="attendees per event")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'latency.db')}"
+        from models import Base, ENGINE, WRITE_ENGINE
+
+        Base.metadata.create_all(ENGINE)
+        seed(args.events, args.attendees)
+
+        before = legacy_finders()
+        after = current_finders()
+        print(f"{'Finder':<24} {'Before µs':<11} {'After µs':<10} {'Speedup'}")
+        print("-" * 56)
+        for name in before:
+            old = per_call(before[name], args.calls)
+            new = per_call(after[name], args.calls)
+            print(f"{name:<24} {old * 1e6:<11.1f} {new * 1e6:<10.1f} {old / new:.2f}x")
+
+        ENGINE.dispose()
+        WRITE_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
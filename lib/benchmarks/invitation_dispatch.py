@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the invitation pipeline against a local SMTP sink.
+
+Seeds a temporary database with --events events of --attendees Pending
+attendees each, and starts a minimal SMTP server in a background thread.
+The server accepts every message after --latency-ms, standing in for a
+real relay's round trips, and refuses recipients at bounce.example. The
+script then sends the invitations with each --connections setting,
+clearing invited_at between runs. It reports messages per second and
+checks that the server's count, the pipeline's count and the invited_at
+rows agree.
+
+    python lib/benchmarks/invitation_dispatch.py --events 5 --attendees 400 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOUNCE_DOMAIN = 'bounce.example'
+
+
+class SmtpSink:
+    """Just enough of an SMTP server to accept (and count) messages"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(asyncio.start_server(self._session, '127.0.0.1', 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        threading.Thread(target=self.loop.run_forever, name='smtp-sink', daemon=True).start()
+
+    async def _session(self, reader, writer):
+        writer.write(b"220 sink ESMTP\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command in (b'MAIL', b'RCPT', b'DATA'):
+                await asyncio.sleep(self.latency)
+            if command in (b'HELO', b'EHLO'):
+                writer.write(b"250 sink\r\n")
+            elif command == b'RCPT' and BOUNCE_DOMAIN.encode() in line.lower():
+                writer.write(b"550 No such user\r\n")
+            elif command == b'DATA':
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                while (await reader.readline()) not in (b".\r\n", b""):
+                    pass
+                self.received += 1
+                writer.write(b"250 Queued\r\n")
+            elif command == b'QUIT':
+                writer.write(b"221 Bye\r\n")
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def seed(events, attendees_per_event):
+    from datetime import datetime
+    from models import Event, Attendee
+
+    event_ids = []
+    for n in range(events):
+        event = Event.create(f"Invite Bench {n}", "Bring a friend.", datetime(2030, 5, 1 + n % 28, 18), f"Hall {n}")
+        event_ids.append(event.id)
+        Attendee.bulk_create([
+            {'name': f"Guest {n}-{i}", 'event_id': event.id,
+             'email': f"guest{n}-{i}@{BOUNCE_DOMAIN if i % 100 == 99 else 'example.com'}"}
+            for i in range(attendees_per_event)
+        ])
+    return event_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=5)
+    parser.add_argument('--attendees', type=int, default=400, help="Pending attendees per event")
+    parser.add_argument('--connections', default='1,4,8', help="comma-separated SMTP session counts")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="server delay per MAIL/RCPT/DATA")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'invitations.db')}"
+        from models import Base, ENGINE, WRITE_ENGINE, SESSION, Attendee
+        from models.write_path import run_write
+        from invitations import INVITATION, send_invitations
+
+        Base.metadata.create_all(ENGINE)
+        event_ids = seed(args.events, args.attendees)
+        sink = SmtpSink(args.latency_ms / 1000.0)
+
+        print(f"{'Connections':<12} {'Sent':<7} {'Failed':<7} {'Seconds':<8} {'Msg/s':<8} Consistent")
+        print("-" * 56)
+        for connections in (int(n) for n in args.connections.split(',')):
+            run_write(lambda session: session.query(Attendee).update({'invited_at': None}))
+            sink.received = 0
+            summary = send_invitations(event_ids, INVITATION, connections, host='127.0.0.1', port=sink.port)
+            session = SESSION()
+            try:
+                marked = session.query(Attendee).filter(Attendee.invited_at.isnot(None)).count()
+            finally:
+                session.close()
+            consistent = summary['sent'] == sink.received == marked
+            print(f"{connections:<12} {summary['sent']:<7} {len(summary['failed']):<7} "
+                  f"{summary['seconds']:<8.2f} {summary['sent'] / summary['seconds']:<8.0f} {consistent}")
+
+        ENGINE.dispose()
+        WRITE_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Compare peak memory and time of get_all() against the streaming iterators.
+
+Seeds a temporary database with --attendees attendees, then makes one full
+pass over them with Attendee.get_all() and with Attendee.iter_all() at a few
+batch sizes, measuring the peak with tracemalloc (which slows everything
+down equally; compare the columns, not the absolute times).
+
+    python lib/benchmarks/streaming_memory.py --attendees 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(attendees, per_event=1000):
+    from datetime import datetime
+    from models import Event, Attendee
+
+    for n in range(0, attendees, per_event):
+        event = Event.create(f"Streaming {n}", None, datetime(2030, 4, 1 + n // per_event % 28), f"Hall {n}")
+        Attendee.bulk_create([
+            {'name': f"Guest {i}", 'email': f"guest{i}@example.com", 'event_id': event.id}
+            for i in range(n, min(n + per_event, attendees))
+        ])
+
+
+def measure(label, full_pass):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = full_pass()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<26} {rows:<9} {peak / 1e6:<10.1f} {elapsed:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--attendees', type=int, default=100000, help="attendees to seed")
+    parser.add_argument('--batch-sizes', default='100,1000,5000', help="comma-separated iter_all() batch sizes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'streaming.db')}"
+        from models import Base, ENGINE, WRITE_ENGINE, Attendee
+
+        Base.metadata.create_all(ENGINE)
+        seed(args.attendees)
+        Attendee.count()  # compile and warm the page cache before measuring
+
+        print(f"{'Pass':<26} {'Rows':<9} {'Peak MB':<10} {'Seconds'}")
+        print("-" * 55)
+        measure("get_all()", lambda: len(Attendee.get_all()))
+        for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+            measure(f"iter_all({batch_size})", lambda: sum(1 for _ in Attendee.iter_all(batch_size)))
+        measure("count()", Attendee.count)
+
+        ENGINE.dispose()
+        WRITE_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark write throughput with several processes writing to one database.
+
+Each writer process creates activities through Activity.create, so every
+write goes through the shared write path (BEGIN IMMEDIATE plus busy retry).
+Use --threads to run several writers inside each process and --queue to
+funnel them through the grouped writer thread.
+
+    python lib/benchmarks/write_throughput.py --processes 1,2,4,8 --ops 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _writer(args):
+    event_id, ops, threads, use_queue = args
+    from datetime import time as clock
+    from models import Activity
+    from models.write_path import WriteConflictError, enable_write_queue, disable_write_queue
+
+    if use_queue:
+        enable_write_queue()
+
+    def write(n):
+        try:
+            Activity.create(f"Session {n}", clock(9 + n % 8, 0), 30, event_id)
+            return 0
+        except WriteConflictError:
+            return 1
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        failures = sum(pool.map(write, range(ops)))
+
+    if use_queue:
+        disable_write_queue()
+    return failures
+
+
+def run(processes, ops, threads, use_queue, event_id):
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    with context.Pool(processes) as pool:
+        failures = sum(pool.map(_writer, [(event_id, ops, threads, use_queue)] * processes))
+    elapsed = time.perf_counter() - started
+    return processes * ops, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', default='1,2,4,8', help="comma-separated writer process counts")
+    parser.add_argument('--ops', type=int, default=200, help="writes per process")
+    parser.add_argument('--threads', type=int, default=1, help="writer threads per process")
+    parser.add_argument('--queue', action='store_true', help="group writes through the writer thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['EVENT_PLANNER_DB_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        from datetime import datetime
+        from models import Base, ENGINE, Event
+
+        Base.metadata.create_all(ENGINE)
+        event = Event.create("Benchmark", None, datetime(2030, 1, 1, 9), "Bench Hall")
+
+        print(f"{'Processes':<10} {'Writes':<8} {'Failed':<8} {'Seconds':<9} {'Writes/sec'}")
+        print("-" * 50)
+        for count in [int(n) for n in args.processes.split(',')]:
+            total, failures, elapsed = run(count, args.ops, args.threads, args.queue, event.id)
+            print(f"{count:<10} {total:<8} {failures:<8} {elapsed:<9.2f} {total / elapsed:.0f}")
+        ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    main()
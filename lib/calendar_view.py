@@ -0,0 +1,92 @@
+"""
+Month and week calendar views of events.
+
+Each view asks Event.find_between() for just its own date range, so paging
+through a year reads that year's slice of the events(date) index and
+nothing else. The render functions return lines of text and don't touch
+the database.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+
+from models.venue_index import DEFAULT_EVENT_DURATION
+
+DAY_WIDTH = 10  # characters per day column in the month grid
+WEEK_LISTING_WIDTH = 40
+
+
+def month_range(year, month):
+    """Return the [start, end) datetimes of a month"""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def week_range(day):
+    """Return the [start, end) datetimes of the Monday-to-Sunday week containing `day`"""
+    monday = day - timedelta(days=day.weekday())
+    start = datetime(monday.year, monday.month, monday.day)
+    return start, start + timedelta(days=7)
+
+
+def shift_month(year, month, months):
+    """Return (year, month) moved by `months` (negative to go back)"""
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _by_day(rows):
+    days = {}
+    for row in rows:
+        days.setdefault(row.date.date(), []).append(row)
+    return days
+
+
+def _status_mark(row):
+    return {'Cancelled': '✗', 'Completed': '✓'}.get(row.status, '•')
+
+
+def render_month(year, month, rows, today=None):
+    """Render a month grid with event counts per day, then the month's events"""
+    today = today or date.today()
+    days = _by_day(rows)
+    lines = [f"{calendar.month_name[month]} {year}".center(7 * DAY_WIDTH).rstrip(),
+             "".join(name[:2].ljust(DAY_WIDTH) for name in calendar.day_name).rstrip()]
+    for week in calendar.Calendar().monthdatescalendar(year, month):
+        cells = []
+        for day in week:
+            if day.month != month:
+                cells.append(" " * DAY_WIDTH)
+                continue
+            label = f"[{day.day}]" if day == today else f"{day.day}"
+            count = len(days.get(day, ()))
+            if count:
+                label += f" ({count})"
+            cells.append(label.ljust(DAY_WIDTH))
+        lines.append("".join(cells).rstrip())
+
+    lines.append("")
+    if not rows:
+        lines.append("No events this month.")
+    for row in rows:
+        lines.append(f"{_status_mark(row)} {row.date:%a %d %H:%M}  {row.name} @ {row.location} (ID: {row.id})")
+    return lines
+
+
+def render_week(start, rows, today=None):
+    """Render each day of the week starting `start` with its events"""
+    today = today or date.today()
+    days = _by_day(rows)
+    lines = []
+    for offset in range(7):
+        day = (start + timedelta(days=offset)).date()
+        marker = "  ← today" if day == today else ""
+        lines.append(f"{day:%A %Y-%m-%d}{marker}")
+        for row in days.get(day, ()):
+            end = row.date + timedelta(minutes=row.duration or DEFAULT_EVENT_DURATION)
+            lines.append(f"   {_status_mark(row)} {row.date:%H:%M}-{end:%H:%M}  "
+                         f"{row.name[:WEEK_LISTING_WIDTH]} @ {row.location} (ID: {row.id})")
+        if day not in days:
+            lines.append("   —")
+    return lines
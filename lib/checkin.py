@@ -0,0 +1,230 @@
+"""
+High-throughput event check-in.
+
+A CheckInDesk loads one event's attendees into memory, keyed by normalized
+email and by ID, so each scan is a dict lookup. Check-in timestamps are
+queued and written by a background thread in small batched transactions;
+at most one unflushed batch is lost if the process dies.
+
+A write never overwrites an existing check-in time. Attendees another desk
+checked in first are reported by take_conflicts(). A check-in that still
+can't be saved after MAX_WRITE_ATTEMPTS is dropped from the queue and
+reported by take_failures().
+
+A desk belongs to the tenant that was current when it was built; its
+writer thread has no tenant of its own, so each batch is written under
+use_tenant() of the desk's tenant.
+"""
+
+import queue
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+from sqlalchemy import bindparam, select, update
+
+from models import SESSION, Attendee, current_tenant, use_tenant
+from models.write_path import run_write
+
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+NOT_FOUND = 'not_found'
+MAX_WRITE_ATTEMPTS = 5
+
+
+class CheckInDesk:
+    """In-memory check-in index for a single event"""
+
+    def __init__(self, event_id, batch_size=50, flush_interval=1.0):
+        self.event_id = event_id
+        self.tenant = current_tenant()  # the writer thread writes to this tenant's database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.by_email = {}
+        self.by_id = {}
+        self.last_error = None
+        self._conflicts = []  # records another desk had already checked in
+        self._failures = []   # records whose check-in could not be saved
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._stop = threading.Event()
+        self._writer = None
+        self.load()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def normalize_email(email):
+        return email.strip().lower()
+
+    def load(self):
+        """Preload the event's attendees with a single query"""
+        session = SESSION()
+        try:
+            rows = session.query(
+                Attendee.id, Attendee.name, Attendee.email, Attendee.rsvp_status, Attendee.checked_in_at
+            ).filter(Attendee.event_id == self.event_id).all()
+        finally:
+            session.close()
+
+        by_email, by_id = {}, {}
+        for attendee_id, name, email, rsvp_status, checked_in_at in rows:
+            record = {
+                'id': attendee_id,
+                'name': name,
+                'email': email,
+                'rsvp_status': rsvp_status,
+                'checked_in_at': checked_in_at,
+            }
+            by_id[attendee_id] = record
+            by_email[self.normalize_email(email)] = record
+        with self._lock:
+            self.by_email, self.by_id = by_email, by_id
+
+    def lookup(self, key):
+        """Find an attendee record by email or numeric ID"""
+        key = str(key).strip()
+        if key.isdigit():
+            return self.by_id.get(int(key))
+        return self.by_email.get(self.normalize_email(key))
+
+    def check_in(self, key, when=None):
+        """Check an attendee in by email or ID.
+
+        Returns (status, record) where status is CHECKED_IN,
+        ALREADY_CHECKED_IN or NOT_FOUND. The database write is queued.
+        """
+        record = self.lookup(key)
+        if record is None:
+            return NOT_FOUND, None
+
+        with self._lock:
+            if record['checked_in_at'] is not None:
+                return ALREADY_CHECKED_IN, record
+            record['checked_in_at'] = when or datetime.now()
+
+        self._pending.put((record['id'], record['checked_in_at'], 1))
+        return CHECKED_IN, record
+
+    def take_conflicts(self):
+        """Return and clear the records found already checked in by another desk.
+
+        Their checked_in_at now holds the time that was saved first.
+        """
+        with self._lock:
+            conflicts, self._conflicts = self._conflicts, []
+        return conflicts
+
+    def take_failures(self):
+        """Return and clear the records whose check-in gave up after MAX_WRITE_ATTEMPTS.
+
+        They are marked not checked in again, so scanning them retries.
+        """
+        with self._lock:
+            failures, self._failures = self._failures, []
+        return failures
+
+    def stats(self):
+        """Return (checked_in, total) for the event"""
+        checked_in = sum(1 for r in self.by_id.values() if r['checked_in_at'] is not None)
+        return checked_in, len(self.by_id)
+
+    # Background writer
+    def start(self):
+        """Start the background writer thread"""
+        if self._writer is None:
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._run, name=f"checkin-writer-{self.event_id}", daemon=True)
+            self._writer.start()
+
+    def close(self):
+        """Stop the writer after flushing everything still queued"""
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def _next_batch(self, timeout):
+        batch = []
+        try:
+            batch.append(self._pending.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch and not self._write(batch):
+                self._stop.wait(self.flush_interval)
+
+    def flush(self):
+        """Write every queued check-in synchronously.
+
+        Failed batches are retried until they are saved or give up after
+        MAX_WRITE_ATTEMPTS, so the queue is empty afterwards.
+        """
+        while True:
+            batch = self._next_batch(timeout=0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        ids = [attendee_id for attendee_id, _, _ in batch]
+
+        def _save(session):
+            # Rows another desk checked in first keep their time
+            taken = dict(session.execute(_CHECKED_IN_ALREADY, {'ids': ids}).all())
+            rows = [
+                {'attendee_id': attendee_id, 'when': checked_in_at}
+                for attendee_id, checked_in_at, _ in batch
+                if attendee_id not in taken
+            ]
+            if rows:
+                session.execute(_CHECK_IN, rows)
+            return taken
+
+        try:
+            with use_tenant(self.tenant) if self.tenant is not None else nullcontext():
+                taken = run_write(_save)
+        except Exception as e:
+            self.last_error = e
+            # Keep the batch so the next cycle retries it, a bounded number of times
+            with self._lock:
+                for attendee_id, checked_in_at, attempts in batch:
+                    if attempts < MAX_WRITE_ATTEMPTS:
+                        self._pending.put((attendee_id, checked_in_at, attempts + 1))
+                    else:
+                        record = self.by_id[attendee_id]
+                        record['checked_in_at'] = None
+                        self._failures.append(record)
+            return False
+
+        with self._lock:
+            for attendee_id, checked_in_at in taken.items():
+                record = self.by_id[attendee_id]
+                record['checked_in_at'] = checked_in_at
+                self._conflicts.append(record)
+        return True
+
+
+_CHECKED_IN_ALREADY = select(Attendee.id, Attendee.checked_in_at).where(
+    Attendee.id.in_(bindparam('ids', expanding=True)), Attendee.checked_in_at.isnot(None)
+)
+# The IS NULL guard means an earlier check-in is never overwritten, even
+# by a writer that doesn't go through run_write()
+_CHECK_IN = update(Attendee.__table__).where(
+    Attendee.__table__.c.id == bindparam('attendee_id'), Attendee.__table__.c.checked_in_at.is_(None)
+).values(checked_in_at=bindparam('when'))
@@ -4,31 +4,47 @@ from helpers import (
     # Utility functions
     clear_screen, print_header, wait_for_enter, get_input,
     # Event functions
-    list_all_events, create_event, view_event_details, delete_event,
+    list_all_events, create_event, view_event_details, delete_event, audit_venue_bookings,
+    clone_event, create_event_series,
     # Attendee functions  
     list_attendees_for_event, add_attendee_to_event, update_attendee_rsvp, delete_attendee,
+    search_attendees, run_check_in, send_event_invitations,
     # Activity functions
-    list_activities_for_event, add_activity_to_event, delete_activity,
+    list_activities_for_event, add_activity_to_event, delete_activity, export_event_schedule,
+    sign_up_for_activity, cancel_activity_sign_up,
     # Dashboard and reporting
-    show_event_dashboard, search_events, generate_event_report,
+    show_event_dashboard, search_events, generate_event_report, show_event_calendar, show_budget_report,
     # System functions
-    exit_program
+    select_tenant, exit_program
 )
+from models import current_tenant
+from warmup import start_warmup
+from profiling import profile_action
 
 def main():
     """Main application loop"""
-    # Initialize database
-    from models import Base, ENGINE
-    Base.metadata.create_all(ENGINE)
+    # Pick the organization, then initialize its database
+    select_tenant()
+    from models import upgrade_schema
+    upgrade_schema()
     
     clear_screen()
     print("🎉 Welcome to Event Planner CLI!")
     print("Your complete solution for managing events, attendees, and activities.")
     
+    warmup = None
     while True:
         try:
             main_menu()
+            if warmup is None:
+                # Warm caches while the user reads the menu
+                warmup = start_warmup() or False
             choice = get_input("\nSelect an option", int)
+            if warmup:
+                # Hand off: the first action runs only once warm-up has
+                # stopped (finished, or cancelled after HANDOFF_TIMEOUT)
+                warmup.wait()
+                warmup = False
             
             if choice == 0:
                 exit_program()
@@ -39,13 +55,21 @@ def main():
             elif choice == 3:
                 activity_management_menu()
             elif choice == 4:
-                show_event_dashboard()
+                profile_action(show_event_dashboard)
                 wait_for_enter()
             elif choice == 5:
-                search_events()
+                profile_action(search_events)
                 wait_for_enter()
             elif choice == 6:
-                generate_event_report()
+                profile_action(generate_event_report)
+                wait_for_enter()
+            elif choice == 7:
+                profile_action(run_check_in)
+                wait_for_enter()
+            elif choice == 8:
+                profile_action(show_event_calendar)
+            elif choice == 9:
+                profile_action(show_budget_report)
                 wait_for_enter()
             else:
                 print("❌ Invalid choice. Please select a number from the menu.")
@@ -60,13 +84,17 @@ def main():
 def main_menu():
     """Display the main menu"""
     clear_screen()
-    print_header("Event Planner - Main Menu")
+    tenant = current_tenant()
+    print_header(f"Event Planner - Main Menu ({tenant})" if tenant else "Event Planner - Main Menu")
     print("1. 📅 Manage Events")
     print("2. 👥 Manage Attendees")
     print("3. 🎯 Manage Activities")
     print("4. 📊 Event Dashboard")
     print("5. 🔍 Search Events")
     print("6. 📋 Generate Event Report")
+    print("7. 🎟️  Event Check-In Mode")
+    print("8. 📆 Event Calendar")
+    print("9. 💰 Budget Report")
     print("0. 🚪 Exit")
 
 def event_management_menu():
@@ -79,6 +107,9 @@ def event_management_menu():
             print("2. ➕ Create New Event")
             print("3. 👁️  View Event Details")
             print("4. 🗑️  Delete Event")
+            print("5. 🏢 Audit Venue Double-Bookings")
+            print("6. 📑 Clone Event")
+            print("7. 🔁 Create Recurring Series")
             print("0. ⬅️  Back to Main Menu")
             
             choice = get_input("\nSelect an option", int)
@@ -86,16 +117,25 @@ def event_management_menu():
             if choice == 0:
                 break
             elif choice == 1:
-                list_all_events()
+                profile_action(list_all_events)
                 wait_for_enter()
             elif choice == 2:
-                create_event()
+                profile_action(create_event)
                 wait_for_enter()
             elif choice == 3:
-                view_event_details()
+                profile_action(view_event_details)
                 wait_for_enter()
             elif choice == 4:
-                delete_event()
+                profile_action(delete_event)
+                wait_for_enter()
+            elif choice == 5:
+                profile_action(audit_venue_bookings)
+                wait_for_enter()
+            elif choice == 6:
+                profile_action(clone_event)
+                wait_for_enter()
+            elif choice == 7:
+                profile_action(create_event_series)
                 wait_for_enter()
             else:
                 print("❌ Invalid choice. Please select a number from the menu.")
@@ -117,6 +157,8 @@ def attendee_management_menu():
             print("2. ➕ Add New Attendee")
             print("3. 📝 Update RSVP Status")
             print("4. 🗑️  Remove Attendee")
+            print("5. 🔍 Find Attendee (fuzzy)")
+            print("6. ✉️  Send Invitations / RSVP Reminders")
             print("0. ⬅️  Back to Main Menu")
             
             choice = get_input("\nSelect an option", int)
@@ -124,16 +166,22 @@ def attendee_management_menu():
             if choice == 0:
                 break
             elif choice == 1:
-                list_attendees_for_event()
+                profile_action(list_attendees_for_event)
                 wait_for_enter()
             elif choice == 2:
-                add_attendee_to_event()
+                profile_action(add_attendee_to_event)
                 wait_for_enter()
             elif choice == 3:
-                update_attendee_rsvp()
+                profile_action(update_attendee_rsvp)
                 wait_for_enter()
             elif choice == 4:
-                delete_attendee()
+                profile_action(delete_attendee)
+                wait_for_enter()
+            elif choice == 5:
+                profile_action(search_attendees)
+                wait_for_enter()
+            elif choice == 6:
+                profile_action(send_event_invitations)
                 wait_for_enter()
             else:
                 print("❌ Invalid choice. Please select a number from the menu.")
@@ -154,6 +202,9 @@ def activity_management_menu():
             print("1. 🎯 View Activities by Event")
             print("2. ➕ Add New Activity")
             print("3. 🗑️  Delete Activity")
+            print("4. 🗂️  Export Track Schedule (JSON)")
+            print("5. ✍️  Sign Up Attendee")
+            print("6. ↩️  Cancel Sign-Up")
             print("0. ⬅️  Back to Main Menu")
             
             choice = get_input("\nSelect an option", int)
@@ -161,13 +212,22 @@ def activity_management_menu():
             if choice == 0:
                 break
             elif choice == 1:
-                list_activities_for_event()
+                profile_action(list_activities_for_event)
                 wait_for_enter()
             elif choice == 2:
-                add_activity_to_event()
+                profile_action(add_activity_to_event)
                 wait_for_enter()
             elif choice == 3:
-                delete_activity()
+                profile_action(delete_activity)
+                wait_for_enter()
+            elif choice == 4:
+                profile_action(export_event_schedule)
+                wait_for_enter()
+            elif choice == 5:
+                profile_action(sign_up_for_activity)
+                wait_for_enter()
+            elif choice == 6:
+                profile_action(cancel_activity_sign_up)
                 wait_for_enter()
             else:
                 print("❌ Invalid choice. Please select a number from the menu.")
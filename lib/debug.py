@@ -5,19 +5,28 @@ Debug helper script for Event Planner CLI
 Use this script to test ORM methods and populate sample data
 """
 
-from models import Base, ENGINE, SESSION, Event, Attendee, Activity
+from models import SESSION, ROUTER, upgrade_schema, use_tenant, Event, Attendee, Activity, AttendeeTrigram, ActivitySignup
+from models.attendee_search import rebuild_trigram_index
+from checkin import CheckInDesk, CHECKED_IN
 from datetime import datetime, time
+import glob
+import os
+import time as clock
+
+DEBUG_TENANT = 'debug-checkin'  # throwaway organization used by test_tenant_check_in()
 
 def init_db():
-    """Initialize the database with tables"""
-    Base.metadata.create_all(ENGINE)
-    print("✅ Database tables created successfully!")
+    """Create the database tables, or add what an older database is missing"""
+    added = upgrade_schema()
+    print(f"✅ Database schema is up to date{' (added ' + ', '.join(added) + ')' if added else ''}!")
 
 def clear_db():
     """Clear all data from the database"""
     session = SESSION()
     try:
+        session.query(ActivitySignup).delete()
         session.query(Activity).delete()
+        session.query(AttendeeTrigram).delete()
         session.query(Attendee).delete()
         session.query(Event).delete()
         session.commit()
@@ -159,9 +168,9 @@ def create_sample_data():
         )
         
         print("✅ Sample data created successfully!")
-        print(f"   - {len(Event.get_all())} events created")
-        print(f"   - {len(Attendee.get_all())} attendees created")
-        print(f"   - {len(Activity.get_all())} activities created")
+        print(f"   - {Event.count()} events created")
+        print(f"   - {Attendee.count()} attendees created")
+        print(f"   - {Activity.count()} activities created")
         
     except Exception as e:
         print(f"❌ Error creating sample data: {e}")
@@ -198,32 +207,169 @@ def test_orm_methods():
         print(f"   - Event '{event.name}' has {len(event.attendees)} attendees")
         print(f"   - Event '{event.name}' has {len(event.activities)} activities")
         
+        # The objects are detached, so follow event_id rather than the
+        # lazy `event` relationship
         if event.attendees:
             attendee = event.attendees[0]
-            print(f"   - Attendee '{attendee.name}' belongs to event '{attendee.event.name}'")
+            print(f"   - Attendee '{attendee.name}' belongs to event '{Event.find_by_id(attendee.event_id).name}'")
         
         if event.activities:
             activity = event.activities[0]
-            print(f"   - Activity '{activity.name}' belongs to event '{activity.event.name}'")
+            print(f"   - Activity '{activity.name}' belongs to event '{Event.find_by_id(activity.event_id).name}'")
+    
+    # Test tenant routing of background writes
+    print("\n🏢 Testing check-in under an organization:")
+    try:
+        test_tenant_check_in()
+        print(f"   - Check-in written to '{DEBUG_TENANT}' only ✅")
+    except AssertionError as e:
+        print(f"   - ❌ {e}")
+
+def _checked_in_at(attendee_id):
+    attendee = Attendee.find_by_id(attendee_id)
+    return attendee.checked_in_at if attendee else None
+
+def test_tenant_check_in(timeout=5.0):
+    """Check in on a desk's writer thread under use_tenant() and assert which database was written
+    
+    Uses a throwaway organization database, removed afterwards. The shared
+    database's attendee with the same ID (if any) must keep its check-in time.
+    """
+    try:
+        with use_tenant(DEBUG_TENANT):
+            event = Event.create(name="Check-in Test", description="", date=datetime(2030, 1, 1, 9),
+                                 location="Debug Hall")
+            attendee = Attendee.create(name="Tess Tenant", email="tess@example.com", event_id=event.id)
+        shared_before = _checked_in_at(attendee.id)
+        
+        with use_tenant(DEBUG_TENANT):
+            with CheckInDesk(event.id, flush_interval=0.05) as desk:
+                status, _ = desk.check_in(attendee.id)
+                assert status == CHECKED_IN, f"check_in returned {status}"
+                # Wait for the writer thread, not close(), which flushes on this thread
+                deadline = clock.monotonic() + timeout
+                while _checked_in_at(attendee.id) is None and clock.monotonic() < deadline:
+                    clock.sleep(0.05)
+                assert _checked_in_at(attendee.id) is not None, \
+                    f"attendee {attendee.id} was not checked in in '{DEBUG_TENANT}'"
+        assert _checked_in_at(attendee.id) == shared_before, \
+            f"the writer thread checked in attendee {attendee.id} in the shared database"
+    finally:
+        ROUTER.dispose(DEBUG_TENANT)
+        for path in glob.glob(ROUTER.path(DEBUG_TENANT) + '*'):
+            os.remove(path)
 
 def show_database_stats():
     """Show current database statistics"""
-    events = Event.get_all()
-    attendees = Attendee.get_all()
-    activities = Activity.get_all()
+    event_count = Event.count()
     
     print("📊 Database Statistics")
     print("=" * 30)
-    print(f"Events: {len(events)}")
-    print(f"Attendees: {len(attendees)}")
-    print(f"Activities: {len(activities)}")
+    print(f"Events: {event_count}")
+    print(f"Attendees: {Attendee.count()}")
+    print(f"Activities: {Activity.count()}")
     
-    if events:
-        total_budget = sum(e.budget for e in events)
-        total_cost = sum(e.get_total_activity_cost() for e in events)
+    if event_count:
+        # Streamed, so the totals don't need every row in memory at once
+        total_budget = sum(e.budget or 0.0 for e in Event.iter_all())
+        total_cost = sum(a.cost or 0.0 for a in Activity.iter_all())
         print(f"Total Budget: ${total_budget:.2f}")
         print(f"Total Activity Costs: ${total_cost:.2f}")
 
+def rebuild_search_index():
+    """Rebuild the attendee trigram search index"""
+    session = SESSION()
+    try:
+        rebuild_trigram_index(session)
+        count = session.query(AttendeeTrigram).count()
+        print(f"✅ Search index rebuilt ({count} trigrams)")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error rebuilding search index: {e}")
+    finally:
+        session.close()
+
+def snapshot_database():
+    """Take a consistent copy of the database, or a columnar export"""
+    import snapshot
+    path = input("Snapshot file (.db) or export directory: ").strip()
+    if not path:
+        print("❌ Operation cancelled.")
+        return
+    if path.endswith('.db'):
+        snapshot.snapshot(path)
+        print(f"✅ Snapshot written to {path}")
+    else:
+        counts = snapshot.export_npz(path)
+        print(f"✅ Exported {sum(counts.values())} rows from {len(counts)} tables to {path}")
+
+def restore_database():
+    """Replace the database with a snapshot file or columnar export"""
+    import snapshot
+    path = input("Snapshot file (.db) or export directory: ").strip()
+    if not path or input("⚠️  This replaces ALL current data. Are you sure? (yes/no): ").lower() != 'yes':
+        print("❌ Operation cancelled.")
+        return
+    if path.endswith('.db'):
+        snapshot.restore(path)
+        print(f"✅ Database restored from {path}")
+    else:
+        counts = snapshot.import_npz(path)
+        print(f"✅ Imported {sum(counts.values())} rows into {len(counts)} tables from {path}")
+
+def toggle_profiling():
+    """Turn per-action profiling of the CLI on or off"""
+    import profiling
+    profiling.set_profiling(not os.path.exists(profiling.TOGGLE_FILE))
+    if os.path.exists(profiling.TOGGLE_FILE):
+        print(f"✅ CLI action profiling ON; profiles go to {profiling.PROFILE_DIR}/")
+    else:
+        print("✅ CLI action profiling OFF")
+    if os.environ.get('EVENT_PLANNER_PROFILE') is not None:
+        print("⚠️  EVENT_PLANNER_PROFILE is set and overrides this toggle")
+
+def show_tenant_summary():
+    """Show totals for every organization database, queried in parallel"""
+    from models import ROUTER, fan_out
+    from models.budget import budget_totals
+    
+    def summarize():
+        totals = budget_totals()
+        return Event.count(), Attendee.count(), Activity.count(), totals.spend, totals.budget, totals.over_budget
+    
+    summaries = fan_out(summarize)
+    if not summaries:
+        print(f"ℹ️  No organization databases in {ROUTER.directory}/")
+        return
+    
+    print("🏢 Organization Summary")
+    print("=" * 86)
+    print(f"{'Organization':<20} {'Events':>8} {'Attendees':>10} {'Activities':>11} {'Spend':>12} {'Budget':>12} {'Over':>6}")
+    for tenant, row in summaries.items():
+        print(f"{tenant:<20} {row[0]:>8} {row[1]:>10} {row[2]:>11} {row[3]:>12.2f} {row[4]:>12.2f} {row[5]:>6}")
+    totals = [sum(column) for column in zip(*summaries.values())]
+    print("-" * 86)
+    print(f"{'Total':<20} {totals[0]:>8} {totals[1]:>10} {totals[2]:>11} {totals[3]:>12.2f} {totals[4]:>12.2f} {totals[5]:>6}")
+
+def run_maintenance():
+    """Analyze, vacuum and check the database"""
+    import maintenance
+    seconds = input(f"Incremental vacuum time budget in seconds [{maintenance.VACUUM_SECONDS:g}]: ").strip()
+    conn = maintenance.connect()
+    try:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+    enable = False
+    if auto_vacuum != maintenance.AUTO_VACUUM_INCREMENTAL:
+        print("ℹ️  Incremental vacuum is off for this database. Turning it on needs one full VACUUM,")
+        print("   which rewrites the whole file and blocks writers until it finishes.")
+        enable = input("Run the full VACUUM now? (yes/no): ").lower() == 'yes'
+    problems = maintenance.run_maintenance(float(seconds) if seconds else maintenance.VACUUM_SECONDS,
+                                           enable_incremental=enable)
+    if problems:
+        print(f"⚠️  {problems} problem(s) found; see above")
+
 def main():
     """Main debug menu"""
     while True:
@@ -235,6 +381,12 @@ def main():
         print("3. Create Sample Data")
         print("4. Test ORM Methods")
         print("5. Show Database Stats")
+        print("6. Rebuild Attendee Search Index")
+        print("7. Snapshot / Export Database")
+        print("8. Restore / Import Database")
+        print("9. Toggle CLI Action Profiling")
+        print("10. Cross-Organization Summary")
+        print("11. Database Maintenance (vacuum, analyze, checks)")
         print("0. Exit")
         
         try:
@@ -256,6 +408,18 @@ def main():
                 test_orm_methods()
             elif choice == 5:
                 show_database_stats()
+            elif choice == 6:
+                rebuild_search_index()
+            elif choice == 7:
+                snapshot_database()
+            elif choice == 8:
+                restore_database()
+            elif choice == 9:
+                toggle_profiling()
+            elif choice == 10:
+                show_tenant_summary()
+            elif choice == 11:
+                run_maintenance()
             else:
                 print("❌ Invalid choice.")
                 
@@ -1,12 +1,22 @@
-from models import Event, Attendee, Activity
-from datetime import datetime, time
+from models import SESSION, ROUTER, Event, Attendee, Activity, UpdateConflictError, current_tenant, set_tenant
+from models.tenants import validate_tenant
+from models.venue_index import DEFAULT_EVENT_DURATION, VenueConflictError, find_venue_clashes
+from models.budget import SORTS as BUDGET_SORTS, budget_totals, event_budgets
+from models.validation import EVENT_STATUSES
+from scheduling import build_track_schedule, export_track_schedule
+from tables import clear_terminal, print_table
+from report_cache import REPORT_CACHE
+from datetime import datetime, time, timedelta
 import sys
 
+MAX_CONFLICT_RETRIES = 3  # re-fetch and retry an edit this many times on a conflict
+DASHBOARD_OVER_BUDGET_LIMIT = 10
+BUDGET_REPORT_LIMIT = 20
+
 # Utility functions
 def clear_screen():
     """Clear the terminal screen"""
-    import os
-    os.system('cls' if os.name == 'nt' else 'clear')
+    clear_terminal()
 
 def print_header(title):
     """Print a formatted header"""
@@ -80,13 +90,14 @@ def list_all_events():
         return []
     
     print_header("All Events")
-    print(f"{'ID':<5} {'Name':<25} {'Date':<20} {'Location':<20} {'Status':<12} {'Attendees'}")
-    print_divider()
-    
-    for event in events:
-        attendee_count = event.get_attendee_count()
-        date_str = event.date.strftime("%Y-%m-%d %H:%M")
-        print(f"{event.id:<5} {event.name[:24]:<25} {date_str:<20} {event.location[:19]:<20} {event.status:<12} {attendee_count}")
+    print_table(
+        [('ID', None), ('Name', 24), ('Date', 16), ('Location', 19), ('Status', 11), ('Attendees', None)],
+        [
+            (event.id, event.name, event.date.strftime("%Y-%m-%d %H:%M"), event.location,
+             event.status, event.get_attendee_count())
+            for event in events
+        ]
+    )
     
     return events
 
@@ -98,6 +109,7 @@ def create_event():
         name = get_input("Event name")
         description = get_input("Description", required=False)
         date = get_input("Date and time", datetime)
+        duration = get_input(f"Duration in minutes (default: {DEFAULT_EVENT_DURATION})", int, required=False) or DEFAULT_EVENT_DURATION
         location = get_input("Location")
         budget = get_input("Budget (optional, default: 0)", float, required=False) or 0.0
         
@@ -108,9 +120,13 @@ def create_event():
         if status not in status_options:
             status = 'Planning'
         
-        event = Event.create(name, description, date, location, budget, status)
+        event = Event.create(name, description, date, location, budget, status, duration)
         print(f"\n✅ Event '{event.name}' created successfully! (ID: {event.id})")
         
+    except VenueConflictError as e:
+        print(f"\n❌ {e.location} is not available at that time. Already booked by:")
+        for event_id, event_name in e.clashes:
+            print(f"   • {event_name} (ID: {event_id})")
     except Exception as e:
         print(f"\n❌ Error creating event: {e}")
 
@@ -132,7 +148,7 @@ def view_event_details():
         print(f"ID: {event.id}")
         print(f"Name: {event.name}")
         print(f"Description: {event.description or 'No description'}")
-        print(f"Date & Time: {event.date.strftime('%Y-%m-%d %H:%M')}")
+        print(f"Date & Time: {event.date.strftime('%Y-%m-%d %H:%M')} - {event.get_end_time().strftime('%Y-%m-%d %H:%M')}")
         print(f"Location: {event.location}")
         print(f"Budget: ${event.budget:.2f}")
         print(f"Status: {event.status}")
@@ -194,6 +210,76 @@ def delete_event():
     except Exception as e:
         print(f"\n❌ Error deleting event: {e}")
 
+def clone_event():
+    """Copy an event and its activities to a new date"""
+    events = list_all_events()
+    if not events:
+        return
+    
+    try:
+        event_id = get_input("\nEnter event ID to clone", int)
+        date = get_input("New date and time", datetime)
+        with_attendees = confirm_action("Invite the same attendees (RSVP reset to Pending)?")
+        
+        event = Event.clone(event_id, date, with_attendees)
+        print(f"\n✅ Event '{event.name}' cloned to {event.date.strftime('%Y-%m-%d %H:%M')} (ID: {event.id})")
+        print(f"   {len(event.activities)} activities and {len(event.attendees)} attendees copied.")
+    
+    except VenueConflictError as e:
+        print(f"\n❌ {e.location} is not available at that time. Already booked by:")
+        for event_id, event_name in e.clashes:
+            print(f"   • {event_name} (ID: {event_id})")
+    except Exception as e:
+        print(f"\n❌ Error cloning event: {e}")
+
+def create_event_series():
+    """Repeat an event on a recurring schedule"""
+    events = list_all_events()
+    if not events:
+        return
+    
+    try:
+        event_id = get_input("\nEnter ID of the event to repeat", int)
+        print("\nSchedule examples: FREQ=WEEKLY;COUNT=52   FREQ=MONTHLY;UNTIL=2031-12-31")
+        schedule = get_input("Schedule")
+        start = get_input("First date and time (default: one interval after the event)", datetime, required=False)
+        with_attendees = confirm_action("Invite the same attendees (RSVP reset to Pending)?")
+        
+        created = Event.create_series(event_id, schedule, start, with_attendees)
+        print(f"\n✅ Created {len(created)} events from "
+              f"{created[0].date.strftime('%Y-%m-%d')} to {created[-1].date.strftime('%Y-%m-%d')}")
+    
+    except VenueConflictError as e:
+        print(f"\n❌ {e.location} is not available for the whole series. Already booked by:")
+        for event_id, event_name in e.clashes:
+            print(f"   • {event_name} (ID: {event_id})")
+    except Exception as e:
+        print(f"\n❌ Error creating event series: {e}")
+
+def audit_venue_bookings():
+    """List every venue that is double-booked across all events"""
+    session = SESSION()
+    try:
+        clashes = find_venue_clashes(session)
+    finally:
+        session.close()
+    
+    if not clashes:
+        print("\n🏢 No venue double-bookings found.")
+        return
+    
+    print_header("Venue Double-Bookings")
+    print_table(
+        [('Location', 24), ('Event', 24), ('Clashes With', 24), ('Overlap', None)],
+        [
+            (clash['location'], clash['first'][1], clash['second'][1],
+             f"{clash['overlap_start'].strftime('%Y-%m-%d %H:%M')}-{clash['overlap_end'].strftime('%H:%M')}")
+            for clash in clashes
+        ]
+    )
+    
+    print(f"\n⚠️  {len(clashes)} double-booking(s) found.")
+
 # Attendee management functions
 def list_attendees_for_event():
     """List all attendees for a specific event"""
@@ -216,12 +302,14 @@ def list_attendees_for_event():
             return event
         
         print_header(f"Attendees for {event.name}")
-        print(f"{'ID':<5} {'Name':<25} {'Email':<30} {'RSVP':<12} {'Dietary Restrictions'}")
-        print_divider()
-        
-        for attendee in attendees:
-            restrictions = attendee.dietary_restrictions or 'None'
-            print(f"{attendee.id:<5} {attendee.name[:24]:<25} {attendee.email[:29]:<30} {attendee.rsvp_status:<12} {restrictions}")
+        print_table(
+            [('ID', None), ('Name', 24), ('Email', 29), ('RSVP', 11), ('Dietary Restrictions', None)],
+            [
+                (attendee.id, attendee.name, attendee.email, attendee.rsvp_status,
+                 attendee.dietary_restrictions or 'None')
+                for attendee in attendees
+            ]
+        )
         
         return event
         
@@ -294,7 +382,29 @@ def update_attendee_rsvp():
             print(f"❌ Invalid RSVP status. Must be one of: {rsvp_options}")
             return
         
-        attendee.update_rsvp(new_status)
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            try:
+                attendee.update_rsvp(new_status)
+                break
+            except UpdateConflictError:
+                # Someone else saved this attendee first: show what they did
+                # and retry on top of the fresh copy if the user still wants to
+                attendee = Attendee.find_by_id(attendee_id)
+                if not attendee:
+                    print(f"\n❌ Attendee {attendee_id} was deleted by someone else.")
+                    return
+                print(f"\n⚠️  {attendee.name} was just updated by someone else "
+                      f"(RSVP is now '{attendee.rsvp_status}').")
+                if attendee.rsvp_status == new_status:
+                    print("✅ No change needed.")
+                    return
+                if not confirm_action(f"Change RSVP to '{new_status}' anyway?"):
+                    print("❌ RSVP update cancelled.")
+                    return
+        else:
+            print("\n❌ The attendee keeps changing; please try again in a moment.")
+            return
+        
         print(f"\n✅ RSVP status for {attendee.name} updated to '{new_status}'!")
         
     except Exception as e:
@@ -327,6 +437,148 @@ def delete_attendee():
     except Exception as e:
         print(f"\n❌ Error deleting attendee: {e}")
 
+def search_attendees():
+    """Find attendees by approximate name or email"""
+    search_term = get_input("Enter part of a name or email (typos are OK)")
+    
+    matches = Attendee.fuzzy_search(search_term, limit=20)
+    
+    if not matches:
+        print(f"\n🔍 No attendees found matching '{search_term}'.")
+        return
+    
+    print_header(f"Attendees Matching '{search_term}'")
+    print_table(
+        [('ID', None), ('Name', 24), ('Email', 29), ('Event ID', None), ('RSVP', 11), ('Match', None)],
+        [
+            (attendee.id, attendee.name, attendee.email, attendee.event_id,
+             attendee.rsvp_status, f"{score:.0%}")
+            for attendee, score in matches
+        ]
+    )
+
+def run_check_in():
+    """Check attendees in at the door by email or ID"""
+    from checkin import CheckInDesk, CHECKED_IN, ALREADY_CHECKED_IN
+    
+    events = list_all_events()
+    if not events:
+        return
+    
+    try:
+        event_id = get_input("\nEnter event ID to start check-in", int)
+        event = Event.find_by_id(event_id)
+        
+        if not event:
+            print(f"\n❌ Event with ID {event_id} not found.")
+            return
+        
+        with CheckInDesk(event.id) as desk:
+            checked_in, total = desk.stats()
+            print_header(f"Check-In: {event.name}")
+            print(f"{checked_in}/{total} attendees already checked in.")
+            print("Scan or type an email address or attendee ID. Leave blank to finish.")
+            
+            while True:
+                key = get_input("\nEmail or ID", required=False)
+                if not key:
+                    break
+                
+                status, record = desk.check_in(key)
+                if status == CHECKED_IN:
+                    print(f"✅ {record['name']} checked in ({record['rsvp_status']})")
+                elif status == ALREADY_CHECKED_IN:
+                    print(f"⚠️  {record['name']} already checked in at {record['checked_in_at'].strftime('%H:%M:%S')}")
+                else:
+                    print(f"❌ No attendee '{key}' on the list for this event.")
+                _report_check_in_problems(desk)
+        
+        _report_check_in_problems(desk)
+        checked_in, total = desk.stats()
+        print(f"\n✅ Check-in closed: {checked_in}/{total} attendees checked in.")
+        
+    except Exception as e:
+        print(f"\n❌ Error during check-in: {e}")
+
+def _report_check_in_problems(desk):
+    """Print check-ins the background writer found taken or couldn't save"""
+    for record in desk.take_conflicts():
+        print(f"⚠️  {record['name']} had already checked in at another desk at "
+              f"{record['checked_in_at'].strftime('%H:%M:%S')}")
+    for record in desk.take_failures():
+        print(f"❌ {record['name']}'s check-in could not be saved ({desk.last_error})")
+
+def show_event_calendar():
+    """Browse events by month or week"""
+    from calendar_view import month_range, week_range, shift_month, render_month, render_week
+    
+    print("\n1. 🗓️  Month view")
+    print("2. 📆 Week view")
+    view = get_input("Select a view", int)
+    if view not in (1, 2):
+        print("❌ Invalid choice.")
+        return
+    
+    today = datetime.now()
+    year, month = today.year, today.month
+    week_start, _ = week_range(today)
+    
+    while True:
+        if view == 1:
+            start, end = month_range(year, month)
+            rows = Event.find_between(start, end)
+            print_header(f"Calendar - {start.strftime('%B %Y')}")
+            lines = render_month(year, month, rows)
+        else:
+            start, end = week_range(week_start)
+            rows = Event.find_between(start, end)
+            print_header(f"Week of {start.strftime('%Y-%m-%d')}")
+            lines = render_week(start, rows)
+        print("\n".join(lines))
+        
+        move = get_input("\n[n]ext, [p]revious, or Enter to go back", required=False)
+        if not move:
+            return
+        step = 1 if move.lower().startswith('n') else -1 if move.lower().startswith('p') else 0
+        if view == 1:
+            year, month = shift_month(year, month, step)
+        else:
+            week_start += timedelta(weeks=step)
+
+def send_event_invitations():
+    """Email invitations or RSVP reminders to an event's Pending attendees"""
+    from invitations import INVITATION, REMINDER, SMTP_HOST, SMTP_PORT, send_invitations
+    
+    try:
+        event_id = get_input("\nEnter event ID", int)
+        event = Event.find_by_id(event_id)
+        
+        if not event:
+            print(f"\n❌ Event with ID {event_id} not found.")
+            return
+        
+        pending = Attendee.count_by_event([event_id], 'Pending').get(event_id, 0)
+        if not pending:
+            print(f"\n📭 No Pending attendees for '{event.name}'.")
+            return
+        
+        print(f"\n'{event.name}' has {pending} Pending attendee(s).")
+        kind = REMINDER if confirm_action("Send RSVP reminders instead of invitations?") else INVITATION
+        if not confirm_action(f"Send {kind}s through {SMTP_HOST}:{SMTP_PORT}?"):
+            print("❌ Sending cancelled.")
+            return
+        
+        summary = send_invitations([event_id], kind)
+        print(f"\n✉️  Sent {summary['sent']} {kind}(s) in {summary['seconds']:.2f}s")
+        if not summary['sent'] and not summary['failed']:
+            print("Everyone Pending has already been sent one" + (" today." if kind == REMINDER else "."))
+        if summary['failed']:
+            print(f"⚠️  {len(summary['failed'])} could not be sent:")
+            for attendee_id, email, error in summary['failed'][:10]:
+                print(f"   - {email} (ID: {attendee_id}): {error}")
+    except Exception as e:
+        print(f"\n❌ Error sending invitations: {e}")
+
 # Activity management functions
 def list_activities_for_event():
     """List all activities for a specific event"""
@@ -349,14 +601,16 @@ def list_activities_for_event():
             return event
         
         print_header(f"Activities for {event.name}")
-        print(f"{'ID':<5} {'Name':<25} {'Start Time':<12} {'Duration':<10} {'Cost':<10} {'Max People'}")
-        print_divider()
-        
-        for activity in sorted(activities, key=lambda a: a.start_time):
-            duration_str = f"{activity.duration}min"
-            cost_str = f"${activity.cost:.2f}"
-            max_p = str(activity.max_participants) if activity.max_participants else "No limit"
-            print(f"{activity.id:<5} {activity.name[:24]:<25} {activity.start_time.strftime('%H:%M'):<12} {duration_str:<10} {cost_str:<10} {max_p}")
+        print_table(
+            [('ID', None), ('Name', 24), ('Start Time', 11), ('Duration', 9), ('Cost', 12),
+             ('Max People', 10), ('Signed Up', None)],
+            [
+                (activity.id, activity.name, activity.start_time.strftime('%H:%M'),
+                 f"{activity.duration}min", f"${activity.cost:.2f}",
+                 activity.max_participants or "No limit", activity.signed_up or 0)
+                for activity in sorted(activities, key=lambda a: a.start_time)
+            ]
+        )
         
         return event
         
@@ -446,58 +700,156 @@ def delete_activity():
     except Exception as e:
         print(f"\n❌ Error deleting activity: {e}")
 
+def _select_activity_for_event():
+    """Let the user pick an activity from an event's schedule"""
+    event = list_activities_for_event()
+    if not event or not event.activities:
+        return None, None
+    
+    activity_id = get_input("\nEnter activity ID", int)
+    activity = Activity.find_by_id(activity_id)
+    
+    if not activity or activity.event_id != event.id:
+        print(f"\n❌ Activity with ID {activity_id} not found for this event.")
+        return event, None
+    
+    return event, activity
+
+def print_activity_roster(activity):
+    """Print who is registered and waitlisted for an activity"""
+    roster = activity.get_roster()
+    if not roster:
+        print(f"\n🎯 Nobody has signed up for '{activity.name}' yet.")
+        return
+    
+    print_header(f"Sign-Ups for {activity.name}")
+    print_table(
+        [('Attendee ID', None), ('Name', 24), ('Status', None)],
+        roster
+    )
+
+def sign_up_for_activity():
+    """Sign an attendee up for an activity, waitlisting them when it is full"""
+    try:
+        event, activity = _select_activity_for_event()
+        if not activity:
+            return
+        
+        attendee_id = get_input("Enter attendee ID to sign up", int)
+        status = activity.sign_up(attendee_id)
+        
+        if status == 'Registered':
+            print(f"\n✅ Attendee {attendee_id} is registered for '{activity.name}'!")
+        else:
+            print(f"\n⏳ '{activity.name}' is full. Attendee {attendee_id} has been added to the waitlist.")
+        
+        print_activity_roster(activity)
+        
+    except Exception as e:
+        print(f"\n❌ Error signing up: {e}")
+
+def cancel_activity_sign_up():
+    """Cancel an attendee's activity sign-up and promote the waitlist"""
+    try:
+        event, activity = _select_activity_for_event()
+        if not activity:
+            return
+        
+        print_activity_roster(activity)
+        attendee_id = get_input("\nEnter attendee ID to cancel", int)
+        promoted = activity.cancel_sign_up(attendee_id)
+        
+        print(f"\n✅ Sign-up for attendee {attendee_id} cancelled.")
+        if promoted:
+            print(f"🎉 Attendee {promoted} moved off the waitlist and is now registered.")
+        
+    except Exception as e:
+        print(f"\n❌ Error cancelling sign-up: {e}")
+
 # Dashboard and reporting functions
 def show_event_dashboard():
     """Show a dashboard with event statistics"""
-    events = Event.get_all()
+    # Every figure is aggregated in SQL, so the dashboard stays quick
+    # however many events there are
+    status_counts = Event.count_by_status()
     
-    if not events:
+    if not status_counts:
         print("\n📊 No events to display in dashboard.")
         return
     
+    totals = budget_totals()
     print_header("Event Planning Dashboard")
     
     # Overall statistics
-    total_events = len(events)
-    total_attendees = sum(len(event.attendees) for event in events)
-    total_activities = sum(len(event.activities) for event in events)
-    total_budget = sum(event.budget for event in events)
-    
-    print(f"📅 Total Events: {total_events}")
-    print(f"👥 Total Attendees: {total_attendees}")
-    print(f"🎯 Total Activities: {total_activities}")
-    print(f"💰 Total Budget: ${total_budget:.2f}")
+    print(f"📅 Total Events: {totals.events}")
+    print(f"👥 Total Attendees: {Attendee.count()}")
+    print(f"🎯 Total Activities: {Activity.count()}")
+    print(f"💰 Total Budget: ${totals.budget:.2f}")
     
     # Events by status
-    status_counts = {}
-    for event in events:
-        status = event.status
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
     print(f"\n📊 Events by Status:")
     for status, count in status_counts.items():
         print(f"   • {status}: {count}")
     
-    # Upcoming events (next 5)
-    from datetime import datetime
+    # Upcoming events (next 5), read from the date index
     now = datetime.now()
-    upcoming_events = [e for e in events if e.date > now]
-    upcoming_events.sort(key=lambda e: e.date)
+    upcoming_events = Event.find_between(now, datetime.max, limit=5)
+    confirmed = Attendee.count_by_event([event.id for event in upcoming_events], 'Confirmed')
     
     if upcoming_events:
         print(f"\n📅 Upcoming Events:")
-        for event in upcoming_events[:5]:
-            attendee_count = event.get_attendee_count()
+        for event in upcoming_events:
+            attendee_count = confirmed.get(event.id, 0)
             days_away = (event.date - now).days
             print(f"   • {event.name} - {event.date.strftime('%Y-%m-%d')} ({days_away} days away) - {attendee_count} confirmed")
     
-    # Budget analysis
-    over_budget_events = [e for e in events if e.get_budget_remaining() < 0]
+    # Budget analysis: the worst overspends first
+    over_budget_events = event_budgets(over_pct=0, limit=DASHBOARD_OVER_BUDGET_LIMIT)
     if over_budget_events:
         print(f"\n⚠️  Events Over Budget:")
         for event in over_budget_events:
-            overage = abs(event.get_budget_remaining())
-            print(f"   • {event.name}: Over by ${overage:.2f}")
+            print(f"   • {event.name}: Over by ${-event.remaining:.2f}")
+        if totals.over_budget > len(over_budget_events):
+            print(f"   ... and {totals.over_budget - len(over_budget_events)} more (see the Budget Report)")
+
+def show_budget_report():
+    """Report per-event spend against budget, filtered and ranked in SQL"""
+    print_header("Budget Report")
+    
+    try:
+        over_pct = get_input("Only events over budget by more than % (blank for all events)", float, required=False)
+        status = get_input(f"Status filter ({', '.join(EVENT_STATUSES)}; blank for all)", required=False)
+        if status and status not in EVENT_STATUSES:
+            print(f"❌ Status must be one of: {', '.join(EVENT_STATUSES)}")
+            return
+        print(f"Sort by: {', '.join(BUDGET_SORTS)}")
+        sort = get_input("Sort (default: overage)", required=False) or 'overage'
+        limit = get_input(f"How many events (default: {BUDGET_REPORT_LIMIT})", int, required=False) or BUDGET_REPORT_LIMIT
+        
+        rows = event_budgets(over_pct=over_pct, status=status, sort=sort, limit=limit)
+        totals = budget_totals(over_pct=over_pct or 0, status=status)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        return
+    
+    if not rows:
+        print("\n💰 No events match.")
+        return
+    
+    print_table(
+        [('ID', None), ('Event', 24), ('Date', 10), ('Budget', 11), ('Spend', 11), ('Remaining', 11), ('Variance', None)],
+        [
+            (row.id, row.name, row.date.strftime('%Y-%m-%d'), f"${row.budget:.2f}", f"${row.spend:.2f}",
+             f"${row.remaining:.2f}", f"{row.variance_pct:+.1f}%" if row.variance_pct is not None else "no budget")
+            for row in rows
+        ]
+    )
+    
+    threshold = f"by more than {over_pct:g}%" if over_pct else ""
+    print(f"\nShowing {len(rows)} of {totals.events if over_pct is None else totals.over_budget} matching events.")
+    print(f"💰 Across {totals.events} events: budget ${totals.budget:.2f}, spend ${totals.spend:.2f}, "
+          f"remaining ${totals.remaining:.2f}")
+    print(f"⚠️  {totals.over_budget} events over budget {threshold}".rstrip())
 
 def search_events():
     """Search for events by name"""
@@ -514,12 +866,145 @@ def search_events():
         return
     
     print_header(f"Search Results for '{search_term}'")
-    print(f"{'ID':<5} {'Name':<25} {'Date':<20} {'Location':<20} {'Status'}")
-    print_divider()
+    print_table(
+        [('ID', None), ('Name', 24), ('Date', 16), ('Location', 19), ('Status', None)],
+        [
+            (event.id, event.name, event.date.strftime("%Y-%m-%d %H:%M"), event.location, event.status)
+            for event in events
+        ]
+    )
+
+def build_event_summary(event):
+    """Compute the figures shown in an event report as plain, JSON-ready data"""
+    attendees = event.attendees
+    activities = sorted(event.activities, key=lambda a: a.start_time)
+    total_cost = event.get_total_activity_cost()
+    
+    rsvp_counts = {'Confirmed': 0, 'Pending': 0, 'Declined': 0}
+    dietary_counts = {}
+    for attendee in attendees:
+        rsvp_counts[attendee.rsvp_status] = rsvp_counts.get(attendee.rsvp_status, 0) + 1
+        if attendee.dietary_restrictions and attendee.rsvp_status == 'Confirmed':
+            dietary_counts[attendee.dietary_restrictions] = dietary_counts.get(attendee.dietary_restrictions, 0) + 1
+    
+    conflicts = []
+    for i, activity1 in enumerate(activities):
+        for activity2 in activities[i+1:]:
+            if activity1.conflicts_with(activity2):
+                conflicts.append([activity1.name, activity2.name])
+    
+    return {
+        'name': event.name,
+        'date': event.date.strftime('%A, %B %d, %Y at %H:%M'),
+        'location': event.location,
+        'status': event.status,
+        'description': event.description,
+        'budget': event.budget,
+        'total_cost': total_cost,
+        'remaining_budget': event.budget - total_cost,
+        'total_invited': len(attendees),
+        'rsvp_counts': rsvp_counts,
+        'dietary_counts': dietary_counts,
+        'schedule': [
+            {
+                'start': activity.start_time.strftime('%H:%M'),
+                'end': activity.get_end_time().strftime('%H:%M'),
+                'name': activity.name,
+                'description': activity.description,
+                'cost': activity.cost,
+                'max_participants': activity.max_participants,
+            }
+            for activity in activities
+        ],
+        'conflicts': conflicts,
+        'tracks': build_track_schedule(activities) if activities else None,
+    }
+
+def render_event_report(summary):
+    """Render an event summary as report text"""
+    lines = [f"📅 Event Information:"]
+    lines.append(f"   Name: {summary['name']}")
+    lines.append(f"   Date: {summary['date']}")
+    lines.append(f"   Location: {summary['location']}")
+    lines.append(f"   Status: {summary['status']}")
+    lines.append(f"   Description: {summary['description'] or 'No description provided'}")
+    
+    # Financial summary
+    lines.append(f"\n💰 Financial Summary:")
+    lines.append(f"   Budget: ${summary['budget']:.2f}")
+    lines.append(f"   Activity Costs: ${summary['total_cost']:.2f}")
+    lines.append(f"   Remaining: ${summary['remaining_budget']:.2f}")
+    if summary['remaining_budget'] < 0:
+        lines.append(f"   ⚠️  Over Budget: ${abs(summary['remaining_budget']):.2f}")
+    
+    # Attendee breakdown
+    lines.append(f"\n👥 Attendee Summary:")
+    lines.append(f"   Total Invited: {summary['total_invited']}")
+    for status, count in summary['rsvp_counts'].items():
+        lines.append(f"   {status}: {count}")
+    
+    # Dietary restrictions summary
+    if summary['dietary_counts']:
+        lines.append(f"\n🍽️  Dietary Restrictions (Confirmed attendees):")
+        for restriction, count in summary['dietary_counts'].items():
+            lines.append(f"   • {restriction}: {count} attendee(s)")
+    
+    # Activity schedule
+    if summary['schedule']:
+        lines.append(f"\n🎯 Activity Schedule:")
+        for activity in summary['schedule']:
+            max_p = f" (max {activity['max_participants']})" if activity['max_participants'] else ""
+            lines.append(f"   • {activity['start']}-{activity['end']}: {activity['name']}{max_p}")
+            if activity['description']:
+                lines.append(f"     {activity['description']}")
+            if activity['cost'] > 0:
+                lines.append(f"     Cost: ${activity['cost']:.2f}")
+    
+    # Time conflicts
+    if summary['conflicts']:
+        lines.append(f"\n⚠️  Time Conflicts Detected:")
+        for name1, name2 in summary['conflicts']:
+            lines.append(f"   • {name1} conflicts with {name2}")
+    
+    # Track assignment
+    schedule = summary['tracks']
+    if schedule:
+        lines.append(f"\n🗂️  Track Assignment: {schedule['track_count']} parallel track(s) needed")
+        for number, track in enumerate(schedule['tracks'], start=1):
+            slots = ", ".join(f"{a['start']}-{a['end']} {a['name']}" for a in track)
+            lines.append(f"   Track {number}: {slots}")
+        busy_slots = [s for s in schedule['peak_concurrency'] if s['count'] > 1]
+        if busy_slots:
+            lines.append(f"   Peak concurrency: {schedule['max_concurrency']}")
+            for s in busy_slots:
+                lines.append(f"   • {s['slot']}: {s['count']} activities at once")
     
-    for event in events:
-        date_str = event.date.strftime("%Y-%m-%d %H:%M")
-        print(f"{event.id:<5} {event.name[:24]:<25} {date_str:<20} {event.location[:19]:<20} {event.status}")
+    return "\n".join(lines)
+
+class _EventDeleted(Exception):
+    """Raised inside get_event_report() when the event disappears mid-build"""
+
+def get_event_report(event_id):
+    """Get the rendered report for an event, reusing the cached copy when unchanged
+    
+    Returns (event_name, report_text), or None if the event doesn't exist.
+    """
+    version = Event.get_version(event_id)
+    if version is None:
+        return None
+    
+    def build_report():
+        event = Event.find_by_id(event_id)
+        if event is None:
+            raise _EventDeleted()  # since its version was read
+        summary = REPORT_CACHE.get_or_build(event_id, version, 'summary', lambda: build_event_summary(event))
+        return {'name': summary['name'], 'text': render_event_report(summary)}
+    
+    try:
+        report = REPORT_CACHE.get_or_build(event_id, version, 'report', build_report)
+    except _EventDeleted:
+        return None
+    return report['name'], report['text']
 
 def generate_event_report():
     """Generate a detailed report for a specific event"""
@@ -529,86 +1014,77 @@ def generate_event_report():
     
     try:
         event_id = get_input("\nEnter event ID for detailed report", int)
-        event = Event.find_by_id(event_id)
+        report = get_event_report(event_id)
         
-        if not event:
+        if not report:
             print(f"\n❌ Event with ID {event_id} not found.")
             return
         
-        print_header(f"Detailed Report: {event.name}")
+        name, text = report
+        print_header(f"Detailed Report: {name}")
+        print(text)
         
-        # Basic event info
-        print(f"📅 Event Information:")
-        print(f"   Name: {event.name}")
-        print(f"   Date: {event.date.strftime('%A, %B %d, %Y at %H:%M')}")
-        print(f"   Location: {event.location}")
-        print(f"   Status: {event.status}")
-        print(f"   Description: {event.description or 'No description provided'}")
-        
-        # Financial summary
-        total_cost = event.get_total_activity_cost()
-        remaining_budget = event.get_budget_remaining()
-        
-        print(f"\n💰 Financial Summary:")
-        print(f"   Budget: ${event.budget:.2f}")
-        print(f"   Activity Costs: ${total_cost:.2f}")
-        print(f"   Remaining: ${remaining_budget:.2f}")
+    except Exception as e:
+        print(f"\n❌ Error generating report: {e}")
+
+def export_event_schedule():
+    """Export an event's track schedule to a JSON file"""
+    events = list_all_events()
+    if not events:
+        return
+    
+    try:
+        event_id = get_input("\nEnter event ID to export schedule for", int)
+        event = Event.find_by_id(event_id)
         
-        if remaining_budget < 0:
-            print(f"   ⚠️  Over Budget: ${abs(remaining_budget):.2f}")
+        if not event:
+            print(f"\n❌ Event with ID {event_id} not found.")
+            return
         
-        # Attendee breakdown
-        attendees = event.attendees
-        attendee_stats = {
-            'Confirmed': [a for a in attendees if a.rsvp_status == 'Confirmed'],
-            'Pending': [a for a in attendees if a.rsvp_status == 'Pending'],
-            'Declined': [a for a in attendees if a.rsvp_status == 'Declined']
-        }
-        
-        print(f"\n👥 Attendee Summary:")
-        print(f"   Total Invited: {len(attendees)}")
-        for status, attendee_list in attendee_stats.items():
-            print(f"   {status}: {len(attendee_list)}")
-        
-        # Dietary restrictions summary
-        dietary_restrictions = [a.dietary_restrictions for a in attendees if a.dietary_restrictions and a.rsvp_status == 'Confirmed']
-        if dietary_restrictions:
-            print(f"\n🍽️  Dietary Restrictions (Confirmed attendees):")
-            dietary_counts = {}
-            for restriction in dietary_restrictions:
-                dietary_counts[restriction] = dietary_counts.get(restriction, 0) + 1
-            for restriction, count in dietary_counts.items():
-                print(f"   • {restriction}: {count} attendee(s)")
-        
-        # Activity schedule
-        activities = sorted(event.activities, key=lambda a: a.start_time)
-        if activities:
-            print(f"\n🎯 Activity Schedule:")
-            for activity in activities:
-                end_time = activity.get_end_time()
-                max_p = f" (max {activity.max_participants})" if activity.max_participants else ""
-                print(f"   • {activity.start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')}: {activity.name}{max_p}")
-                if activity.description:
-                    print(f"     {activity.description}")
-                if activity.cost > 0:
-                    print(f"     Cost: ${activity.cost:.2f}")
-        
-        # Time conflicts
-        conflicts = []
-        for i, activity1 in enumerate(activities):
-            for activity2 in activities[i+1:]:
-                if activity1.conflicts_with(activity2):
-                    conflicts.append((activity1, activity2))
+        if not event.activities:
+            print(f"\n🎯 No activities found for event '{event.name}'.")
+            return
         
-        if conflicts:
-            print(f"\n⚠️  Time Conflicts Detected:")
-            for act1, act2 in conflicts:
-                print(f"   • {act1.name} conflicts with {act2.name}")
+        default_path = f"event_{event.id}_schedule.json"
+        path = get_input(f"Output file (default: {default_path})", required=False) or default_path
+        export_track_schedule(event, path)
+        print(f"\n✅ Schedule for '{event.name}' exported to {path}")
         
     except Exception as e:
-        print(f"\n❌ Error generating report: {e}")
+        print(f"\n❌ Error exporting schedule: {e}")
 
 # Application control functions
+def select_tenant():
+    """Choose the organization database this run of the CLI works on"""
+    tenant = current_tenant()
+    if tenant is None:
+        tenants = ROUTER.tenants()
+        if not tenants:
+            # Single-organization setup: keep using the shared database
+            return None
+        
+        print_header("Select Organization")
+        for i, name in enumerate(tenants, 1):
+            print(f"{i}. 🏢 {name}")
+        while True:
+            choice = get_input("\nOrganization number or a new name (blank for the shared database)", required=False)
+            if choice is None:
+                return None
+            if choice.isdigit():
+                if not 1 <= int(choice) <= len(tenants):
+                    print("❌ Invalid choice. Please select a number from the list.")
+                    continue
+                choice = tenants[int(choice) - 1]
+            try:
+                tenant = validate_tenant(choice)
+                break
+            except ValueError as e:
+                print(f"❌ {e}")
+    
+    set_tenant(tenant)
+    print(f"\n🏢 Organization: {tenant} ({ROUTER.path(tenant)})")
+    return tenant
+
 def exit_program():
     """Exit the application"""
     print("\n👋 Thank you for using Event Planner!")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+"""
+Batched invitation and RSVP reminder dispatch.
+
+For each event, Pending attendees are read a page at a time with the keyset
+finders Attendee.find_uninvited() / find_to_remind(), rendered from a
+template, and put on a bounded queue. A fixed pool of asyncio workers
+sends them. Each worker owns one persistent SMTP session; smtplib blocks,
+so a worker runs its session's commands on an executor thread of its own.
+The queue bound keeps memory to about a page whatever the size of the
+event, and stops the reader running far ahead of the senders.
+
+Sent timestamps (invited_at, or reminded_at for reminders) go to a
+recorder that writes them with one executemany UPDATE per batch. If the
+process dies, at most the last unrecorded batch is sent again on the next
+run. Failed messages are left unmarked and reported.
+
+Any SMTP server works; for testing, run a local debugging server that
+prints messages instead of delivering them:
+
+    python -m aiosmtpd -n -l localhost:1025
+    python lib/invitations.py --event 3
+    python lib/invitations.py --reminders --connections 8
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import os
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from string import Template
+
+from sqlalchemy import bindparam, update
+
+from models import Attendee, Event, set_tenant, upgrade_schema
+from models.write_path import run_write
+
+SMTP_HOST = os.environ.get('EVENT_PLANNER_SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.environ.get('EVENT_PLANNER_SMTP_PORT', '1025'))
+SMTP_TIMEOUT = 30  # seconds per SMTP command
+SENDER = os.environ.get('EVENT_PLANNER_MAIL_FROM', 'Event Planner <events@localhost>')
+DEFAULT_CONNECTIONS = 4
+BATCH_SIZE = 200               # attendees per page, and sent rows per status UPDATE
+MESSAGES_PER_CONNECTION = 500  # reconnect after this many; servers cap session length
+REMINDER_INTERVAL = timedelta(days=1)  # don't remind anyone more often than this
+
+INVITATION = 'invitation'
+REMINDER = 'reminder'
+
+TEMPLATES = {
+    INVITATION: (
+        Template("You're invited: $event_name"),
+        Template(
+            "Hi $name,\n\n"
+            "You're invited to $event_name at $location on $date.\n\n"
+            "${description}Please let us know whether you can make it.\n\n"
+            "Event Planner (event $event_id)\n"
+        ),
+    ),
+    REMINDER: (
+        Template("Reminder: please RSVP for $event_name"),
+        Template(
+            "Hi $name,\n\n"
+            "We haven't had your RSVP for $event_name at $location on $date yet.\n"
+            "Please let us know whether you can make it.\n\n"
+            "Event Planner (event $event_id)\n"
+        ),
+    ),
+}
+
+_SENT_COLUMNS = {INVITATION: 'invited_at', REMINDER: 'reminded_at'}
+
+
+def render(kind, event, attendee, sender=SENDER):
+    """Build the invitation or reminder email for one attendee"""
+    subject, body = TEMPLATES[kind]
+    fields = {
+        'name': attendee.name,
+        'event_name': event.name,
+        'event_id': event.id,
+        'location': event.location,
+        'date': event.date.strftime('%A %d %B %Y at %H:%M'),
+        'description': f"{event.description.strip()}\n\n" if event.description else "",
+    }
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = formataddr((attendee.name, attendee.email))
+    message['Subject'] = subject.safe_substitute(fields)
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain='event-planner')
+    message.set_content(body.safe_substitute(fields))
+    return message
+
+
+class SmtpConnection:
+    """One persistent SMTP session, opened on first use and reopened when dropped"""
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sent = 0
+        self._smtp = None
+
+    def send(self, message):
+        if self._smtp is not None and self.sent >= MESSAGES_PER_CONNECTION:
+            self.close()
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                self.sent = 0
+            try:
+                # Refused recipients raise after smtplib has reset the
+                # transaction, so the session stays usable
+                self._smtp.send_message(message)
+                self.sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+def _record_sent(kind, sent):
+    column = Attendee.__table__.c[_SENT_COLUMNS[kind]]
+    table = Attendee.__table__
+    statement = update(table).where(table.c.id == bindparam('attendee_id')).values({column: bindparam('sent_at')})
+    rows = [{'attendee_id': attendee_id, 'sent_at': sent_at} for attendee_id, sent_at in sent]
+    run_write(lambda session: session.execute(statement, rows))
+
+
+def _pending_page(kind, event_id, after_id, batch_size, remind_before):
+    if kind == INVITATION:
+        return Attendee.find_uninvited(event_id, after_id, batch_size)
+    return Attendee.find_to_remind(event_id, remind_before, after_id, batch_size)
+
+
+def _in_executor(loop, func, *args):
+    """run_in_executor() on the default executor, in a copy of the caller's context
+
+    Unlike asyncio.to_thread() (Python 3.9+), run_in_executor() doesn't carry
+    contextvars over, and a tenant chosen with use_tenant() is one.
+    """
+    context = contextvars.copy_context()
+    return loop.run_in_executor(None, functools.partial(context.run, func, *args))
+
+
+async def _dispatch(event_ids, kind, connections, batch_size, host, port, sender):
+    loop = asyncio.get_running_loop()
+    outbox = asyncio.Queue(maxsize=connections * 2)
+    sent_log = asyncio.Queue()
+    summary = {'events': 0, 'sent': 0, 'failed': []}
+    remind_before = datetime.now() - REMINDER_INTERVAL
+
+    async def read():
+        # Model calls run on the default executor, off the event loop
+        for event_id in event_ids:
+            event = await _in_executor(loop, Event.find_by_id, event_id)
+            if event is None:
+                summary['failed'].append((None, None, f"Event {event_id} not found"))
+                continue
+            summary['events'] += 1
+            after_id = 0
+            while True:
+                page = await _in_executor(
+                    loop, _pending_page, kind, event_id, after_id, batch_size, remind_before
+                )
+                for attendee in page:
+                    await outbox.put((attendee, render(kind, event, attendee, sender)))
+                if len(page) < batch_size:
+                    break
+                after_id = page[-1].id
+
+    async def send():
+        connection = SmtpConnection(host, port)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='smtp') as thread:
+            try:
+                while True:
+                    item = await outbox.get()
+                    if item is None:
+                        return
+                    attendee, message = item
+                    try:
+                        await loop.run_in_executor(thread, connection.send, message)
+                        sent_log.put_nowait((attendee.id, datetime.now()))
+                    except Exception as e:
+                        summary['failed'].append((attendee.id, attendee.email, str(e) or type(e).__name__))
+            finally:
+                await loop.run_in_executor(thread, connection.close)
+
+    async def record():
+        while True:
+            batch = [await sent_log.get()]
+            while len(batch) < batch_size and not sent_log.empty():
+                batch.append(sent_log.get_nowait())
+            done = batch[-1] is None
+            batch = [row for row in batch if row is not None]
+            if batch:
+                await _in_executor(loop, _record_sent, kind, batch)
+                summary['sent'] += len(batch)
+            if done:
+                return
+
+    recorder = asyncio.ensure_future(record())
+    senders = [asyncio.ensure_future(send()) for _ in range(connections)]
+    try:
+        await read()
+    finally:
+        for _ in senders:
+            await outbox.put(None)
+        await asyncio.gather(*senders, return_exceptions=True)
+        sent_log.put_nowait(None)
+        await recorder
+    return summary
+
+
+def send_invitations(event_ids, kind=INVITATION, connections=DEFAULT_CONNECTIONS, batch_size=BATCH_SIZE,
+                     host=SMTP_HOST, port=SMTP_PORT, sender=SENDER):
+    """Send invitations (or reminders) to the Pending attendees of each event.
+
+    Returns {'events', 'sent', 'failed', 'seconds'}; `failed` lists
+    (attendee_id, email, error) for messages the server did not accept.
+    """
+    if kind not in TEMPLATES:
+        raise ValueError(f"Kind must be one of: {list(TEMPLATES)}")
+    if connections < 1 or batch_size < 1:
+        raise ValueError("connections and batch_size must be positive integers")
+    started = time.perf_counter()
+    summary = asyncio.run(_dispatch(list(event_ids), kind, connections, batch_size, host, port, sender))
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def upcoming_event_ids():
+    """IDs of events from now on that are still Planning or Active"""
+    rows = Event.find_between(datetime.now(), datetime(9999, 12, 31))
+    return [row.id for row in rows if row.status in ('Planning', 'Active')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Email invitations or RSVP reminders to Pending attendees")
+    parser.add_argument('--event', type=int, action='append', dest='events',
+                        help="event ID (repeatable); defaults to every upcoming event")
+    parser.add_argument('--reminders', action='store_true', help="send RSVP reminders instead of invitations")
+    parser.add_argument('--tenant', help="organization database to use instead of the shared one")
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS, help="concurrent SMTP sessions")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="attendees per query and per status update")
+    parser.add_argument('--smtp-host', default=SMTP_HOST)
+    parser.add_argument('--smtp-port', type=int, default=SMTP_PORT)
+    parser.add_argument('--sender', default=SENDER)
+    args = parser.parse_args(argv)
+    if args.tenant:
+        set_tenant(args.tenant)
+    upgrade_schema()
+
+    kind = REMINDER if args.reminders else INVITATION
+    summary = send_invitations(args.events or upcoming_event_ids(), kind, args.connections, args.batch_size,
+                               args.smtp_host, args.smtp_port, args.sender)
+    print(f"✉️  Sent {summary['sent']} {kind}s for {summary['events']} event(s) in {summary['seconds']:.2f}s")
+    for attendee_id, email, error in summary['failed']:
+        print(f"❌ {email or '-'} (attendee {attendee_id}): {error}")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
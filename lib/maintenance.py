@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+"""
+Routine maintenance for the Event Planner database.
+
+run_maintenance() works through these steps:
+- Add any tables, columns and indexes the models declare that the file
+  doesn't have yet (see models/schema.py).
+- Refresh the query planner's statistics: ANALYZE the first time,
+  PRAGMA optimize afterwards.
+- Return free pages to the filesystem with incremental vacuum, in short
+  write transactions that add up to a bounded time.
+- Checkpoint and truncate the WAL. This only applies to databases in WAL
+  mode, which this project doesn't turn on itself: its databases use the
+  default rollback journal, which is deleted at each commit and leaves
+  nothing to checkpoint, so the step reports it was skipped.
+- Run the integrity and foreign-key checks.
+
+File size and page fragmentation are reported before and after.
+
+Each vacuum slice holds the write lock for about --slice-ms, with a pause
+between slices, so other users can keep writing while it runs.
+Incremental vacuum needs auto_vacuum=INCREMENTAL. New databases are
+created that way; an existing one needs a single full VACUUM first
+(--enable-incremental-vacuum), which rewrites the whole file and blocks
+writers while it does.
+
+    python lib/maintenance.py
+    python lib/maintenance.py --vacuum-seconds 5 --slice-ms 100
+    python lib/maintenance.py --enable-incremental-vacuum
+    python lib/maintenance.py --tenant acme --full-integrity-check
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from models import BUSY_TIMEOUT, current_engines, set_tenant, upgrade_schema
+
+VACUUM_SECONDS = 10.0  # total time incremental vacuum may take per run
+SLICE_MS = 200         # target time one vacuum step holds the write lock
+SLICE_PAUSE = 0.05     # seconds between steps, so waiting writers get the lock
+FIRST_SLICE_PAGES = 64
+ANALYSIS_LIMIT = 1000  # rows ANALYZE samples per index; 0 reads them all
+REPORT_LIMIT = 10      # problems listed per check
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def database_path():
+    """Path of the live SQLite database file (the current tenant's, if one is selected)"""
+    return current_engines()[0].url.database
+
+
+def connect():
+    """Open an autocommit connection for maintenance statements"""
+    return sqlite3.connect(database_path(), timeout=BUSY_TIMEOUT, isolation_level=None)
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def database_stats(conn):
+    """File size and page usage of the database.
+
+    free_pct is the share of pages on the freelist, which vacuum returns to
+    the filesystem. unused_pct is the share of bytes left empty inside
+    in-use pages, which only a full VACUUM compacts. It is None when SQLite
+    was built without the dbstat table.
+    """
+    path = database_path()
+    pages = _pragma(conn, "page_count")
+    free = _pragma(conn, "freelist_count")
+    stats = {
+        'bytes': os.path.getsize(path),
+        'wal_bytes': _wal_bytes(),
+        'page_size': _pragma(conn, "page_size"),
+        'pages': pages,
+        'free_pages': free,
+        'free_pct': 100.0 * free / pages if pages else 0.0,
+        'unused_pct': None,
+    }
+    try:
+        size, unused = conn.execute("SELECT sum(pgsize), sum(unused) FROM dbstat").fetchone()
+        stats['unused_pct'] = 100.0 * unused / size if size else 0.0
+    except sqlite3.OperationalError:
+        pass
+    return stats
+
+
+def analyze(conn):
+    """Refresh planner statistics; returns the statement used"""
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        # Never analyzed: optimize would only look at tables it thinks changed
+        conn.execute("ANALYZE")
+        return "ANALYZE"
+    conn.execute("PRAGMA optimize").fetchall()
+    return "PRAGMA optimize"
+
+
+def incremental_vacuum(conn, max_seconds=VACUUM_SECONDS, slice_ms=SLICE_MS):
+    """Free pages in short write transactions until none are left or time runs out.
+
+    Each step's page count is tuned from the previous step's pace so it
+    takes about `slice_ms`. Returns (pages freed, steps), or None when the
+    database isn't in incremental auto-vacuum mode.
+    """
+    if _pragma(conn, "auto_vacuum") != AUTO_VACUUM_INCREMENTAL:
+        return None
+    deadline = time.perf_counter() + max_seconds
+    pages = FIRST_SLICE_PAGES
+    freed = steps = 0
+    while time.perf_counter() < deadline:
+        free = _pragma(conn, "freelist_count")
+        if not free:
+            break
+        step = min(pages, free)
+        started = time.perf_counter()
+        try:
+            # The pragma frees one page per step of the statement, and
+            # execute() only steps statements without result columns once;
+            # executescript() runs each statement to completion
+            conn.executescript(f"BEGIN IMMEDIATE; PRAGMA incremental_vacuum({step}); COMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        elapsed = time.perf_counter() - started
+        freed += free - _pragma(conn, "freelist_count")
+        steps += 1
+        pages = max(1, min(pages * 4, int(step * slice_ms / 1000.0 / max(elapsed, 1e-4))))
+        time.sleep(SLICE_PAUSE)
+    return freed, steps
+
+
+def enable_incremental_vacuum(conn):
+    """Switch an existing database to incremental auto-vacuum with one full VACUUM"""
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def _wal_bytes():
+    path = f"{database_path()}-wal"
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def checkpoint(conn):
+    """Checkpoint and truncate the WAL; returns (busy, wal frames, checkpointed) or None outside WAL mode
+
+    Only WAL databases have a log to checkpoint; with a rollback journal
+    every commit already writes its pages into the database file.
+    """
+    if _pragma(conn, "journal_mode") != 'wal':
+        return None
+    return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+
+def integrity_problems(conn, full=False):
+    """Messages from quick_check (or the slower integrity_check); empty when the file is sound"""
+    rows = conn.execute(f"PRAGMA {'integrity_check' if full else 'quick_check'}({REPORT_LIMIT})").fetchall()
+    return [] if rows == [('ok',)] else [message for (message,) in rows]
+
+
+def foreign_key_problems(conn):
+    """(table, rowid, parent table) of rows whose foreign key points at a missing row"""
+    return [(table, rowid, parent) for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check")]
+
+
+def run_maintenance(vacuum_seconds=VACUUM_SECONDS, slice_ms=SLICE_MS, full_integrity=False,
+                    enable_incremental=False):
+    """Run every maintenance step, printing progress; returns the number of problems found"""
+    conn = connect()
+    try:
+        before = database_stats(conn)
+
+        def timed(func):
+            started = time.perf_counter()
+            result = func()
+            return result, f"({time.perf_counter() - started:.2f}s)"
+
+        created, took = timed(upgrade_schema)
+        print(f"🗂️  Schema: {'added ' + ', '.join(created) if created else 'up to date'} {took}")
+
+        statement, took = timed(lambda: analyze(conn))
+        print(f"📈 Statistics: {statement} {took}")
+
+        if enable_incremental and _pragma(conn, "auto_vacuum") != AUTO_VACUUM_INCREMENTAL:
+            _, took = timed(lambda: enable_incremental_vacuum(conn))
+            print(f"🧹 Full VACUUM: switched to incremental auto-vacuum {took}")
+        vacuumed, took = timed(lambda: incremental_vacuum(conn, vacuum_seconds, slice_ms))
+        if vacuumed is None:
+            print("🧹 Incremental vacuum: skipped (auto_vacuum is off; run once with "
+                  "--enable-incremental-vacuum to turn it on)")
+        else:
+            remaining = _pragma(conn, "freelist_count")
+            more = f", {remaining} left for the next run" if remaining else ""
+            print(f"🧹 Incremental vacuum: freed {vacuumed[0]} pages in {vacuumed[1]} steps{more} {took}")
+
+        wal_before = _wal_bytes()
+        result, took = timed(lambda: checkpoint(conn))
+        if result is None:
+            print(f"📝 WAL checkpoint: skipped, only applies to WAL databases "
+                  f"(journal_mode is {_pragma(conn, 'journal_mode')}; commits already write to the file)")
+        else:
+            busy, frames, done = result
+            print(f"📝 WAL checkpoint: {done}/{frames} frames, WAL {wal_before} -> {_wal_bytes()} bytes"
+                  f"{' (busy readers)' if busy else ''} {took}")
+
+        messages, took = timed(lambda: integrity_problems(conn, full_integrity))
+        print(f"{'❌' if messages else '✅'} Integrity: {len(messages) or 'ok'} {took}")
+        for message in messages:
+            print(f"   - {message}")
+        orphans, took = timed(lambda: foreign_key_problems(conn))
+        print(f"{'❌' if orphans else '✅'} Foreign keys: {len(orphans) or 'ok'} {took}")
+        for table, rowid, parent in orphans[:REPORT_LIMIT]:
+            print(f"   - {table} row {rowid} points at a missing {parent} row")
+        problems = len(messages) + len(orphans)
+
+        print_stats(before, database_stats(conn))
+        return problems
+    finally:
+        conn.close()
+
+
+def print_stats(before, after):
+    """Print file size and fragmentation before and after maintenance"""
+    def percent(value):
+        return "n/a" if value is None else f"{value:.1f}%"
+
+    print(f"\n{'':<22} {'Before':>14} {'After':>14}")
+    for label, key, fmt in [
+        ("File size (bytes)", 'bytes', str),
+        ("WAL size (bytes)", 'wal_bytes', str),
+        ("Pages", 'pages', str),
+        ("Free pages", 'free_pages', str),
+        ("Free page share", 'free_pct', percent),
+        ("Unused bytes in pages", 'unused_pct', percent),
+    ]:
+        print(f"{label:<22} {fmt(before[key]):>14} {fmt(after[key]):>14}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vacuum, analyze and check the Event Planner database")
+    parser.add_argument('--tenant', help="organization database to use instead of the shared one")
+    parser.add_argument('--vacuum-seconds', type=float, default=VACUUM_SECONDS,
+                        help="time budget for incremental vacuum")
+    parser.add_argument('--slice-ms', type=int, default=SLICE_MS,
+                        help="target time each vacuum step holds the write lock")
+    parser.add_argument('--full-integrity-check', action='store_true',
+                        help="run integrity_check instead of the faster quick_check")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="one-off full VACUUM that turns on incremental vacuum for an existing file")
+    args = parser.parse_args(argv)
+    if args.tenant:
+        set_tenant(args.tenant)
+
+    print(f"🔧 Maintaining {database_path()}")
+    problems = run_maintenance(args.vacuum_seconds, args.slice_ms, args.full_integrity_check,
+                               args.enable_incremental_vacuum)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,16 +3,96 @@ import sqlite3
 CONN = sqlite3.connect('company.db')
 CURSOR = CONN.cursor()
 
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.event import listen
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # Database configuration
-ENGINE = create_engine('sqlite:///event_planner.db')
-SESSION = sessionmaker(bind=ENGINE)
+DATABASE_URL = os.environ.get('EVENT_PLANNER_DB_URL', 'sqlite:///event_planner.db')
+BUSY_TIMEOUT = 5  # seconds SQLite waits on a locked database before raising
+READ_POOL_SIZE = int(os.environ.get('EVENT_PLANNER_POOL_SIZE', '5'))
+READ_MAX_OVERFLOW = int(os.environ.get('EVENT_PLANNER_POOL_OVERFLOW', '10'))
+POOL_TIMEOUT = 30  # seconds a thread waits for a free pooled connection
+# Compiled SQL kept per engine. The finders use a few dozen distinct
+# statements; the rest of the app well under a thousand.
+COMPILED_CACHE_SIZE = int(os.environ.get('EVENT_PLANNER_COMPILED_CACHE_SIZE', '1000'))
+
+# Pooled connections are handed from thread to thread, but only ever used
+# by one thread at a time, so pysqlite's same-thread check can be turned off
+CONNECT_ARGS = {'timeout': BUSY_TIMEOUT, 'check_same_thread': False}
+
+def create_engines(url):
+    """Build the (read, write) engine pair for one SQLite database"""
+    # Reads share a sized pool of connections
+    read_engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        query_cache_size=COMPILED_CACHE_SIZE,
+        connect_args=CONNECT_ARGS,
+    )
+    # Writes go through their own engine so every write transaction starts
+    # with BEGIN IMMEDIATE: the write lock is taken up front instead of
+    # upgrading a read lock mid-transaction, which SQLite resolves by
+    # failing one side. SQLite only allows one writer at a time anyway, so
+    # the write pool holds a single connection and writing threads queue
+    # for it in-process.
+    write_engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=POOL_TIMEOUT,
+        query_cache_size=COMPILED_CACHE_SIZE,
+        connect_args=CONNECT_ARGS,
+    )
+    for engine in (read_engine, write_engine):
+        listen(engine, 'connect', _incremental_auto_vacuum)
+    listen(write_engine, 'connect', _disable_driver_transactions)
+    listen(write_engine, 'begin', _begin_immediate)
+    return read_engine, write_engine
+
+def _incremental_auto_vacuum(dbapi_connection, connection_record):
+    # Takes effect when a new file gets its first table (or at the next full
+    # VACUUM), so maintenance.py can later free pages a slice at a time
+    dbapi_connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    # Let SQLAlchemy emit BEGIN itself instead of pysqlite's implicit one
+    dbapi_connection.isolation_level = None
+
+def _begin_immediate(connection):
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+ENGINE, WRITE_ENGINE = create_engines(DATABASE_URL)
+
+# Per-organization databases (see tenants.py). Sessions bind to the
+# current tenant's engines when one is selected, otherwise to the pair above.
+from .tenants import (
+    ROUTER, TenantSession, current_engines, current_tenant, fan_out, set_tenant, use_tenant,
+)
+
+SESSION = sessionmaker(class_=TenantSession, bind=ENGINE)
+
+WRITE_SESSION = sessionmaker(class_=TenantSession, bind=WRITE_ENGINE, expire_on_commit=False, write=True)
+
 Base = declarative_base()
 
+from .validation import ValidationError
+from .write_path import UpdateConflictError
+
 # Import models to register them with SQLAlchemy
 from .event import Event
 from .attendee import Attendee  
-from .activity import Activity
\ No newline at end of file
+from .activity import Activity
+from .attendee_search import AttendeeTrigram
+from .activity_signup import ActivitySignup
+from .journal import JournalEntry
+from .revision import bump_revisions
+from .schema import upgrade_schema
\ No newline at end of file
@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Time
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Time, Index, update, func, select, delete, or_, bindparam
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import relationship
 from . import Base, SESSION
+from .validation import ValidationError, validate_fields, validate_rows
+from .streaming import DEFAULT_BATCH_SIZE, stream
+from .write_path import run_write, update_versioned
 from datetime import time
 
 class Activity(Base):
@@ -13,7 +17,15 @@ class Activity(Base):
     duration = Column(Integer, nullable=False)  # in minutes
     cost = Column(Float, default=0.0)
     max_participants = Column(Integer)
+    signed_up = Column(Integer, nullable=False, default=0)  # registered (not waitlisted) sign-ups
     event_id = Column(Integer, ForeignKey('events.id'))
+    version_id = Column(Integer, nullable=False, server_default='1')  # bumped by every edit; see update()
+    
+    __mapper_args__ = {'version_id_col': version_id}
+    __table_args__ = (
+        # Serves find_by_event, and covers the per-event cost sums in budget.py
+        Index('ix_activities_event_id_cost', 'event_id', 'cost'),
+    )
     
     # Relationships
     event = relationship('Event', back_populates='activities')
@@ -22,31 +34,17 @@ class Activity(Base):
         return f"<Activity(id={self.id}, name='{self.name}', time='{self.start_time}', duration={self.duration}min)>"
     
     def __init__(self, **kwargs):
-        # Validate inputs before setting
-        if 'name' in kwargs and (not isinstance(kwargs['name'], str) or len(kwargs['name'].strip()) == 0):
-            raise ValueError("Activity name must be a non-empty string")
-        if 'duration' in kwargs and (not isinstance(kwargs['duration'], int) or kwargs['duration'] <= 0):
-            raise ValueError("Duration must be a positive integer (minutes)")
-        if 'cost' in kwargs and kwargs['cost'] < 0:
-            raise ValueError("Cost cannot be negative")
-        if 'max_participants' in kwargs and kwargs['max_participants'] is not None:
-            if not isinstance(kwargs['max_participants'], int) or kwargs['max_participants'] <= 0:
-                raise ValueError("Max participants must be a positive integer or None")
-        
-        # Set attributes
-        for key, value in kwargs.items():
-            if key == 'name':
-                value = value.strip()
-            elif key == 'cost':
-                value = float(value)
+        # Validate and normalize inputs before setting
+        for key, value in validate_fields('Activity', kwargs).items():
             setattr(self, key, value)
     
+    UPDATABLE_FIELDS = ('name', 'description', 'start_time', 'duration', 'cost', 'max_participants')
+    
     # ORM Methods
     @classmethod
     def create(cls, name, start_time, duration, event_id, description=None, cost=0.0, max_participants=None):
         """Create a new activity"""
-        session = SESSION()
-        try:
+        def _create(session):
             activity = cls(
                 name=name,
                 description=description,
@@ -57,25 +55,36 @@ class Activity(Base):
                 event_id=event_id
             )
             session.add(activity)
-            session.commit()
             return activity
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        
+        return run_write(_create)
+    
+    @classmethod
+    def bulk_create(cls, rows):
+        """Create many activities in one transaction
+        
+        `rows` is a list of dicts of Activity fields. Every row is validated
+        first; if any fail, ValidationError lists all of them and nothing is saved.
+        """
+        valid_rows, errors = validate_rows('Activity', rows)
+        if errors:
+            raise ValidationError(errors)
+        
+        def _create(session):
+            activities = [cls(**values) for values in valid_rows]
+            session.add_all(activities)
+            return activities
+        
+        return run_write(_create)
     
     def delete(self):
         """Delete this activity"""
-        session = SESSION()
-        try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        def _delete(session):
+            activity = session.get(Activity, self.id)
+            if activity is not None:
+                session.delete(activity)
+        
+        run_write(_delete)
     
     @classmethod
     def get_all(cls):
@@ -85,29 +94,171 @@ class Activity(Base):
         session.close()
         return activities
     
+    @classmethod
+    def iter_all(cls, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield every activity, loading `batch_size` rows at a time
+        
+        Unlike get_all(), memory stays flat however many there are. The
+        activities come out detached, without relationships (see streaming.py).
+        """
+        return stream(_ALL, batch_size=batch_size)
+    
+    @classmethod
+    def iter_by_event(cls, event_id, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield an event's activities, loading `batch_size` rows at a time"""
+        return stream(_FIND_BY_EVENT, {'event_id': event_id}, batch_size)
+    
+    @classmethod
+    def count(cls):
+        """Count activities with a single SELECT COUNT(*)"""
+        session = SESSION()
+        try:
+            return session.execute(_COUNT).scalar()
+        finally:
+            session.close()
+    
+    @classmethod
+    def find_page(cls, after_id=0, limit=DEFAULT_BATCH_SIZE):
+        """Find up to `limit` activities with IDs above `after_id`, in ID order
+        
+        Pass the last ID of one page as `after_id` to get the next.
+        """
+        session = SESSION()
+        try:
+            return session.execute(_PAGE, {'after_id': after_id, 'limit': limit}).scalars().all()
+        finally:
+            session.close()
+    
     @classmethod
     def find_by_id(cls, activity_id):
         """Find activity by ID"""
         session = SESSION()
-        activity = session.query(cls).filter(cls.id == activity_id).first()
-        session.close()
-        return activity
+        try:
+            return session.execute(_FIND_BY_ID, {'activity_id': activity_id}).scalars().first()
+        finally:
+            session.close()
     
     @classmethod
     def find_by_event(cls, event_id):
         """Find all activities for an event"""
         session = SESSION()
-        activities = session.query(cls).filter(cls.event_id == event_id).all()
-        session.close()
-        return activities
+        try:
+            return session.execute(_FIND_BY_EVENT, {'event_id': event_id}).scalars().all()
+        finally:
+            session.close()
     
     @classmethod
     def find_by_name(cls, name):
         """Find activities by name (partial match)"""
         session = SESSION()
-        activities = session.query(cls).filter(cls.name.ilike(f'%{name}%')).all()
-        session.close()
-        return activities
+        try:
+            return session.execute(_FIND_BY_NAME, {'pattern': f'%{name}%'}).scalars().all()
+        finally:
+            session.close()
+    
+    def update(self, **changes):
+        """Save changes to this activity, unless someone else changed it since it was read
+        
+        Raises UpdateConflictError in that case; re-fetch and try again.
+        Raising max_participants promotes waitlisted attendees, oldest first,
+        into the new seats; it can't be lowered below the number registered.
+        """
+        from .activity_signup import promote_waitlist
+        
+        unknown = set(changes) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update activity field(s): {', '.join(sorted(unknown))}")
+        changes = validate_fields('Activity', changes)
+        
+        def _check(session, current):
+            if 'max_participants' not in changes:
+                return
+            limit = changes['max_participants']
+            if limit is not None and limit < current.signed_up:
+                raise ValueError(
+                    f"max_participants can't be lowered to {limit}: "
+                    f"{current.signed_up} attendees are already registered"
+                )
+            seats = None if limit is None else limit - current.signed_up
+            promoted = promote_waitlist(session.connection(), current.id, seats)
+            current.signed_up += len(promoted)
+        
+        updated = update_versioned(Activity, self.id, self.version_id, changes, check=_check)
+        for key in changes:
+            setattr(self, key, getattr(updated, key))
+        self.signed_up = updated.signed_up
+        self.version_id = updated.version_id
+    
+    def sign_up(self, attendee_id):
+        """Sign an attendee up, waitlisting them if the activity is full
+        
+        The seat is taken with a single conditional UPDATE on the counter, so
+        concurrent sign-ups can never overfill the activity. Returns the
+        resulting status ('Registered' or 'Waitlisted').
+        """
+        from .attendee import Attendee
+        from .activity_signup import ActivitySignup, REGISTERED, WAITLISTED
+        
+        def _sign_up(session):
+            attendee_event = session.query(Attendee.event_id).filter(Attendee.id == attendee_id).scalar()
+            if attendee_event is None or attendee_event != self.event_id:
+                raise ValueError(f"Attendee {attendee_id} is not invited to this activity's event")
+            
+            activities = Activity.__table__
+            seat = session.execute(
+                update(activities)
+                .where(
+                    activities.c.id == self.id,
+                    or_(activities.c.max_participants.is_(None),
+                        activities.c.signed_up < activities.c.max_participants)
+                )
+                .values(signed_up=activities.c.signed_up + 1)
+            )
+            status = REGISTERED if seat.rowcount == 1 else WAITLISTED
+            session.add(ActivitySignup(activity_id=self.id, attendee_id=attendee_id, status=status))
+            session.flush()
+            return status
+        
+        try:
+            return run_write(_sign_up)
+        except IntegrityError:
+            raise ValueError(f"Attendee {attendee_id} is already signed up for this activity")
+    
+    def cancel_sign_up(self, attendee_id):
+        """Cancel a sign-up, promoting the first waitlisted attendee into the seat
+        
+        Returns the ID of the promoted attendee, or None.
+        """
+        from .activity_signup import ActivitySignup, REGISTERED, release_seat
+        
+        def _cancel(session):
+            signups = ActivitySignup.__table__
+            row = session.execute(
+                select(signups.c.id, signups.c.status)
+                .where(signups.c.activity_id == self.id, signups.c.attendee_id == attendee_id)
+            ).first()
+            removed = row and session.execute(delete(signups).where(signups.c.id == row.id)).rowcount
+            if not removed:
+                raise ValueError(f"Attendee {attendee_id} is not signed up for this activity")
+            
+            return release_seat(session.connection(), self.id, row.status == REGISTERED)
+        
+        return run_write(_cancel)
+    
+    def get_roster(self):
+        """Get (attendee_id, name, status) for every sign-up, registered first then waitlist order"""
+        from .attendee import Attendee
+        from .activity_signup import ActivitySignup
+        
+        session = SESSION()
+        try:
+            return session.query(Attendee.id, Attendee.name, ActivitySignup.status).join(
+                ActivitySignup, ActivitySignup.attendee_id == Attendee.id
+            ).filter(
+                ActivitySignup.activity_id == self.id
+            ).order_by(ActivitySignup.status, ActivitySignup.id).all()
+        finally:
+            session.close()
     
     def get_end_time(self):
         """Calculate end time based on start time and duration"""
@@ -129,4 +280,14 @@ class Activity(Base):
         other_end = other_start + other_activity.duration
         
         # Check for overlap
-        return not (self_end <= other_start or other_end <= self_start)
\ No newline at end of file
+        return not (self_end <= other_start or other_end <= self_start)
+
+
+# Finder statements are built once; each call only binds its parameters,
+# and the engine's compiled cache supplies the SQL after the first call
+_FIND_BY_ID = select(Activity).where(Activity.id == bindparam('activity_id')).limit(1)
+_FIND_BY_EVENT = select(Activity).where(Activity.event_id == bindparam('event_id'))
+_FIND_BY_NAME = select(Activity).where(Activity.name.ilike(bindparam('pattern')))
+_ALL = select(Activity).order_by(Activity.id)
+_PAGE = _ALL.where(Activity.id > bindparam('after_id')).limit(bindparam('limit'))
+_COUNT = select(func.count()).select_from(Activity)
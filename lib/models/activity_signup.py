@@ -0,0 +1,111 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Index, event, update, select, delete
+from . import Base
+from .activity import Activity
+from .attendee import Attendee
+from datetime import datetime
+
+REGISTERED = 'Registered'
+WAITLISTED = 'Waitlisted'
+
+
+class ActivitySignup(Base):
+    __tablename__ = 'activity_signups'
+
+    id = Column(Integer, primary_key=True)  # also the waitlist order
+    activity_id = Column(Integer, ForeignKey('activities.id'), nullable=False)
+    attendee_id = Column(Integer, ForeignKey('attendees.id'), nullable=False)
+    status = Column(String, nullable=False, default=REGISTERED)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('activity_id', 'attendee_id', name='uq_activity_signups_activity_attendee'),
+        Index('ix_activity_signups_waitlist', 'activity_id', 'status', 'id'),
+        Index('ix_activity_signups_attendee_id', 'attendee_id'),
+    )
+
+    def __repr__(self):
+        return f"<ActivitySignup(activity_id={self.activity_id}, attendee_id={self.attendee_id}, status='{self.status}')>"
+
+
+def release_seat(connection, activity_id, was_registered):
+    """Hand a freed seat to the head of the waitlist, or give it back.
+
+    Must run in the same transaction that removed the sign-up. Returns the
+    promoted attendee ID, or None if nobody was waiting.
+    """
+    if not was_registered:
+        return None
+
+    signups = ActivitySignup.__table__
+    while True:
+        head = connection.execute(
+            select(signups.c.id, signups.c.attendee_id)
+            .where(signups.c.activity_id == activity_id, signups.c.status == WAITLISTED)
+            .order_by(signups.c.id)
+            .limit(1)
+        ).first()
+
+        if head is None:
+            activities = Activity.__table__
+            connection.execute(
+                update(activities)
+                .where(activities.c.id == activity_id, activities.c.signed_up > 0)
+                .values(signed_up=activities.c.signed_up - 1)
+            )
+            return None
+
+        # Conditional so a concurrent canceller can't promote the same person
+        promoted = connection.execute(
+            update(signups)
+            .where(signups.c.id == head.id, signups.c.status == WAITLISTED)
+            .values(status=REGISTERED)
+        )
+        if promoted.rowcount == 1:
+            return head.attendee_id
+
+
+def promote_waitlist(connection, activity_id, seats):
+    """Move up to `seats` waitlisted sign-ups to Registered, oldest first.
+
+    Used when an activity's capacity grows; must run in the same transaction
+    as that change. Doesn't touch the activity's signed_up counter, which
+    the caller bumps by the number promoted. Returns the promoted attendee IDs.
+    """
+    if seats is not None and seats <= 0:
+        return []
+
+    signups = ActivitySignup.__table__
+    waiting = (
+        select(signups.c.id, signups.c.attendee_id)
+        .where(signups.c.activity_id == activity_id, signups.c.status == WAITLISTED)
+        .order_by(signups.c.id)
+    )
+    if seats is not None:
+        waiting = waiting.limit(seats)
+    rows = connection.execute(waiting).all()
+    if rows:
+        connection.execute(
+            update(signups)
+            .where(signups.c.id.in_([row.id for row in rows]))
+            .values(status=REGISTERED)
+        )
+    return [row.attendee_id for row in rows]
+
+
+@event.listens_for(Attendee, 'before_delete')
+def _cancel_attendee_signups(mapper, connection, target):
+    # Deleting an attendee frees their seats and promotes the waitlist
+    signups = ActivitySignup.__table__
+    rows = connection.execute(
+        select(signups.c.id, signups.c.activity_id, signups.c.status)
+        .where(signups.c.attendee_id == target.id)
+    ).all()
+    for signup_id, activity_id, status in rows:
+        connection.execute(delete(signups).where(signups.c.id == signup_id))
+        release_seat(connection, activity_id, status == REGISTERED)
+
+
+@event.listens_for(Activity, 'before_delete')
+def _drop_activity_signups(mapper, connection, target):
+    signups = ActivitySignup.__table__
+    connection.execute(delete(signups).where(signups.c.activity_id == target.id))
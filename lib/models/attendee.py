@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, bindparam, func, or_, select
 from sqlalchemy.orm import relationship
 from . import Base, SESSION
+from .validation import ValidationError, validate_fields, validate_rows
+from .streaming import DEFAULT_BATCH_SIZE, stream
+from .write_path import run_write, update_versioned
 
 class Attendee(Base):
     __tablename__ = 'attendees'
@@ -11,7 +14,17 @@ class Attendee(Base):
     phone = Column(String)
     rsvp_status = Column(String, default='Pending')
     dietary_restrictions = Column(String)
+    checked_in_at = Column(DateTime)
+    invited_at = Column(DateTime)   # set by invitations.py when the invitation is sent
+    reminded_at = Column(DateTime)  # last RSVP reminder sent
     event_id = Column(Integer, ForeignKey('events.id'))
+    version_id = Column(Integer, nullable=False, server_default='1')  # bumped by every edit; see update()
+    
+    __mapper_args__ = {'version_id_col': version_id}
+    __table_args__ = (
+        # Serves find_by_event, and covers the per-event RSVP counts
+        Index('ix_attendees_event_id_rsvp_status', 'event_id', 'rsvp_status'),
+    )
     
     # Relationships
     event = relationship('Event', back_populates='attendees')
@@ -20,35 +33,17 @@ class Attendee(Base):
         return f"<Attendee(id={self.id}, name='{self.name}', email='{self.email}', status='{self.rsvp_status}')>"
     
     def __init__(self, **kwargs):
-        # Validate email and name before setting
-        if 'email' in kwargs and not self._is_valid_email(kwargs['email']):
-            raise ValueError("Invalid email format")
-        if 'name' in kwargs and (not isinstance(kwargs['name'], str) or len(kwargs['name'].strip()) == 0):
-            raise ValueError("Attendee name must be a non-empty string")
-        if 'rsvp_status' in kwargs:
-            valid_statuses = ['Pending', 'Confirmed', 'Declined']
-            if kwargs['rsvp_status'] not in valid_statuses:
-                raise ValueError(f"RSVP status must be one of: {valid_statuses}")
-        
-        # Set attributes
-        for key, value in kwargs.items():
-            if key == 'email':
-                value = value.strip().lower()
-            elif key == 'name':
-                value = value.strip()
+        # Validate and normalize inputs before setting
+        for key, value in validate_fields('Attendee', kwargs).items():
             setattr(self, key, value)
     
-    def _is_valid_email(self, email):
-        """Validate email format"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    UPDATABLE_FIELDS = ('name', 'email', 'phone', 'rsvp_status', 'dietary_restrictions')
     
     # ORM Methods
     @classmethod
     def create(cls, name, email, event_id, phone=None, rsvp_status='Pending', dietary_restrictions=None):
         """Create a new attendee"""
-        session = SESSION()
-        try:
+        def _create(session):
             attendee = cls(
                 name=name,
                 email=email,
@@ -58,25 +53,36 @@ class Attendee(Base):
                 dietary_restrictions=dietary_restrictions
             )
             session.add(attendee)
-            session.commit()
             return attendee
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        
+        return run_write(_create)
+    
+    @classmethod
+    def bulk_create(cls, rows):
+        """Create many attendees in one transaction
+        
+        `rows` is a list of dicts of Attendee fields. Every row is validated
+        first; if any fail, ValidationError lists all of them and nothing is saved.
+        """
+        valid_rows, errors = validate_rows('Attendee', rows)
+        if errors:
+            raise ValidationError(errors)
+        
+        def _create(session):
+            attendees = [cls(**values) for values in valid_rows]
+            session.add_all(attendees)
+            return attendees
+        
+        return run_write(_create)
     
     def delete(self):
         """Delete this attendee"""
-        session = SESSION()
-        try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        def _delete(session):
+            attendee = session.get(Attendee, self.id)
+            if attendee is not None:
+                session.delete(attendee)
+        
+        run_write(_delete)
     
     @classmethod
     def get_all(cls):
@@ -87,139 +93,169 @@ class Attendee(Base):
         return attendees
     
     @classmethod
-    def find_by_id(cls, attendee_id):
-        """Find attendee by ID"""
-        session = SESSION()
-        attendee = session.query(cls).filter(cls.id == attendee_id).first()
-        session.close()
-        return attendee
+    def iter_all(cls, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield every attendee, loading `batch_size` rows at a time
+        
+        Unlike get_all(), memory stays flat however many there are. The
+        attendees come out detached, without relationships (see streaming.py).
+        """
+        return stream(_ALL, batch_size=batch_size)
     
     @classmethod
-    def find_by_event(cls, event_id):
-        """Find all attendees for an event"""
-        session = SESSION()
-        attendees = session.query(cls).filter(cls.event_id == event_id).all()
-        session.close()
-        return attendees
+    def iter_by_event(cls, event_id, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield an event's attendees, loading `batch_size` rows at a time"""
+        return stream(_FIND_BY_EVENT, {'event_id': event_id}, batch_size)
     
     @classmethod
-    def find_by_name(cls, name):
-        """Find attendees by name (partial match)"""
+    def count(cls):
+        """Count attendees with a single SELECT COUNT(*)"""
         session = SESSION()
-        attendees = session.query(cls).filter(cls.name.ilike(f'%{name}%')).all()
-        session.close()
-        return attendees
+        try:
+            return session.execute(_COUNT).scalar()
+        finally:
+            session.close()
     
     @classmethod
-    def find_by_email(cls, email):
-        """Find attendee by email"""
-        session = SESSION()
-        attendee = session.query(cls).filter(cls.email == email.lower()).first()
-        session.close()
-        return attendee
-    
-    def update_rsvp(self, status):
-        """Update RSVP status"""
-        valid_statuses = ['Pending', 'Confirmed', 'Declined']
-        if status not in valid_statuses:
-            raise ValueError(f"RSVP status must be one of: {valid_statuses}")
-            
+    def find_page(cls, after_id=0, limit=DEFAULT_BATCH_SIZE):
+        """Find up to `limit` attendees with IDs above `after_id`, in ID order
+        
+        Pass the last ID of one page as `after_id` to get the next.
+        """
         session = SESSION()
         try:
-            self.rsvp_status = status
-            session.add(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
+            return session.execute(_PAGE, {'after_id': after_id, 'limit': limit}).scalars().all()
         finally:
             session.close()
-        return re.match(pattern, email) is not None
     
-    # ORM Methods
     @classmethod
-    def create(cls, name, email, event_id, phone=None, rsvp_status='Pending', dietary_restrictions=None):
-        """Create a new attendee"""
+    def count_by_event(cls, event_ids, rsvp_status=None):
+        """Count attendees of each of `event_ids`, as {event_id: count}
+        
+        Pass rsvp_status to count only attendees with that RSVP.
+        """
+        statement = _COUNT_BY_EVENT if rsvp_status is None else _COUNT_BY_EVENT_WITH_RSVP
         session = SESSION()
         try:
-            attendee = cls(
-                name=name,
-                email=email,
-                event_id=event_id,
-                phone=phone,
-                rsvp_status=rsvp_status,
-                dietary_restrictions=dietary_restrictions
-            )
-            session.add(attendee)
-            session.commit()
-            return attendee
-        except Exception as e:
-            session.rollback()
-            raise e
+            rows = session.execute(statement, {'event_ids': list(event_ids), 'rsvp_status': rsvp_status}).all()
+            return dict(rows)
         finally:
             session.close()
     
-    def delete(self):
-        """Delete this attendee"""
+    @classmethod
+    def find_by_id(cls, attendee_id):
+        """Find attendee by ID"""
         session = SESSION()
         try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
+            return session.execute(_FIND_BY_ID, {'attendee_id': attendee_id}).scalars().first()
         finally:
             session.close()
     
     @classmethod
-    def get_all(cls):
-        """Get all attendees"""
+    def find_by_event(cls, event_id):
+        """Find all attendees for an event"""
         session = SESSION()
-        attendees = session.query(cls).all()
-        session.close()
-        return attendees
+        try:
+            return session.execute(_FIND_BY_EVENT, {'event_id': event_id}).scalars().all()
+        finally:
+            session.close()
     
     @classmethod
-    def find_by_id(cls, attendee_id):
-        """Find attendee by ID"""
+    def find_uninvited(cls, event_id, after_id=0, limit=DEFAULT_BATCH_SIZE):
+        """Find up to `limit` Pending attendees of an event not yet invited, with IDs above `after_id`
+        
+        Pass the last ID of one page as `after_id` to get the next.
+        """
         session = SESSION()
-        attendee = session.query(cls).filter(cls.id == attendee_id).first()
-        session.close()
-        return attendee
+        try:
+            params = {'event_id': event_id, 'after_id': after_id, 'limit': limit}
+            return session.execute(_FIND_UNINVITED, params).scalars().all()
+        finally:
+            session.close()
     
     @classmethod
-    def find_by_event(cls, event_id):
-        """Find all attendees for an event"""
+    def find_to_remind(cls, event_id, reminded_before, after_id=0, limit=DEFAULT_BATCH_SIZE):
+        """Find up to `limit` still Pending attendees invited and not reminded since `reminded_before`
+        
+        Pages by ID like find_uninvited().
+        """
         session = SESSION()
-        attendees = session.query(cls).filter(cls.event_id == event_id).all()
-        session.close()
-        return attendees
+        try:
+            params = {'event_id': event_id, 'cutoff': reminded_before, 'after_id': after_id, 'limit': limit}
+            return session.execute(_FIND_TO_REMIND, params).scalars().all()
+        finally:
+            session.close()
     
     @classmethod
     def find_by_name(cls, name):
         """Find attendees by name (partial match)"""
         session = SESSION()
-        attendees = session.query(cls).filter(cls.name.ilike(f'%{name}%')).all()
-        session.close()
-        return attendees
+        try:
+            return session.execute(_FIND_BY_NAME, {'pattern': f'%{name}%'}).scalars().all()
+        finally:
+            session.close()
     
     @classmethod
     def find_by_email(cls, email):
         """Find attendee by email"""
         session = SESSION()
-        attendee = session.query(cls).filter(cls.email == email.lower()).first()
-        session.close()
-        return attendee
+        try:
+            return session.execute(_FIND_BY_EMAIL, {'email': email.lower()}).scalars().first()
+        finally:
+            session.close()
+    
+    def update(self, **changes):
+        """Save changes to this attendee, unless someone else changed it since it was read
+        
+        Raises UpdateConflictError in that case; re-fetch and try again.
+        """
+        unknown = set(changes) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update attendee field(s): {', '.join(sorted(unknown))}")
+        changes = validate_fields('Attendee', changes)
+        
+        updated = update_versioned(Attendee, self.id, self.version_id, changes)
+        for key in changes:
+            setattr(self, key, getattr(updated, key))
+        self.version_id = updated.version_id
     
     def update_rsvp(self, status):
         """Update RSVP status"""
+        self.update(rsvp_status=status)
+    
+    @classmethod
+    def fuzzy_search(cls, term, limit=10):
+        """Find attendees by approximate name or email, best matches first"""
+        from .attendee_search import fuzzy_search
         session = SESSION()
         try:
-            self.rsvp_status = status
-            session.add(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
+            return fuzzy_search(session, term, limit)
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+
+# Finder statements are built once; each call only binds its parameters,
+# and the engine's compiled cache supplies the SQL after the first call
+_FIND_BY_ID = select(Attendee).where(Attendee.id == bindparam('attendee_id')).limit(1)
+_FIND_BY_EVENT = select(Attendee).where(Attendee.event_id == bindparam('event_id'))
+_FIND_BY_NAME = select(Attendee).where(Attendee.name.ilike(bindparam('pattern')))
+# Keyset pages of Pending attendees; the (event_id, rsvp_status) index finds them
+_PENDING_PAGE = select(Attendee).where(
+    Attendee.event_id == bindparam('event_id'),
+    Attendee.rsvp_status == 'Pending',
+    Attendee.id > bindparam('after_id'),
+).order_by(Attendee.id).limit(bindparam('limit'))
+_FIND_UNINVITED = _PENDING_PAGE.where(Attendee.invited_at.is_(None))
+_FIND_TO_REMIND = _PENDING_PAGE.where(
+    # A reminder waits a full interval after the invitation, too
+    Attendee.invited_at.is_not(None),
+    Attendee.invited_at < bindparam('cutoff'),
+    or_(Attendee.reminded_at.is_(None), Attendee.reminded_at < bindparam('cutoff')),
+)
+_FIND_BY_EMAIL = select(Attendee).where(Attendee.email == bindparam('email')).limit(1)
+_ALL = select(Attendee).order_by(Attendee.id)
+_PAGE = _ALL.where(Attendee.id > bindparam('after_id')).limit(bindparam('limit'))
+_COUNT = select(func.count()).select_from(Attendee)
+_COUNT_BY_EVENT = select(Attendee.event_id, func.count()).where(
+    Attendee.event_id.in_(bindparam('event_ids', expanding=True))
+).group_by(Attendee.event_id)
+_COUNT_BY_EVENT_WITH_RSVP = _COUNT_BY_EVENT.where(Attendee.rsvp_status == bindparam('rsvp_status'))
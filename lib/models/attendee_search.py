@@ -0,0 +1,197 @@
+"""
+Trigram index for typo-tolerant attendee search.
+
+Every attendee's name and email are broken into trigrams and stored in the
+attendee_trigrams table, kept in sync by mapper events on insert, update and
+delete. A search first narrows the candidates to attendees sharing enough
+trigrams with the query (an indexed lookup), then ranks only those by
+trigram and edit-distance similarity.
+"""
+
+import re
+
+from sqlalchemy import Column, Integer, String, Index, event, func, delete, insert, inspect
+from sqlalchemy.orm import Session, object_session
+from . import Base
+from .attendee import Attendee
+
+_WORD_SPLIT = re.compile(r'[^0-9a-z]+')
+
+
+class AttendeeTrigram(Base):
+    __tablename__ = 'attendee_trigrams'
+
+    trigram = Column(String(3), primary_key=True)
+    attendee_id = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_attendee_trigrams_attendee_id', 'attendee_id'),
+    )
+
+    def __repr__(self):
+        return f"<AttendeeTrigram(trigram='{self.trigram}', attendee_id={self.attendee_id})>"
+
+
+def _words(text):
+    return [w for w in _WORD_SPLIT.split((text or '').lower()) if w]
+
+
+def trigrams(text):
+    """Return the set of padded trigrams for every word in `text`"""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def attendee_trigrams(name, email):
+    """Trigrams indexed for one attendee"""
+    return trigrams(name) | trigrams(email)
+
+
+def levenshtein(a, b, max_distance=None):
+    """Edit distance between two strings, optionally giving up past a bound"""
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(term, name, email):
+    """Score how well `term` matches an attendee, from 0.0 to 1.0.
+
+    Takes the better of trigram overlap (good for partial, reordered input)
+    and edit-distance similarity against the name, email and their words
+    (good for typos in short input).
+    """
+    term = term.strip().lower()
+    query_grams = trigrams(term)
+    grams = attendee_trigrams(name, email)
+    shared = len(query_grams & grams)
+    trigram_score = shared / (len(query_grams) + len(grams) - shared) if query_grams else 0.0
+
+    targets = [(name or '').lower(), (email or '').lower(), (email or '').lower().split('@')[0]]
+    targets.extend(_words(name))
+    edit_score = 0.0
+    for target in targets:
+        if not target:
+            continue
+        longest = max(len(term), len(target))
+        distance = levenshtein(term, target, max_distance=longest)
+        edit_score = max(edit_score, 1 - distance / longest)
+
+    return max(trigram_score, edit_score)
+
+
+def fuzzy_search(session, term, limit=10, min_score=0.3, candidate_factor=20):
+    """Return up to `limit` (attendee, score) pairs best matching `term`"""
+    query_grams = trigrams(term)
+    if not query_grams:
+        return []
+
+    # Require a fraction of the query's trigrams to be shared, so short
+    # queries still match through a typo but long ones prune aggressively.
+    min_shared = max(1, len(query_grams) // 3)
+    shared = func.count(AttendeeTrigram.trigram)
+    candidate_ids = [
+        attendee_id for attendee_id, in session.query(AttendeeTrigram.attendee_id)
+        .filter(AttendeeTrigram.trigram.in_(query_grams))
+        .group_by(AttendeeTrigram.attendee_id)
+        .having(shared >= min_shared)
+        .order_by(shared.desc())
+        .limit(limit * candidate_factor)
+    ]
+    if not candidate_ids:
+        return []
+
+    candidates = session.query(Attendee).filter(Attendee.id.in_(candidate_ids)).all()
+    scored = [(a, similarity(term, a.name, a.email)) for a in candidates]
+    scored = [(a, score) for a, score in scored if score >= min_score]
+    scored.sort(key=lambda pair: (-pair[1], pair[0].name))
+    return scored[:limit]
+
+
+def rebuild_trigram_index(session, batch_size=1000):
+    """Rebuild the trigram table from scratch for every attendee"""
+    session.execute(delete(AttendeeTrigram))
+    rows = []
+    for attendee_id, name, email in session.query(Attendee.id, Attendee.name, Attendee.email):
+        rows.extend({'trigram': g, 'attendee_id': attendee_id} for g in attendee_trigrams(name, email))
+        if len(rows) >= batch_size:
+            session.execute(insert(AttendeeTrigram), rows)
+            rows = []
+    if rows:
+        session.execute(insert(AttendeeTrigram), rows)
+    session.commit()
+
+
+def index_inserted(connection, attendees):
+    """Index attendees inserted with Core statements, which skip the mapper events
+
+    `attendees` are mappings with 'id', 'name' and 'email'.
+    """
+    rows = [{'trigram': g, 'attendee_id': attendee['id']}
+            for attendee in attendees
+            for g in attendee_trigrams(attendee['name'], attendee['email'])]
+    if rows:
+        connection.execute(insert(AttendeeTrigram), rows)
+
+
+def _write_trigrams(connection, target, replace=False):
+    if replace:
+        connection.execute(delete(AttendeeTrigram).where(AttendeeTrigram.attendee_id == target.id))
+    grams = attendee_trigrams(target.name, target.email)
+    if grams:
+        connection.execute(
+            insert(AttendeeTrigram),
+            [{'trigram': g, 'attendee_id': target.id} for g in grams]
+        )
+
+
+@event.listens_for(Attendee, 'after_insert')
+def _index_new_attendee(mapper, connection, target):
+    # Queued, so a flush inserting many attendees writes their trigrams in
+    # one statement (see _write_pending_trigrams)
+    pending = object_session(target).info.setdefault('pending_trigrams', [])
+    pending.extend({'trigram': g, 'attendee_id': target.id}
+                   for g in attendee_trigrams(target.name, target.email))
+
+
+@event.listens_for(Session, 'before_flush')
+def _drop_pending_trigrams(session, flush_context, instances):
+    # Left over only if the previous flush failed part-way
+    session.info.pop('pending_trigrams', None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_pending_trigrams(session, flush_context):
+    rows = session.info.pop('pending_trigrams', None)
+    if rows:
+        session.connection().execute(insert(AttendeeTrigram), rows)
+
+
+@event.listens_for(Attendee, 'after_update')
+def _reindex_attendee(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.name.history.has_changes() or state.attrs.email.history.has_changes():
+        _write_trigrams(connection, target, replace=True)
+
+
+@event.listens_for(Attendee, 'after_delete')
+def _unindex_attendee(mapper, connection, target):
+    connection.execute(delete(AttendeeTrigram).where(AttendeeTrigram.attendee_id == target.id))
@@ -0,0 +1,95 @@
+"""
+Budget analytics computed in SQL.
+
+An event's spend is the sum of its activities' costs. event_budgets()
+works out spend, remaining budget and variance for every event in one
+LEFT JOIN ... GROUP BY query, filters with HAVING, and sorts and limits in
+SQLite, so only the rows to be shown reach Python. budget_totals() reduces
+the same grouped query to one row for the dashboard. The per-event sums
+read the covering ix_activities_event_id_cost index.
+"""
+
+from sqlalchemy import case, func, select
+from . import SESSION
+from .event import Event
+from .activity import Activity
+
+_events = Event.__table__
+_activities = Activity.__table__
+
+_budget = func.coalesce(_events.c.budget, 0.0)
+_spend = func.coalesce(func.sum(_activities.c.cost), 0.0)
+_overage = _spend - _budget
+# Percent over (+) or under (-) budget; NULL for events without a budget
+_variance = case((_budget > 0, _overage * 100.0 / _budget))
+
+SORTS = {
+    'overage': (_overage.desc(),),
+    'variance': (_variance.desc(),),  # SQLite sorts NULLs last in DESC
+    'spend': (_spend.desc(),),
+    'remaining': ((_budget - _spend).asc(),),
+    'date': (_events.c.date.asc(),),
+}
+
+_BY_EVENT = select(
+    _events.c.id,
+    _events.c.name,
+    _events.c.date,
+    _events.c.status,
+    _budget.label('budget'),
+    _spend.label('spend'),
+    (_budget - _spend).label('remaining'),
+    _variance.label('variance_pct'),
+).select_from(
+    _events.outerjoin(_activities, _activities.c.event_id == _events.c.id)
+).group_by(_events.c.id)
+
+
+def _grouped(status=None, over_pct=None):
+    statement = _BY_EVENT
+    if status is not None:
+        statement = statement.where(_events.c.status == status)
+    if over_pct is not None:
+        statement = statement.having(_spend > _budget * (1 + over_pct / 100.0))
+    return statement
+
+
+def event_budgets(over_pct=None, status=None, sort='overage', limit=None):
+    """Per-event budget rows: id, name, date, status, budget, spend, remaining, variance_pct
+
+    over_pct keeps only events whose spend exceeds their budget by more than
+    that percentage (0 for any overspend); status filters by event status;
+    sort is one of SORTS; limit returns only the top rows.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Sort must be one of: {list(SORTS)}")
+    statement = _grouped(status, over_pct).order_by(*SORTS[sort], _events.c.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    session = SESSION()
+    try:
+        return session.execute(statement).all()
+    finally:
+        session.close()
+
+
+def budget_totals(over_pct=0, status=None):
+    """One row of totals: events, budget, spend, remaining, over_budget
+
+    over_budget counts the events over budget by more than `over_pct` percent.
+    """
+    per_event = _grouped(status).subquery()
+    statement = select(
+        func.count().label('events'),
+        func.coalesce(func.sum(per_event.c.budget), 0.0).label('budget'),
+        func.coalesce(func.sum(per_event.c.spend), 0.0).label('spend'),
+        func.coalesce(func.sum(per_event.c.remaining), 0.0).label('remaining'),
+        func.coalesce(func.sum(case(
+            (per_event.c.spend > per_event.c.budget * (1 + over_pct / 100.0), 1), else_=0
+        )), 0).label('over_budget'),
+    )
+    session = SESSION()
+    try:
+        return session.execute(statement).one()
+    finally:
+        session.close()
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index, bindparam, event, func, insert, literal, select, update
 from sqlalchemy.orm import relationship
 from . import Base, SESSION
+from .recurrence import occurrences, parse_schedule
+from .validation import validate_fields
+from .streaming import DEFAULT_BATCH_SIZE, stream
+from .write_path import run_write, update_versioned
+from .venue_index import DEFAULT_EVENT_DURATION, VenueConflictError, booking_window, normalize_location
 from datetime import datetime
+import uuid
 
 class Event(Base):
     __tablename__ = 'events'
@@ -9,10 +15,22 @@ class Event(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(String)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)  # ix_events_date serves date-range scans
+    duration = Column(Integer, default=DEFAULT_EVENT_DURATION)  # in minutes
     location = Column(String, nullable=False)
     budget = Column(Float, default=0.0)
     status = Column(String, default='Planning')
+    revision = Column(Integer, nullable=False, default=1)  # bumped on any change to the event or its children
+    version_id = Column(Integer, nullable=False, server_default='1')  # bumped by every edit; see update()
+    # Derived from location, date and duration on every flush (see venue_index.py)
+    venue = Column(String)     # normalized location
+    ends_at = Column(DateTime)  # when the event releases the venue
+    uid = Column(String, default=lambda: uuid.uuid4().hex)  # unlike id, never reused after a delete
+    
+    __table_args__ = (
+        Index('ix_events_venue_ends_at', 'venue', 'ends_at'),
+    )
+    __mapper_args__ = {'version_id_col': version_id}
     
     # Relationships
     attendees = relationship('Attendee', back_populates='event', cascade='all, delete-orphan')
@@ -22,53 +40,207 @@ class Event(Base):
         return f"<Event(id={self.id}, name='{self.name}', date='{self.date}', location='{self.location}')>"
     
     def __init__(self, **kwargs):
-        # Set defaults and validate
-        for key, value in kwargs.items():
-            if key == 'name' and (not isinstance(value, str) or len(value.strip()) == 0):
-                raise ValueError("Event name must be a non-empty string")
-            elif key == 'location' and (not isinstance(value, str) or len(value.strip()) == 0):
-                raise ValueError("Event location must be a non-empty string")
-            elif key == 'budget' and value < 0:
-                raise ValueError("Budget cannot be negative")
+        # Validate and normalize inputs before setting
+        for key, value in validate_fields('Event', kwargs).items():
             setattr(self, key, value)
     
+    UPDATABLE_FIELDS = ('name', 'description', 'date', 'duration', 'location', 'budget', 'status')
+    BOOKING_FIELDS = {'name', 'date', 'duration', 'location', 'status'}
+    
     # ORM Methods
     @classmethod
-    def create(cls, name, description, date, location, budget=0.0, status='Planning'):
-        """Create a new event"""
-        session = SESSION()
-        try:
+    def create(cls, name, description, date, location, budget=0.0, status='Planning',
+               duration=DEFAULT_EVENT_DURATION):
+        """Create a new event, refusing to double-book its venue"""
+        def _create(session):
             event = cls(
                 name=name,
                 description=description,
                 date=date,
+                duration=duration,
                 location=location,
                 budget=budget,
                 status=status
             )
+            if status != 'Cancelled':
+                clashes = _find_clashes(session, location, date, duration)
+                if clashes:
+                    raise VenueConflictError(location, clashes)
             session.add(event)
-            session.commit()
-            session.refresh(event)  # Refresh to get the ID
+            session.flush()  # Flush to get the ID
             return event
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        
+        return run_write(_create)
     
     def delete(self):
         """Delete this event"""
-        session = SESSION()
-        try:
+        def _delete(session):
             # Reattach to session
             event_to_delete = session.merge(self)
             session.delete(event_to_delete)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        
+        run_write(_delete)
+    
+    def update(self, **changes):
+        """Save changes to this event, unless someone else changed it since it was read
+        
+        Raises UpdateConflictError in that case; re-fetch and try again.
+        Moving the event still refuses to double-book its venue.
+        """
+        unknown = set(changes) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update event field(s): {', '.join(sorted(unknown))}")
+        changes = validate_fields('Event', changes)
+        rebook = bool(self.BOOKING_FIELDS & set(changes))
+        
+        def _check(session, current):
+            if not rebook:
+                return
+            location = changes.get('location', current.location)
+            if changes.get('status', current.status) != 'Cancelled':
+                clashes = _find_clashes(
+                    session,
+                    location,
+                    changes.get('date', current.date),
+                    changes.get('duration', current.duration),
+                    exclude_id=current.id,
+                )
+                if clashes:
+                    raise VenueConflictError(location, clashes)
+        
+        updated = update_versioned(Event, self.id, self.version_id, changes, check=_check)
+        for key in changes:
+            setattr(self, key, getattr(updated, key))
+        self.version_id = updated.version_id
+    
+    @classmethod
+    def clone(cls, event_id, new_date, with_attendees=False):
+        """Copy an event and its activities to a new date and return the copy
+        
+        With `with_attendees`, the event's attendees are invited to the copy
+        too, with their RSVP reset to Pending.
+        """
+        created = cls._copy(event_id, lambda template_date: [new_date], with_attendees)
+        return cls.find_by_id(created[0].id)
+    
+    @classmethod
+    def create_series(cls, template_id, schedule, start=None, with_attendees=False):
+        """Copy an event onto every date of a recurring schedule and return the new events
+        
+        `schedule` is an RRULE-style string such as "FREQ=WEEKLY;COUNT=52"
+        (see recurrence.py). The series starts at `start`, or one interval
+        after the template's date.
+        """
+        schedule = parse_schedule(schedule)
+        
+        def _dates(template_date):
+            if start is None:
+                return occurrences(schedule, template_date, include_start=False)
+            return occurrences(schedule, start)
+        
+        return cls._copy(template_id, _dates, with_attendees)
+    
+    @classmethod
+    def _copy(cls, template_id, plan_dates, with_attendees):
+        """Copy an event onto the dates `plan_dates(template_date)` returns
+        
+        Rows are copied with one INSERT ... SELECT per table, however many
+        dates there are. Copies start out in Planning, with no sign-ups.
+        """
+        from .activity import Activity
+        from .attendee import Attendee
+        from .attendee_search import AttendeeTrigram
+        from .journal import journal_inserted
+        
+        events = cls.__table__
+        activities = Activity.__table__
+        attendees = Attendee.__table__
+        trigrams = AttendeeTrigram.__table__
+        
+        def _last_id(session, table):
+            return session.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+        
+        def _copy_rows(session):
+            template = session.get(cls, template_id)
+            if template is None:
+                raise ValueError(f"Event with ID {template_id} not found")
+            dates = sorted(plan_dates(template.date))
+            if not all(isinstance(date, datetime) for date in dates):
+                raise ValueError("Event dates must be datetimes")
+            if not dates:
+                raise ValueError("The schedule doesn't produce any dates")
+            
+            previous_end = None
+            for date in dates:
+                start, end = booking_window(date, template.duration)
+                if previous_end is not None and start < previous_end:
+                    raise ValueError(f"Copies on {date:%Y-%m-%d %H:%M} and the one before it would overlap at the venue")
+                previous_end = end
+                clashes = _find_clashes(session, template.location, date, template.duration)
+                if clashes:
+                    raise VenueConflictError(template.location, clashes)
+            
+            last_event = _last_id(session, events)
+            last_activity = _last_id(session, activities)
+            last_attendee = _last_id(session, attendees)
+            
+            copy_columns = ('name', 'description', 'duration', 'location', 'budget', 'venue')
+            session.execute(
+                insert(events).from_select(
+                    copy_columns + ('date', 'ends_at', 'uid', 'status', 'revision'),
+                    select(*[events.c[name] for name in copy_columns],
+                           bindparam('date', type_=events.c.date.type),
+                           bindparam('ends_at', type_=events.c.ends_at.type),
+                           bindparam('uid', type_=events.c.uid.type),
+                           literal('Planning'), literal(1))
+                    .where(events.c.id == template_id)
+                ),
+                [{'date': date, 'ends_at': booking_window(date, template.duration)[1], 'uid': uuid.uuid4().hex}
+                 for date in dates]
+            )
+            new_events = events.alias('new_events')
+            new_event_ids = new_events.c.id > last_event
+            
+            copy_columns = ('name', 'description', 'start_time', 'duration', 'cost', 'max_participants')
+            session.execute(insert(activities).from_select(
+                copy_columns + ('signed_up', 'event_id'),
+                select(*[activities.c[name] for name in copy_columns], literal(0), new_events.c.id)
+                .join(new_events, new_event_ids)
+                .where(activities.c.event_id == template_id)
+                .order_by(new_events.c.id, activities.c.id)
+            ))
+            
+            if with_attendees:
+                copy_columns = ('name', 'email', 'phone', 'dietary_restrictions')
+                session.execute(insert(attendees).from_select(
+                    copy_columns + ('rsvp_status', 'event_id'),
+                    select(*[attendees.c[name] for name in copy_columns], literal('Pending'), new_events.c.id)
+                    .join(new_events, new_event_ids)
+                    .where(attendees.c.event_id == template_id)
+                    .order_by(new_events.c.id, attendees.c.id)
+                ))
+                # Copies share their original's name and email, so they
+                # share its search trigrams too
+                originals = attendees.alias('originals')
+                copies = attendees.alias('copies')
+                session.execute(insert(trigrams).from_select(
+                    ('trigram', 'attendee_id'),
+                    select(trigrams.c.trigram, copies.c.id).distinct()
+                    .join(originals, originals.c.id == trigrams.c.attendee_id)
+                    .join(copies, (copies.c.name == originals.c.name) & (copies.c.email == originals.c.email))
+                    .where(originals.c.event_id == template_id, copies.c.id > last_attendee)
+                ))
+            
+            for model, table, last in ((cls, events, last_event), (Activity, activities, last_activity),
+                                       (Attendee, attendees, last_attendee)):
+                rows = session.execute(select(table).where(table.c.id > last)).mappings()
+                journal_inserted(session, model.__name__, rows)
+            
+            return session.execute(
+                select(cls).where(events.c.id > last_event).order_by(events.c.id)
+            ).scalars().all()
+        
+        return run_write(_copy_rows)
     
     @classmethod
     def get_all(cls):
@@ -84,12 +256,42 @@ class Event(Base):
         finally:
             session.close()
     
+    @classmethod
+    def iter_all(cls, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield every event, loading `batch_size` rows at a time
+        
+        Unlike get_all(), memory stays flat however many there are. The
+        events come out detached, without relationships (see streaming.py).
+        """
+        return stream(_ALL, batch_size=batch_size)
+    
+    @classmethod
+    def count(cls):
+        """Count events with a single SELECT COUNT(*)"""
+        session = SESSION()
+        try:
+            return session.execute(_COUNT).scalar()
+        finally:
+            session.close()
+    
+    @classmethod
+    def find_page(cls, after_id=0, limit=DEFAULT_BATCH_SIZE):
+        """Find up to `limit` events with IDs above `after_id`, in ID order
+        
+        Pass the last ID of one page as `after_id` to get the next.
+        """
+        session = SESSION()
+        try:
+            return session.execute(_PAGE, {'after_id': after_id, 'limit': limit}).scalars().all()
+        finally:
+            session.close()
+    
     @classmethod
     def find_by_id(cls, event_id):
         """Find event by ID"""
         session = SESSION()
         try:
-            event = session.query(cls).filter(cls.id == event_id).first()
+            event = session.execute(_FIND_BY_ID, {'event_id': event_id}).scalars().first()
             if event:
                 # Force load relationships
                 _ = len(event.attendees)
@@ -98,12 +300,60 @@ class Event(Base):
         finally:
             session.close()
     
+    @classmethod
+    def find_between(cls, start, end, status=None, limit=None):
+        """Find events starting in [start, end), earliest first
+        
+        Returns lightweight rows (id, name, date, duration, location, status)
+        rather than Event objects, read with a range scan of ix_events_date.
+        """
+        statement = _FIND_BETWEEN if status is None else _FIND_BETWEEN_WITH_STATUS
+        if limit is not None:
+            statement = statement.limit(limit)
+        session = SESSION()
+        try:
+            return session.execute(statement, {'start': start, 'end': end, 'status': status}).all()
+        finally:
+            session.close()
+    
+    @classmethod
+    def count_by_status(cls):
+        """Count events per status, as {status: count}"""
+        session = SESSION()
+        try:
+            return dict(session.execute(_COUNT_BY_STATUS).all())
+        finally:
+            session.close()
+    
+    @classmethod
+    def get_revision(cls, event_id):
+        """Get an event's current revision, or None if it doesn't exist"""
+        session = SESSION()
+        try:
+            return session.execute(_GET_REVISION, {'event_id': event_id}).scalar()
+        finally:
+            session.close()
+    
+    @classmethod
+    def get_version(cls, event_id):
+        """Get a token that changes whenever the event does, or None if it doesn't exist
+        
+        It combines uid and revision. Revision alone repeats when SQLite
+        reuses a deleted event's ID, since the new event starts at 1 again.
+        """
+        session = SESSION()
+        try:
+            row = session.execute(_GET_VERSION, {'event_id': event_id}).first()
+            return None if row is None else f"{row.uid}.{row.revision}"
+        finally:
+            session.close()
+    
     @classmethod
     def find_by_name(cls, name):
         """Find events by name (partial match)"""
         session = SESSION()
         try:
-            events = session.query(cls).filter(cls.name.ilike(f'%{name}%')).all()
+            events = session.execute(_FIND_BY_NAME, {'pattern': f'%{name}%'}).scalars().all()
             # Force load relationships
             for event in events:
                 _ = len(event.attendees)
@@ -112,6 +362,11 @@ class Event(Base):
         finally:
             session.close()
     
+    def get_end_time(self):
+        """Calculate when the event releases its venue"""
+        from datetime import timedelta
+        return self.date + timedelta(minutes=self.duration or DEFAULT_EVENT_DURATION)
+    
     def get_attendee_count(self):
         """Get count of confirmed attendees"""
         try:
@@ -148,4 +403,70 @@ class Event(Base):
     
     def get_budget_remaining(self):
         """Calculate remaining budget after activities"""
-        return self.budget - self.get_total_activity_cost()
\ No newline at end of file
+        return self.budget - self.get_total_activity_cost()
+
+
+def _find_clashes(session, location, date, duration, exclude_id=None):
+    """(event_id, name) of bookings at `location` overlapping the window.
+    
+    Call it with the write session, so the check and the booking that
+    follows it are in the same write transaction.
+    """
+    start, end = booking_window(date, duration)
+    rows = session.execute(_FIND_CLASHES, {'venue': normalize_location(location), 'start': start, 'end': end})
+    return [(event_id, name) for event_id, name in rows if event_id != exclude_id]
+
+
+@event.listens_for(Event, 'before_insert')
+@event.listens_for(Event, 'before_update')
+def _set_booking(mapper, connection, target):
+    target.venue = normalize_location(target.location)
+    target.ends_at = booking_window(target.date, target.duration)[1]
+
+
+def fill_derived_columns(connection):
+    """Set venue, ends_at and uid on rows written without them (older databases)"""
+    events = Event.__table__
+    rows = connection.execute(
+        select(events.c.id, events.c.location, events.c.date, events.c.duration).where(events.c.venue.is_(None))
+    ).all()
+    if rows:
+        connection.execute(
+            update(events).where(events.c.id == bindparam('event_id'))
+            .values(venue=bindparam('new_venue'), ends_at=bindparam('new_ends_at')),
+            [{'event_id': event_id, 'new_venue': normalize_location(location),
+              'new_ends_at': booking_window(date, duration)[1]}
+             for event_id, location, date, duration in rows]
+        )
+    ids = connection.execute(select(events.c.id).where(events.c.uid.is_(None))).scalars().all()
+    if ids:
+        connection.execute(
+            update(events).where(events.c.id == bindparam('event_id')).values(uid=bindparam('new_uid')),
+            [{'event_id': event_id, 'new_uid': uuid.uuid4().hex} for event_id in ids]
+        )
+
+
+# Finder statements are built once; each call only binds its parameters,
+# and the engine's compiled cache supplies the SQL after the first call
+_FIND_BY_ID = select(Event).where(Event.id == bindparam('event_id')).limit(1)
+_FIND_BY_NAME = select(Event).where(Event.name.ilike(bindparam('pattern')))
+_GET_REVISION = select(Event.revision).where(Event.id == bindparam('event_id'))
+_GET_VERSION = select(Event.uid, Event.revision).where(Event.id == bindparam('event_id'))
+_FIND_BETWEEN = select(
+    Event.id, Event.name, Event.date, Event.duration, Event.location, Event.status
+).where(
+    Event.date >= bindparam('start'), Event.date < bindparam('end')
+).order_by(Event.date)
+_FIND_BETWEEN_WITH_STATUS = _FIND_BETWEEN.where(Event.status == bindparam('status'))
+_ALL = select(Event).order_by(Event.id)
+_PAGE = _ALL.where(Event.id > bindparam('after_id')).limit(bindparam('limit'))
+_COUNT = select(func.count()).select_from(Event)
+_COUNT_BY_STATUS = select(Event.status, func.count()).group_by(Event.status)
+# Only bookings ending after `start` can overlap, so the range scan of
+# ix_events_venue_ends_at starts there
+_FIND_CLASHES = select(Event.id, Event.name).where(
+    Event.venue == bindparam('venue'),
+    Event.ends_at > bindparam('start'),
+    Event.date < bindparam('end'),
+    Event.status != 'Cancelled',
+).order_by(Event.ends_at)
@@ -0,0 +1,462 @@
+"""
+Append-only change journal for events, attendees and activities.
+
+A Session after_flush hook records creates, updates and deletes of the
+tracked models without adding any statement to the caller's transaction.
+Records are held per session until it commits (and dropped on rollback),
+then handed to a bounded in-memory buffer once the transaction has released
+its connection. A background thread drains the buffer in batches to the
+change_journal table or to a JSONL file. When the buffer is full, committing
+threads wait for the writer to catch up. Each record carries the tenant of
+the session that made the change, and the writer puts it in that tenant's
+change_journal table (or tags its JSONL line with it).
+
+A batch that fails to write is retried with backoff until it succeeds, so
+a busy or briefly unavailable database holds records back rather than
+losing them. Only on shutdown does the writer give up, after STOP_ATTEMPTS,
+logging how many records were dropped.
+
+Readers follow the journal with changes_since(cursor), where the cursor is
+the sequence number of the last change they have seen. In a JSONL file,
+sequence numbers are taken under an exclusive lock on a sidecar .lock file,
+so processes sharing the file never reuse one. Lines are therefore in
+sequence order, and changes_since() finds its starting line with a binary
+search over byte offsets instead of rescanning the file.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, event, insert, inspect
+from sqlalchemy.orm import Session
+
+from . import Base, SESSION
+from .event import Event
+from .attendee import Attendee
+from .activity import Activity
+
+TRACKED_MODELS = (Event, Attendee, Activity)
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds
+DEFAULT_MAX_PENDING = 10000
+RETRY_DELAY = 0.1       # seconds before the first retry of a failed batch
+MAX_RETRY_DELAY = 5.0   # backoff doubles up to this
+STOP_ATTEMPTS = 3       # tries per batch once the journal is stopping
+
+logger = logging.getLogger(__name__)
+
+
+class JournalEntry(Base):
+    __tablename__ = 'change_journal'
+
+    id = Column(Integer, primary_key=True)  # the cursor readers resume from
+    recorded_at = Column(DateTime, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer)
+    operation = Column(String, nullable=False)  # create, update or delete
+    changes = Column(Text)  # JSON
+
+    def __repr__(self):
+        return f"<JournalEntry(id={self.id}, {self.operation} {self.entity} {self.entity_id})>"
+
+    def to_dict(self):
+        return {
+            'seq': self.id,
+            'recorded_at': self.recorded_at.isoformat(),
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'operation': self.operation,
+            'changes': json.loads(self.changes) if self.changes else {},
+        }
+
+
+def _column_values(obj):
+    state = inspect(obj)
+    return {attr.key: state.dict.get(attr.key) for attr in state.mapper.column_attrs}
+
+
+def _changed_values(obj):
+    state = inspect(obj)
+    changes = {}
+    for column_attr in state.mapper.column_attrs:
+        history = state.attrs[column_attr.key].history
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            changes[column_attr.key] = [old, new]
+    return changes
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on `path`.lock, across processes"""
+    with open(f"{path}.lock", 'ab') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _last_seq(f):
+    """Seq of the last complete line of a journal file opened in binary mode"""
+    pos = f.seek(0, os.SEEK_END)
+    tail = b''
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        tail = f.read(step) + tail
+        lines = tail.split(b'\n')
+        # The last piece is empty or a torn write; the first may be cut off
+        for line in reversed(lines[:-1] if pos == 0 else lines[1:-1]):
+            if line.strip():
+                return json.loads(line)['seq']
+    return 0
+
+
+def _drop_torn_line(f):
+    """Truncate a final line left without its newline by a crashed writer"""
+    pos = end = f.seek(0, os.SEEK_END)
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        newline = f.read(step).rfind(b'\n')
+        if newline != -1:
+            pos += newline + 1
+            break
+    if pos != end:
+        f.truncate(pos)
+
+
+def _line_at(f, pos):
+    """(offset, seq) of the first complete line starting at or after `pos`; seq is None at the end"""
+    if pos:
+        f.seek(pos - 1)
+        f.readline()  # skip the rest of the line `pos` falls in
+    else:
+        f.seek(0)
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line.endswith(b'\n'):
+            return start, None
+        if line.strip():
+            return start, json.loads(line)['seq']
+
+
+def _offset_after(f, cursor):
+    """Offset of the first line with a seq above `cursor`, by binary search"""
+    lo, hi = 0, f.seek(0, os.SEEK_END)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, seq = _line_at(f, mid)
+        if seq is None or seq > cursor:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_at(f, lo)[0]
+
+
+def _record(operation, obj, changes):
+    return {
+        'recorded_at': datetime.now(),
+        'entity': type(obj).__name__,
+        'entity_id': obj.id,
+        'operation': operation,
+        'changes': json.dumps(changes, default=str),
+    }
+
+
+class ChangeJournal:
+    """Bounded buffer plus background writer for journal records"""
+
+    def __init__(self, path=None, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_pending=DEFAULT_MAX_PENDING):
+        self.path = path  # JSONL file, or None for the change_journal table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_error = None
+        self.dropped = 0  # records given up on at shutdown
+        self._buffer = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='change-journal', daemon=True)
+        self._thread.start()
+
+    def append(self, records):
+        """Queue records, blocking while the buffer is full"""
+        for record in records:
+            self._buffer.put(record)
+
+    def stop(self):
+        """Write everything still buffered and stop the writer thread"""
+        self._stop.set()
+        self._thread.join()
+        self._drain()
+
+    def _next_batch(self, timeout):
+        try:
+            batch = [self._buffer.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    def _drain(self):
+        while True:
+            batch = self._next_batch(timeout=0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        """Write a batch, retrying with backoff; returns False if any of it was dropped"""
+        if self.path:
+            return self._retry(batch, lambda: self._write_file(batch))
+        by_tenant = {}
+        for record in batch:
+            by_tenant.setdefault(record['tenant'], []).append(record)
+        written = True
+        for tenant, records in by_tenant.items():
+            written = self._retry(records, lambda: self._write_table(tenant, records)) and written
+        return written
+
+    def _write_table(self, tenant, records):
+        from .tenants import use_tenant
+        from .write_path import run_write
+
+        rows = [{key: value for key, value in record.items() if key != 'tenant'} for record in records]
+        # The writer thread has no tenant of its own
+        with use_tenant(tenant) if tenant is not None else nullcontext():
+            # Bypass the write queue: its thread may itself be waiting on
+            # this buffer to make room
+            run_write(lambda session: session.execute(insert(JournalEntry), rows), queued=False)
+
+    def _retry(self, batch, write):
+        delay = RETRY_DELAY
+        attempts = 0
+        while True:
+            try:
+                write()
+                return True
+            except Exception as e:
+                self.last_error = e
+                attempts += 1
+                if self._stop.is_set() and attempts >= STOP_ATTEMPTS:
+                    break
+                if attempts == 1:
+                    logger.warning("Change journal write failed, retrying: %s", e)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+        self.dropped += len(batch)
+        logger.error("Change journal dropped %d records after %d attempts: %s",
+                     len(batch), attempts, self.last_error)
+        return False
+
+    def _write_file(self, batch):
+        with _file_lock(self.path), open(self.path, 'ab+') as f:
+            seq = _last_seq(f)
+            lines = []
+            for record in batch:
+                seq += 1
+                lines.append(json.dumps({
+                    'seq': seq,
+                    'tenant': record['tenant'],
+                    'recorded_at': record['recorded_at'].isoformat(),
+                    'entity': record['entity'],
+                    'entity_id': record['entity_id'],
+                    'operation': record['operation'],
+                    'changes': json.loads(record['changes']),
+                }))
+            _drop_torn_line(f)
+            f.write(("\n".join(lines) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def changes_since(self, cursor=0, limit=1000):
+        """Return (changes, next_cursor) for changes after `cursor`"""
+        if self.path:
+            changes = []
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    f.seek(_offset_after(f, cursor))
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # still being written
+                        if line.strip():
+                            changes.append(json.loads(line))
+                            if len(changes) >= limit:
+                                break
+        else:
+            session = SESSION()
+            try:
+                entries = session.query(JournalEntry).filter(
+                    JournalEntry.id > cursor
+                ).order_by(JournalEntry.id).limit(limit).all()
+                changes = [entry.to_dict() for entry in entries]
+            finally:
+                session.close()
+
+        next_cursor = changes[-1]['seq'] if changes else cursor
+        return changes, next_cursor
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Return the process-wide journal, starting it on first use.
+
+    Set EVENT_PLANNER_JOURNAL to a .jsonl path to journal to a file instead
+    of the change_journal table.
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = ChangeJournal(path=os.environ.get('EVENT_PLANNER_JOURNAL') or None)
+        return _journal
+
+
+def stop_journal():
+    """Flush and stop the process-wide journal"""
+    global _journal
+    with _journal_lock:
+        journal, _journal = _journal, None
+    if journal is not None:
+        journal.stop()
+
+
+def changes_since(cursor=0, limit=1000):
+    """Return (changes, next_cursor) from the process-wide journal"""
+    return get_journal().changes_since(cursor, limit)
+
+
+atexit.register(stop_journal)
+
+
+@event.listens_for(Session, 'after_flush')
+def _capture_changes(session, flush_context):
+    records = session.info.setdefault('journal_records', [])
+    for obj in session.new:
+        if isinstance(obj, TRACKED_MODELS):
+            records.append(_record('create', obj, _column_values(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED_MODELS):
+            changes = _changed_values(obj)
+            if changes:
+                records.append(_record('update', obj, changes))
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED_MODELS):
+            records.append(_record('delete', obj, _column_values(obj)))
+
+
+def journal_inserted(session, entity, rows):
+    """Journal rows the session created with Core INSERT ... SELECT statements.
+
+    The flush hook only sees ORM objects. `rows` are mappings of column
+    values including 'id'; they're published with the session's other
+    changes when it commits.
+    """
+    records = session.info.setdefault('journal_records', [])
+    recorded_at = datetime.now()
+    records.extend({
+        'recorded_at': recorded_at,
+        'entity': entity,
+        'entity_id': row['id'],
+        'operation': 'create',
+        'changes': json.dumps(dict(row), default=str),
+    } for row in rows)
+
+
+def journal_updated(session, entity, changes):
+    """Journal rows the session changed with Core UPDATE statements.
+
+    `changes` maps each row's ID to {column: [old, new]}, the same shape
+    the flush hook records for ORM updates.
+    """
+    records = session.info.setdefault('journal_records', [])
+    recorded_at = datetime.now()
+    records.extend({
+        'recorded_at': recorded_at,
+        'entity': entity,
+        'entity_id': entity_id,
+        'operation': 'update',
+        'changes': json.dumps(values, default=str),
+    } for entity_id, values in changes.items())
+
+
+@event.listens_for(Session, 'after_transaction_create')
+def _mark_savepoint(session, transaction):
+    # Remember where a savepoint started so rolling it back drops only
+    # the changes made inside it
+    if transaction.nested:
+        marks = session.info.setdefault('journal_marks', {})
+        marks[transaction] = len(session.info.get('journal_records', []))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_savepoint_changes(session, previous_transaction):
+    mark = session.info.get('journal_marks', {}).pop(previous_transaction, None)
+    if mark is not None:
+        del session.info.get('journal_records', [])[mark:]
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _end_transaction(session, transaction):
+    session.info.get('journal_marks', {}).pop(transaction, None)
+    # Publish only once the outermost transaction has handed its connection
+    # back: append() may block, and the write pool has a single connection
+    if transaction.parent is None:
+        records = session.info.pop('journal_committed', None)
+        if records:
+            get_journal().append(records)
+
+
+@event.listens_for(Session, 'after_commit')
+def _commit_changes(session):
+    records = session.info.pop('journal_records', None)
+    if records:
+        # The writer thread puts each record in its session's tenant database
+        tenant = getattr(session, 'tenant', None)
+        for record in records:
+            record['tenant'] = tenant
+        session.info.setdefault('journal_committed', []).extend(records)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('journal_records', None)
+    session.info.pop('journal_marks', None)
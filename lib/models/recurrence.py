@@ -0,0 +1,93 @@
+"""
+Recurring schedules for event series.
+
+Schedules use a small subset of iCalendar RRULE syntax:
+
+    FREQ=WEEKLY;COUNT=52
+    FREQ=MONTHLY;INTERVAL=3;UNTIL=2031-12-31
+    FREQ=DAILY;INTERVAL=2;COUNT=10
+
+FREQ is DAILY, WEEKLY, MONTHLY or YEARLY; INTERVAL defaults to 1; one of
+COUNT or UNTIL is required. Every occurrence keeps the start's time of day.
+Monthly and yearly occurrences keep the start's day of the month, moved back
+to the month's last day where it doesn't exist (e.g. 31 -> 30 April).
+"""
+
+import calendar
+from datetime import datetime, timedelta
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+MAX_OCCURRENCES = 1000
+
+
+def parse_schedule(text):
+    """Parse an RRULE-style string into a dict, raising ValueError if it's invalid"""
+    parts = {}
+    for part in text.strip().upper().split(';'):
+        if not part:
+            continue
+        key, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValueError(f"Invalid schedule part {part!r}; expected KEY=VALUE")
+        parts[key] = value
+
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL'}
+    if unknown:
+        raise ValueError(f"Unsupported schedule field(s): {', '.join(sorted(unknown))}")
+    if parts.get('FREQ') not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of: {list(FREQUENCIES)}")
+    if 'COUNT' not in parts and 'UNTIL' not in parts:
+        raise ValueError("Schedule needs COUNT or UNTIL")
+
+    schedule = {'freq': parts['FREQ'], 'interval': 1, 'count': None, 'until': None}
+    for key in ('INTERVAL', 'COUNT'):
+        if key in parts:
+            if not parts[key].isdigit() or int(parts[key]) < 1:
+                raise ValueError(f"{key} must be a positive integer")
+            schedule[key.lower()] = int(parts[key])
+    if 'UNTIL' in parts:
+        try:
+            until = datetime.fromisoformat(parts['UNTIL'])
+        except ValueError:
+            raise ValueError("UNTIL must be a date like 2031-12-31")
+        if len(parts['UNTIL']) <= 10:
+            until = until.replace(hour=23, minute=59, second=59)  # a bare date includes that day
+        schedule['until'] = until
+    return schedule
+
+
+def _add_months(start, months):
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day)
+
+
+def _nth(start, freq, steps):
+    if freq == 'DAILY':
+        return start + timedelta(days=steps)
+    if freq == 'WEEKLY':
+        return start + timedelta(weeks=steps)
+    return _add_months(start, steps if freq == 'MONTHLY' else steps * 12)
+
+
+def occurrences(schedule, start, include_start=True):
+    """List the datetimes of a schedule (a string or parse_schedule() dict)
+
+    With include_start=False the series begins one interval after `start`,
+    which is how a series continues on from a template event.
+    """
+    if isinstance(schedule, str):
+        schedule = parse_schedule(schedule)
+
+    dates = []
+    step = 0 if include_start else 1
+    while schedule['count'] is None or len(dates) < schedule['count']:
+        date = _nth(start, schedule['freq'], step * schedule['interval'])
+        if schedule['until'] is not None and date > schedule['until']:
+            break
+        if len(dates) == MAX_OCCURRENCES:
+            raise ValueError(f"Schedule produces more than {MAX_OCCURRENCES} occurrences")
+        dates.append(date)
+        step += 1
+    return dates
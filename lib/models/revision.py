@@ -0,0 +1,63 @@
+"""
+Event revision tracking.
+
+Every flush that creates, changes or deletes an event's attendees or
+activities, or changes the event itself, bumps events.revision in the same
+transaction. Anything derived from an event (such as a rendered report)
+can then be cached under (event_id, revision) and never go stale. Write
+batches collect the touched events instead and bump each one once, just
+before committing.
+"""
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+
+from .event import Event
+from .attendee import Attendee
+from .activity import Activity
+
+
+def _touched_event_ids(session):
+    event_ids = set()
+    for obj in session.dirty:
+        if isinstance(obj, Event) and session.is_modified(obj):
+            event_ids.add(obj.id)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Attendee, Activity)):
+            history = inspect(obj).attrs.event_id.history
+            event_ids.update(history.added or history.unchanged or ())
+            event_ids.update(history.deleted or ())
+    # Deleted events have nothing left to cache
+    event_ids.difference_update(obj.id for obj in session.deleted if isinstance(obj, Event))
+    event_ids.discard(None)
+    return event_ids
+
+
+def bump_revisions(connection, event_ids):
+    """Increment the revision of each event in `event_ids`"""
+    if event_ids:
+        events = Event.__table__
+        connection.execute(
+            update(events)
+            .where(events.c.id.in_(sorted(event_ids)))
+            .values(revision=events.c.revision + 1)
+        )
+
+
+def touch_events(session, event_ids):
+    """Bump the revision of each event in `event_ids` as a flush would.
+
+    For rows the session changed with Core statements, which the flush
+    hook doesn't see.
+    """
+    deferred = session.info.get('deferred_revisions')
+    if deferred is not None:
+        # A write batch bumps each touched event once, just before it commits
+        deferred.update(event_ids)
+        return
+    bump_revisions(session.connection(), event_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_touched_events(session, flush_context):
+    touch_events(session, _touched_event_ids(session))
@@ -0,0 +1,124 @@
+"""
+Startup schema upgrade.
+
+create_all() creates missing tables but never alters one that exists, so
+a database made by an older release lacks the columns and indexes added
+since. upgrade_schema() compares each table with the models, adds missing
+columns with ALTER TABLE ADD COLUMN (SQLite fills existing rows with the
+column's default), runs a backfill for columns whose old rows need a
+computed value, fills new tables that are derived from existing ones, and
+creates missing indexes.
+
+It runs in one BEGIN IMMEDIATE transaction on the write engine. SQLite DDL
+is transactional, so an upgrade either completes or leaves the file as it
+was, and processes starting at the same time upgrade it only once.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def _default_sql(column):
+    """SQL literal for the column's default, or None if it has none"""
+    if column.server_default is not None:
+        value = column.server_default.arg
+        return f"'{value}'" if isinstance(value, str) else str(value.text)
+    if column.default is not None and column.default.is_scalar:
+        value = column.default.arg
+        if isinstance(value, bool):
+            return str(int(value))
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+    return None
+
+
+def _column_ddl(column, dialect):
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    default = _default_sql(column)
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+
+def _count_registered_sign_ups(conn):
+    conn.execute(text(
+        "UPDATE activities SET signed_up = ("
+        "SELECT count(*) FROM activity_signups "
+        "WHERE activity_signups.activity_id = activities.id AND activity_signups.status = 'Registered')"
+    ))
+
+
+def _fill_event_columns(conn):
+    from .event import fill_derived_columns
+
+    fill_derived_columns(conn)
+
+
+def _index_attendees(conn):
+    from .attendee_search import rebuild_trigram_index
+
+    rebuild_trigram_index(Session(bind=conn))
+
+
+# Columns whose existing rows need more than the column default, keyed by
+# (table, column), and new tables that derive their rows from older ones
+BACKFILLS = {
+    ('activities', 'signed_up'): _count_registered_sign_ups,
+    ('events', 'venue'): _fill_event_columns,
+    ('events', 'ends_at'): _fill_event_columns,
+    ('events', 'uid'): _fill_event_columns,
+    ('attendee_trigrams', None): _index_attendees,
+}
+
+
+def upgrade_schema(engine=None):
+    """Bring the database up to the models' schema; returns what was added.
+
+    `engine` should be a write engine (its transactions begin IMMEDIATE);
+    it defaults to the current tenant's. Returns names like
+    'activity_signups', 'events.duration' and 'ix_events_date' for the
+    tables, columns and indexes added to an existing file; empty when it
+    was already current.
+    """
+    from . import Base, current_engines
+
+    engine = engine if engine is not None else current_engines()[1]
+    added = []
+    with engine.begin() as conn:
+        tables = {name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        Base.metadata.create_all(conn)
+        for table in Base.metadata.sorted_tables:
+            if table.name in tables or not tables:
+                continue
+            backfill = BACKFILLS.get((table.name, None))
+            if backfill is not None:
+                backfill(conn)
+            added.append(table.name)
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+            backfills = []
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and _default_sql(column) is None:
+                    raise RuntimeError(f"Can't add {table.name}.{column.name}: NOT NULL without a default")
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, conn.dialect)}")
+                backfill = BACKFILLS.get((table.name, column.name))
+                if backfill is not None and backfill not in backfills:
+                    backfills.append(backfill)
+                added.append(f"{table.name}.{column.name}")
+            # Once all of the table's new columns exist
+            for backfill in backfills:
+                backfill(conn)
+
+        indexes = {name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    added.append(index.name)
+    return added
@@ -0,0 +1,33 @@
+"""
+Memory-bounded iteration over query results.
+
+stream() runs a statement with yield_per, so rows are fetched from the
+SQLite cursor `batch_size` at a time instead of all at once, and empties
+the session after each batch. Objects come out detached with their
+columns loaded; relationships aren't, so a full-table pass holds at most
+one batch plus whatever the caller keeps.
+
+The generator keeps one pooled read connection until it is exhausted or
+closed, so consume it from one thread and don't abandon it half-way
+without calling close().
+"""
+
+from . import SESSION
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def stream(statement, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the ORM objects `statement` selects, loading `batch_size` at a time"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    session = SESSION()
+    try:
+        result = session.execute(statement.execution_options(yield_per=batch_size), params or {})
+        for batch in result.scalars().partitions():
+            # Detach the batch so the identity map never holds more than one
+            for obj in batch:
+                session.expunge(obj)
+            yield from batch
+    finally:
+        session.close()
@@ -0,0 +1,167 @@
+"""
+One SQLite database per organization.
+
+Each tenant (client organization) keeps its data in its own file under
+TENANT_DIR, so its queries only ever read its own pages and its writers
+only queue behind its own writers. TenantRouter opens a tenant's (read,
+write) engine pair on first use, creating or upgrading its schema,
+and keeps at most MAX_OPEN_TENANTS pairs open, disposing the least
+recently used. Sessions opened on an evicted pair keep working; their
+connections are simply not pooled again.
+
+The current tenant is chosen per context: use_tenant() sets it for a block
+on the calling thread, set_tenant() (or EVENT_PLANNER_TENANT) for the
+whole process. SESSION and WRITE_SESSION bind to the tenant current when
+the session is created, and to the shared DATABASE_URL database when no
+tenant is selected. fan_out() runs a function once per tenant on a thread
+pool for admin queries across every organization; pysqlite releases the
+GIL while SQLite works, so the shards are queried in parallel.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.orm import Session
+
+from . import ENGINE, WRITE_ENGINE, create_engines
+
+TENANT_DIR = os.environ.get('EVENT_PLANNER_TENANT_DIR', 'tenants')
+MAX_OPEN_TENANTS = int(os.environ.get('EVENT_PLANNER_MAX_OPEN_TENANTS', '8'))
+# Tenant names become file names, so keep them to a safe alphabet
+TENANT_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+_context_tenant = ContextVar('tenant', default=None)
+_process_tenant = os.environ.get('EVENT_PLANNER_TENANT') or None
+
+
+def validate_tenant(name):
+    """Return `name` if it can be used as a tenant name, else raise ValueError"""
+    if not isinstance(name, str) or not TENANT_NAME.match(name):
+        raise ValueError("Organization names must be 1-64 letters, digits, '-' or '_', "
+                         "starting with a letter or digit")
+    return name
+
+
+class TenantRouter:
+    """Maps tenant names to lazily opened, LRU-evicted engine pairs"""
+
+    def __init__(self, directory=TENANT_DIR, max_open=MAX_OPEN_TENANTS):
+        self.directory = directory
+        self.max_open = max_open
+        self._engines = OrderedDict()  # tenant -> (read_engine, write_engine)
+        self._lock = threading.Lock()
+
+    def path(self, tenant):
+        """Database file of a tenant"""
+        return os.path.join(self.directory, f"{validate_tenant(tenant)}.db")
+
+    def tenants(self):
+        """Names of every tenant with a database file, sorted"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-3] for name in names if name.endswith('.db') and TENANT_NAME.match(name[:-3]))
+
+    def engines(self, tenant):
+        """Return the tenant's (read, write) engines, opening them if needed"""
+        with self._lock:
+            pair = self._engines.get(tenant)
+            if pair is not None:
+                self._engines.move_to_end(tenant)
+                return pair
+
+            from .schema import upgrade_schema
+
+            path = self.path(tenant)
+            os.makedirs(self.directory, exist_ok=True)
+            pair = create_engines(f"sqlite:///{path}")
+            upgrade_schema(pair[1])
+            self._engines[tenant] = pair
+            while len(self._engines) > self.max_open:
+                _, evicted = self._engines.popitem(last=False)
+                for engine in evicted:
+                    engine.dispose()
+            return pair
+
+    def open_tenants(self):
+        """Tenants with open engines, least recently used first"""
+        with self._lock:
+            return list(self._engines)
+
+    def dispose(self, tenant=None):
+        """Close the pooled connections of one tenant, or of every open tenant"""
+        with self._lock:
+            tenants = list(self._engines) if tenant is None else [tenant]
+            for name in tenants:
+                for engine in self._engines.pop(name, ()):
+                    engine.dispose()
+
+
+ROUTER = TenantRouter()
+
+
+def current_tenant():
+    """The tenant sessions created now will use, or None for the shared database"""
+    return _context_tenant.get() or _process_tenant
+
+
+def set_tenant(tenant):
+    """Select the tenant for the whole process (None for the shared database)"""
+    global _process_tenant
+    _process_tenant = None if tenant is None else validate_tenant(tenant)
+
+
+@contextmanager
+def use_tenant(tenant):
+    """Select a tenant for the duration of a block on the calling thread"""
+    token = _context_tenant.set(validate_tenant(tenant))
+    try:
+        yield tenant
+    finally:
+        _context_tenant.reset(token)
+
+
+def current_engines():
+    """The (read, write) engines of the current tenant"""
+    tenant = current_tenant()
+    if tenant is None:
+        return ENGINE, WRITE_ENGINE
+    return ROUTER.engines(tenant)
+
+
+class TenantSession(Session):
+    """Session bound to the tenant that was current when it was created"""
+
+    def __init__(self, write=False, **kwargs):
+        super().__init__(**kwargs)
+        self.tenant = current_tenant()
+        if self.tenant is not None:
+            self.bind = ROUTER.engines(self.tenant)[1 if write else 0]
+
+
+def fan_out(func, tenants=None, max_workers=None):
+    """Call func() once per tenant in parallel and return {tenant: result}.
+
+    Each call runs under use_tenant(), so the model methods it uses read
+    that tenant's database. `tenants` defaults to every tenant on disk;
+    by default no more run at once than the router keeps open, so a call
+    never has its engines evicted by its neighbours. The first exception
+    raised by a call is re-raised.
+    """
+    tenants = ROUTER.tenants() if tenants is None else list(tenants)
+    if not tenants:
+        return {}
+    max_workers = max_workers or min(len(tenants), ROUTER.max_open)
+
+    def run(tenant):
+        with use_tenant(tenant):
+            return func()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tenant-fan-out') as pool:
+        return dict(zip(tenants, pool.map(run, tenants)))
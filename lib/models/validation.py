@@ -0,0 +1,134 @@
+"""
+Field validation shared by every model.
+
+Each model has a table of precompiled rules, one per field. A rule checks a
+value and returns it normalized (e.g. stripped names, lower-cased emails),
+or raises ValueError with a user-facing message. validate_fields() is used
+by the model constructors; validate_rows() checks many candidate rows at
+once and reports every problem instead of stopping at the first.
+"""
+
+import re
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+RSVP_STATUSES = ['Pending', 'Confirmed', 'Declined']
+EVENT_STATUSES = ['Planning', 'Active', 'Completed', 'Cancelled']
+
+
+class ValidationError(ValueError):
+    """Raised when one or more rows fail validation.
+
+    `errors` is a list of {'row', 'field', 'message'} dicts.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        first = errors[0]
+        more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+        super().__init__(f"Row {first['row']}: {first['message']}{more}")
+
+
+# Rule builders
+def non_empty_string(message):
+    def rule(value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(message)
+        return value.strip()
+    return rule
+
+
+def email(value):
+    if not isinstance(value, str) or not EMAIL_PATTERN.match(value.strip()):
+        raise ValueError("Invalid email format")
+    return value.strip().lower()
+
+
+def one_of(choices, message):
+    allowed = frozenset(choices)
+    def rule(value):
+        if value not in allowed:
+            raise ValueError(message)
+        return value
+    return rule
+
+
+def non_negative_money(label):
+    def rule(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{label} must be a number")
+        if value < 0:
+            raise ValueError(f"{label} cannot be negative")
+        return float(value)
+    return rule
+
+
+def positive_int(message, optional=False):
+    def rule(value):
+        if value is None and optional:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(message)
+        return value
+    return rule
+
+
+RULES = {
+    'Event': {
+        'name': non_empty_string("Event name must be a non-empty string"),
+        'location': non_empty_string("Event location must be a non-empty string"),
+        'budget': non_negative_money("Budget"),
+        'duration': positive_int("Duration must be a positive integer (minutes)", optional=True),
+        'status': one_of(EVENT_STATUSES, f"Status must be one of: {EVENT_STATUSES}"),
+    },
+    'Attendee': {
+        'name': non_empty_string("Attendee name must be a non-empty string"),
+        'email': email,
+        'rsvp_status': one_of(RSVP_STATUSES, f"RSVP status must be one of: {RSVP_STATUSES}"),
+    },
+    'Activity': {
+        'name': non_empty_string("Activity name must be a non-empty string"),
+        'duration': positive_int("Duration must be a positive integer (minutes)"),
+        'cost': non_negative_money("Cost"),
+        'max_participants': positive_int("Max participants must be a positive integer or None", optional=True),
+    },
+}
+
+
+def validate_field(model, field, value):
+    """Validate and normalize one field value"""
+    rule = RULES[model].get(field)
+    return rule(value) if rule else value
+
+
+def validate_fields(model, values):
+    """Validate and normalize a dict of field values, raising ValueError on the first problem"""
+    rules = RULES[model]
+    return {key: rules[key](value) if key in rules else value for key, value in values.items()}
+
+
+def validate_rows(model, rows):
+    """Validate many candidate rows at once.
+
+    Returns (valid_rows, errors): the normalized rows that passed, and a
+    list of {'row', 'field', 'message'} dicts for every failing field,
+    where 'row' is the row's index in `rows`.
+    """
+    rules = RULES[model]
+    valid_rows = []
+    errors = []
+    for index, values in enumerate(rows):
+        normalized = {}
+        row_ok = True
+        for key, value in values.items():
+            rule = rules.get(key)
+            if rule is None:
+                normalized[key] = value
+                continue
+            try:
+                normalized[key] = rule(value)
+            except ValueError as e:
+                errors.append({'row': index, 'field': key, 'message': str(e)})
+                row_ok = False
+        if row_ok:
+            valid_rows.append(normalized)
+    return valid_rows, errors
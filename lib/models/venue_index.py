@@ -0,0 +1,73 @@
+"""
+Venue double-booking checks.
+
+Each event row stores its normalized location (`venue`) and the time it
+releases the venue (`ends_at`), both kept up to date by the Event model.
+The ix_events_venue_ends_at index on (venue, ends_at) lets "who is booked
+at this venue between start and end?" be answered with a range scan of
+that venue's bookings ending after `start`. Event.create() and update()
+run the check inside their BEGIN IMMEDIATE write transaction, so no other
+process or thread can book the venue between the check and the commit.
+"""
+
+from datetime import timedelta
+
+DEFAULT_EVENT_DURATION = 240  # in minutes
+
+
+class VenueConflictError(ValueError):
+    """Raised when an event would double-book a venue"""
+
+    def __init__(self, location, clashes):
+        self.location = location
+        self.clashes = clashes
+        names = ", ".join(f"'{name}' (ID: {event_id})" for event_id, name in clashes)
+        super().__init__(f"Venue '{location}' is already booked in that window by {names}")
+
+
+def normalize_location(location):
+    """Normalize a location so trivial spelling differences share a key"""
+    return " ".join(location.casefold().replace(",", " ").replace(".", " ").split())
+
+
+def booking_window(date, duration):
+    """Return the (start, end) datetimes an event occupies its venue"""
+    return date, date + timedelta(minutes=duration or DEFAULT_EVENT_DURATION)
+
+
+def find_venue_clashes(session):
+    """List every pair of overlapping bookings at the same venue.
+
+    Events are sorted by (venue, start) once, then swept while keeping only
+    the bookings still running at the current start time.
+    """
+    from .event import Event
+
+    rows = session.query(
+        Event.id, Event.name, Event.location, Event.date, Event.duration
+    ).filter(Event.status != 'Cancelled').all()
+
+    bookings = sorted(
+        (normalize_location(location), *booking_window(date, duration), event_id, name, location)
+        for event_id, name, location, date, duration in rows
+    )
+
+    clashes = []
+    current_venue = None
+    running = []
+    for venue, start, end, event_id, name, location in bookings:
+        if venue != current_venue:
+            current_venue = venue
+            running = []
+        running = [b for b in running if b[1] > start]
+        for other in running:
+            clashes.append({
+                'location': location,
+                'first': (other[2], other[3]),
+                'second': (event_id, name),
+                'overlap_start': start,
+                'overlap_end': min(other[1], end),
+            })
+        running.append((start, end, event_id, name))
+
+    return clashes
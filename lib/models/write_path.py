@@ -0,0 +1,336 @@
+"""
+Write path shared by every model method that changes the database.
+
+run_write() runs a unit of work in a BEGIN IMMEDIATE transaction and
+retries it with jittered exponential backoff while SQLite reports the
+database as busy. When the write queue is enabled, units of work are
+instead handed to a single writer thread that commits whatever has queued
+up in one transaction per tenant, with a savepoint around each unit so one
+failure doesn't undo its neighbours. Each unit runs under the tenant that
+was current when it was queued, since the writer thread has none of its own.
+
+Edits to existing rows go through update_versioned(), a compare-and-swap on
+the row's version_id: the update only applies if nobody else has changed
+the row since the caller read it, and raises UpdateConflictError otherwise.
+
+Inside a write_batch() block, run_write() calls on that thread instead share
+the block's single transaction, each in its own savepoint, and nothing is
+committed until the block ends.
+"""
+
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import WRITE_SESSION
+from .tenants import current_tenant, use_tenant
+
+MAX_RETRIES = 8
+BASE_DELAY = 0.01  # seconds
+MAX_DELAY = 1.0    # seconds
+MAX_GROUP_SIZE = 100
+
+
+class WriteConflictError(RuntimeError):
+    """Raised when a write still finds the database busy after every retry"""
+
+
+class UpdateConflictError(RuntimeError):
+    """Raised when a row was changed or deleted since the caller read it"""
+
+    def __init__(self, message, entity=None, entity_id=None, current_version=None):
+        super().__init__(message)
+        self.entity = entity
+        self.entity_id = entity_id
+        self.current_version = current_version
+
+
+def _as_conflict(error):
+    # The ORM's own version check failed at flush time
+    if isinstance(error, StaleDataError):
+        conflict = UpdateConflictError("The record was changed by someone else since it was read")
+        conflict.__cause__ = error
+        return conflict
+    return error
+
+
+def is_busy_error(error):
+    """Return True if an exception means the database was locked or busy"""
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig if error.orig is not None else error).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Full-jitter exponential backoff for the given retry attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def run_write(work, retries=MAX_RETRIES, queued=True):
+    """Run `work(session)` in its own write transaction and return its result.
+
+    `work` may be called more than once, so it must only touch the session
+    it is given. Objects it returns stay usable after the session closes.
+    Pass queued=False to bypass the write queue even when it is enabled.
+    """
+    batch = getattr(_batch, 'current', None)
+    if batch is not None:
+        return batch.run(work)
+
+    writer = _write_queue
+    if queued and writer is not None and not writer.is_writer_thread():
+        return writer.submit(work).result()
+
+    for attempt in range(retries + 1):
+        session = WRITE_SESSION()
+        try:
+            result = work(session)
+            session.commit()
+            return result
+        except OperationalError as e:
+            session.rollback()
+            if not is_busy_error(e):
+                raise
+            if attempt == retries:
+                raise WriteConflictError(f"Database still busy after {retries} retries") from e
+            time.sleep(backoff_delay(attempt))
+        except StaleDataError as e:
+            session.rollback()
+            raise _as_conflict(e) from e
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class WriteBatch:
+    """One open write transaction shared by every run_write() on its thread"""
+
+    def __init__(self, session):
+        self.session = session
+        self.rollback_only = False  # set to discard everything at the end
+        # Callers that wrap a group of units in their own savepoint (and can
+        # redo the group if one fails) may turn the per-unit savepoints off
+        self.savepoint_per_unit = True
+
+    def run(self, work):
+        if not self.savepoint_per_unit:
+            return work(self.session)
+        savepoint = self.session.begin_nested()
+        try:
+            result = work(self.session)
+            savepoint.commit()
+            return result
+        except StaleDataError as e:
+            savepoint.rollback()
+            raise _as_conflict(e) from e
+        except Exception:
+            savepoint.rollback()
+            raise
+
+
+_batch = threading.local()
+
+
+@contextmanager
+def write_batch(retries=MAX_RETRIES):
+    """Run every run_write() on this thread in one transaction.
+
+    Yields a WriteBatch. Each unit of work gets a savepoint, so a failing
+    model call undoes only its own changes. The transaction commits when
+    the block exits normally, and rolls back if it raises or the batch's
+    rollback_only flag is set.
+    """
+    if getattr(_batch, 'current', None) is not None:
+        raise RuntimeError("write_batch() blocks cannot be nested")
+
+    session = WRITE_SESSION()
+    try:
+        for attempt in range(retries + 1):
+            try:
+                session.connection()  # BEGIN IMMEDIATE: take the write lock up front
+                break
+            except OperationalError as e:
+                session.rollback()
+                if not is_busy_error(e):
+                    raise
+                if attempt == retries:
+                    raise WriteConflictError(f"Database still busy after {retries} retries") from e
+                time.sleep(backoff_delay(attempt))
+
+        batch = _batch.current = WriteBatch(session)
+        session.info['deferred_revisions'] = set()
+        committed = False
+        try:
+            yield batch
+            if not batch.rollback_only:
+                from .revision import bump_revisions
+                session.flush()
+                bump_revisions(session.connection(), session.info.pop('deferred_revisions'))
+                session.commit()
+                committed = True
+        finally:
+            _batch.current = None
+            session.info.pop('deferred_revisions', None)
+            if not committed:
+                session.rollback()
+    finally:
+        session.close()
+
+
+def update_versioned(model, obj_id, expected_version, changes, check=None):
+    """Apply `changes` to a row only if its version_id is still `expected_version`.
+
+    `check(session, current)` may inspect the current row and raise to veto
+    the update. Returns the updated, detached object, whose version_id has
+    moved on. Raises UpdateConflictError if the row changed or disappeared.
+    """
+    name = model.__name__
+
+    def _update(session):
+        current = session.get(model, obj_id)
+        if current is None:
+            raise UpdateConflictError(f"{name} with ID {obj_id} was deleted by someone else",
+                                      name, obj_id)
+        if current.version_id != expected_version:
+            raise UpdateConflictError(f"{name} with ID {obj_id} was changed by someone else",
+                                      name, obj_id, current.version_id)
+        if check is not None:
+            check(session, current)
+        # When flushed, the UPDATE is issued as "... WHERE id = ? AND
+        # version_id = ?", so the swap stays safe even without the write lock
+        for key, value in changes.items():
+            setattr(current, key, value)
+        return current
+
+    return run_write(_update)
+
+
+class WriteQueue:
+    """Single writer thread that groups queued writes into one transaction per tenant"""
+
+    def __init__(self, max_group_size=MAX_GROUP_SIZE):
+        self.max_group_size = max_group_size
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+        self._thread.start()
+
+    def is_writer_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, work):
+        """Queue `work(session)` for the current tenant and return a Future for its result"""
+        future = Future()
+        self._jobs.put((work, future, current_tenant()))
+        return future
+
+    def stop(self):
+        """Finish queued writes and stop the writer thread"""
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _next_group(self):
+        job = self._jobs.get()
+        if job is None:
+            return None
+        group = [job]
+        while len(group) < self.max_group_size:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)
+                break
+            group.append(job)
+        return group
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+            if group is None:
+                return
+            by_tenant = {}
+            for work, future, tenant in group:
+                by_tenant.setdefault(tenant, []).append((work, future))
+            for tenant, jobs in by_tenant.items():
+                with use_tenant(tenant) if tenant is not None else nullcontext():
+                    self._commit_group(jobs)
+
+    def _commit_group(self, group):
+        pending = [job for job in group if job[1].set_running_or_notify_cancel()]
+
+        for attempt in range(MAX_RETRIES + 1):
+            results = []
+            session = WRITE_SESSION()
+            try:
+                for work, future in pending:
+                    savepoint = session.begin_nested()
+                    try:
+                        results.append((future, work(session), None))
+                        savepoint.commit()
+                    except OperationalError as e:
+                        if is_busy_error(e):
+                            raise
+                        savepoint.rollback()
+                        results.append((future, None, e))
+                    except Exception as e:
+                        savepoint.rollback()
+                        results.append((future, None, _as_conflict(e)))
+                session.commit()
+                break
+            except OperationalError as e:
+                session.rollback()
+                if not is_busy_error(e) or attempt == MAX_RETRIES:
+                    for _, future in pending:
+                        future.set_exception(e)
+                    return
+                time.sleep(backoff_delay(attempt))
+            except Exception as e:
+                session.rollback()
+                for _, future in pending:
+                    future.set_exception(e)
+                return
+            finally:
+                session.close()
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def enable_write_queue(max_group_size=MAX_GROUP_SIZE):
+    """Route every run_write() call through one writer thread"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue(max_group_size)
+        return _write_queue
+
+
+def disable_write_queue():
+    """Drain the writer thread and go back to writing from the caller's thread"""
+    global _write_queue
+    with _write_queue_lock:
+        writer, _write_queue = _write_queue, None
+    if writer is not None:
+        writer.stop()
+
+
+if os.environ.get('EVENT_PLANNER_WRITE_QUEUE') == '1':
+    enable_write_queue()
@@ -0,0 +1,154 @@
+"""
+Opt-in CPU and memory profiling of CLI actions.
+
+When profiling is on, every menu action dispatched by cli.py runs under
+cProfile and tracemalloc. Each run writes three files to the profile
+directory, named <timestamp>-<action>:
+
+    .pstats   cProfile stats, for `python -m pstats` or snakeviz
+    .folded   collapsed stacks in microseconds, for flamegraph.pl or speedscope
+    .mem.txt  tracemalloc peak and the top allocating lines
+
+A one-line summary is printed after the action. Turn profiling on with
+EVENT_PLANNER_PROFILE=1 (0 forces it off), or persistently with the toggle
+in debug.py. Files go to EVENT_PLANNER_PROFILE_DIR (default ./profiles).
+
+cProfile only records caller/callee pairs, not whole stacks, so the
+collapsed stacks split each function's time between its callers in
+proportion to how much time each caller spent in it.
+"""
+
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get('EVENT_PLANNER_PROFILE_DIR', 'profiles')
+TOGGLE_FILE = os.path.join(PROFILE_DIR, '.enabled')  # written by debug.py's toggle
+TOP_ALLOCATIONS = 15
+TRACEMALLOC_FRAMES = 10
+MAX_STACK_DEPTH = 100
+
+
+def profiling_enabled():
+    """True if EVENT_PLANNER_PROFILE says so, or else if the debug.py toggle is on"""
+    setting = os.environ.get('EVENT_PLANNER_PROFILE')
+    if setting is not None:
+        return setting not in ('', '0')
+    return os.path.exists(TOGGLE_FILE)
+
+
+def set_profiling(enabled):
+    """Persistently turn action profiling on or off (the env var still wins)"""
+    if enabled:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(TOGGLE_FILE, 'w'):
+            pass
+    elif os.path.exists(TOGGLE_FILE):
+        os.remove(TOGGLE_FILE)
+
+
+def profile_action(action):
+    """Run a CLI action, profiling it if profiling is enabled"""
+    if not profiling_enabled():
+        return action()
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    elif hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        # Python 3.8 has no reset_peak(); restarting clears the peak (and the traces)
+        frames = tracemalloc.get_traceback_limit()
+        tracemalloc.stop()
+        tracemalloc.start(frames)
+    profiler = cProfile.Profile()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        profiler.enable()
+        return action()
+    finally:
+        profiler.disable()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        if started_tracing:
+            tracemalloc.stop()
+        try:
+            print(_write_profile(action.__name__, profiler, snapshot, peak, wall, cpu))
+        except Exception as e:
+            print(f"\n❌ Error writing profile: {e}")
+
+
+def _write_profile(name, profiler, snapshot, peak, wall, cpu):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{name}")
+
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(base + '.pstats')
+
+    with open(base + '.folded', 'w') as f:
+        for stack, micros in sorted(collapsed_stacks(stats).items()):
+            f.write(f"{stack} {micros}\n")
+
+    top = snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    with open(base + '.mem.txt', 'w') as f:
+        f.write(f"Peak traced memory: {_megabytes(peak)}\n\n")
+        f.write(f"Top {len(top)} allocating lines still held at the end of the action:\n")
+        for stat in top:
+            f.write(f"{stat}\n")
+
+    return (f"⏱️  {name}: {wall:.3f}s wall, {cpu:.3f}s CPU, {stats.total_calls:,} calls, "
+            f"peak {_megabytes(peak)} → {base}.*")
+
+
+def _megabytes(size):
+    return f"{size / 1e6:.1f} MB"
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == '~':  # built-in
+        label = name.strip('<>')
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(';', ',')  # ';' separates frames
+
+
+def collapsed_stacks(stats):
+    """Turn pstats data into {'root;caller;callee': microseconds} of self time"""
+    entries = stats.stats  # func -> (prim calls, calls, self time, cumulative, {caller: edge})
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+
+    stacks = Counter()
+
+    def walk(func, path, share):
+        # `share` is the fraction of func's total time reached through `path`
+        _, _, self_time, cumulative, _ = entries[func]
+        micros = int(self_time * share * 1e6)
+        if micros:
+            stacks[';'.join(path)] += micros
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, (_, _, _, edge_cumulative) in callees[func].items():
+            callee_cumulative = entries[callee][3]
+            if not callee_cumulative or _frame_label(callee) in path:
+                continue  # no time to split, or recursion
+            callee_share = share * edge_cumulative / callee_cumulative
+            if edge_cumulative * share >= 1e-6:
+                walk(callee, path + [_frame_label(callee)], callee_share)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, [_frame_label(func)], 1.0)
+    return stacks
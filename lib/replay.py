@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+
+"""
+Replay a prepared batch of operations in one transaction.
+
+Each line of the input file is a JSON object naming an operation and its
+arguments. Operations map onto the model APIs (Event.create,
+Attendee.update_rsvp, Activity.delete, ...), and all of them run inside a
+single write transaction. A failed operation is reported and undone
+without disturbing the others. Give an operation a "ref" and later lines
+can use "$<ref>" wherever an ID is expected:
+
+    {"op": "event.create", "ref": "conf", "args": {"name": "DevConf", "date": "2030-05-01T09:00", "location": "Hall A"}}
+    {"op": "activity.create", "args": {"event_id": "$conf", "name": "Keynote", "start_time": "09:30", "duration": 60}}
+    {"op": "attendee.create", "ref": "ana", "args": {"event_id": "$conf", "name": "Ana", "email": "ana@example.com"}}
+    {"op": "attendee.update_rsvp", "args": {"id": "$ana", "status": "Confirmed"}}
+
+    python lib/replay.py changes.jsonl [--results results.jsonl] [--dry-run] [--all-or-nothing]
+
+event.create may leave out "description". Operations are applied in
+chunks, each chunk under one savepoint and one flush. Within a chunk, a run
+of consecutive attendee.create, activity.create or attendee.update_rsvp
+lines is bound into one executemany statement (see BOUND_OPERATIONS)
+rather than going through the model API line by line. If anything in a
+chunk fails, that savepoint is rolled back and the chunk is redone through
+the model API with a savepoint around each operation, so only the failing
+ones are lost.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import sys
+import time as clock
+from datetime import datetime, time
+from types import SimpleNamespace
+
+from sqlalchemy import bindparam, insert, select, update
+
+from models import Event, Attendee, Activity, upgrade_schema
+from models.attendee_search import index_inserted
+from models.journal import journal_inserted, journal_updated
+from models.revision import touch_events
+from models.validation import ValidationError, validate_rows
+from models.write_path import write_batch
+
+MODELS = {'event': Event, 'attendee': Attendee, 'activity': Activity}
+CHUNK_SIZE = 500
+# Arguments a create line may leave out that the model's create() requires
+CREATE_DEFAULTS = {Event: {'description': None}}
+
+
+class OperationError(ValueError):
+    """Raised for an operation line that can't be understood"""
+
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise OperationError(f"Invalid date {value!r}; use e.g. 2030-05-01T09:00")
+
+
+def _parse_time(value):
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise OperationError(f"Invalid time {value!r}; use e.g. 09:30")
+
+
+def _convert(model, args):
+    # JSON has no date/time types
+    if model is Event and 'date' in args:
+        args['date'] = _parse_datetime(args['date'])
+    if model is Activity and 'start_time' in args:
+        args['start_time'] = _parse_time(args['start_time'])
+    return args
+
+
+def _resolve(session, value, refs):
+    if isinstance(value, str) and value.startswith('$'):
+        if value[1:] not in refs:
+            raise OperationError(f"Unknown reference {value!r}")
+        obj = refs[value[1:]]
+        if obj.id is None:
+            session.flush()  # still pending; assign its ID now
+        return obj.id
+    return value
+
+
+def _existing(session, model, obj_id):
+    # Read through the batch's session so rows created earlier in the
+    # batch (and not yet committed) are visible
+    obj = session.get(model, obj_id)
+    if obj is None:
+        raise OperationError(f"{model.__name__} with ID {obj_id} not found")
+    return obj
+
+
+def parse_operation(line):
+    """Parse one JSONL line into an operation dict, raising OperationError if it's malformed"""
+    try:
+        operation = json.loads(line)
+    except ValueError as e:
+        raise OperationError(f"Invalid JSON: {e}")
+    if not isinstance(operation, dict) or 'op' not in operation:
+        raise OperationError("Each line must be an object with an 'op' field")
+    entity, _, action = str(operation['op']).partition('.')
+    if entity not in MODELS or action not in ('create', 'update', 'update_rsvp', 'delete') \
+            or (action == 'update_rsvp' and entity != 'attendee'):
+        raise OperationError(f"Unknown operation {operation['op']!r}")
+    if not isinstance(operation.get('args', {}), dict):
+        raise OperationError("'args' must be an object")
+    return operation
+
+
+def apply_operation(session, operation, refs):
+    """Apply one parsed operation and return the object it created or touched
+
+    Created objects may still be pending (without an ID) until the next flush.
+    """
+    entity, _, action = operation['op'].partition('.')
+    model = MODELS[entity]
+    args = {key: _resolve(session, value, refs) for key, value in operation.get('args', {}).items()}
+    args = _convert(model, args)
+
+    if action == 'create':
+        obj = model.create(**{**CREATE_DEFAULTS.get(model, {}), **args})
+    else:
+        if 'id' not in args:
+            raise OperationError(f"{operation['op']} needs an 'id'")
+        obj = _existing(session, model, args.pop('id'))
+        if action == 'update':
+            obj.update(**args)
+        elif action == 'update_rsvp':
+            obj.update_rsvp(args['status'])
+        else:
+            obj.delete()
+
+    if operation.get('ref'):
+        refs[operation['ref']] = obj
+    return obj
+
+
+def _create_rows(session, model, operations, refs):
+    """Resolve and validate a run of create operations into complete rows for one INSERT"""
+    parameters = inspect.signature(model.create).parameters
+    defaults = {name: p.default for name, p in parameters.items() if p.default is not p.empty}
+    defaults.update(CREATE_DEFAULTS.get(model, {}))
+    rows = []
+    for operation in operations:
+        args = {key: _resolve(session, value, refs) for key, value in operation.get('args', {}).items()}
+        row = {**defaults, **_convert(model, args)}
+        if set(row) != set(parameters):
+            raise OperationError(f"{operation['op']} arguments don't match {model.__name__}.create()")
+        rows.append(row)
+    rows, errors = validate_rows(model.__name__, rows)
+    if errors:
+        raise ValidationError(errors)
+    return rows
+
+
+def _insert(session, model, operations, refs):
+    # The flush hooks don't see Core statements, so journal the rows and
+    # bump their events' revisions here
+    table = model.__table__
+    inserted = session.execute(
+        insert(table).returning(*table.c, sort_by_parameter_order=True),
+        _create_rows(session, model, operations, refs)
+    ).mappings().all()
+    journal_inserted(session, model.__name__, inserted)
+    touch_events(session, {row['event_id'] for row in inserted} - {None})
+    return inserted
+
+
+def _create_attendees(session, operations, refs):
+    inserted = _insert(session, Attendee, operations, refs)
+    index_inserted(session.connection(), inserted)
+    return [SimpleNamespace(id=row['id']) for row in inserted]
+
+
+def _create_activities(session, operations, refs):
+    inserted = _insert(session, Activity, operations, refs)
+    return [SimpleNamespace(id=row['id']) for row in inserted]
+
+
+_READ_RSVPS = select(Attendee.id, Attendee.rsvp_status, Attendee.version_id, Attendee.event_id) \
+    .where(Attendee.id.in_(bindparam('ids', expanding=True)))
+_SET_RSVP = update(Attendee.__table__) \
+    .where(Attendee.__table__.c.id == bindparam('attendee_id')) \
+    .values(rsvp_status=bindparam('new_status'), version_id=Attendee.__table__.c.version_id + 1)
+
+
+def _update_rsvps(session, operations, refs):
+    """Apply a run of attendee.update_rsvp lines with one SELECT and one executemany UPDATE"""
+    updates = []
+    for operation in operations:
+        args = {key: _resolve(session, value, refs) for key, value in operation.get('args', {}).items()}
+        if 'id' not in args or 'status' not in args:
+            raise OperationError(f"{operation['op']} needs an 'id' and a 'status'")
+        updates.append((args['id'], args['status']))
+    rows, errors = validate_rows('Attendee', [{'rsvp_status': status} for _, status in updates])
+    if errors:
+        raise ValidationError(errors)
+
+    current = {row.id: row for row in session.execute(_READ_RSVPS, {'ids': list({i for i, _ in updates})})}
+    state = {attendee_id: [row.rsvp_status, row.version_id] for attendee_id, row in current.items()}
+    params = []
+    changes = {}
+    for (attendee_id, _), row in zip(updates, rows):
+        if attendee_id not in state:
+            raise OperationError(f"Attendee with ID {attendee_id} not found")
+        status, version = state[attendee_id]
+        if row['rsvp_status'] == status:
+            continue  # like the ORM, an unchanged value is no edit
+        params.append({'attendee_id': attendee_id, 'new_status': row['rsvp_status']})
+        state[attendee_id] = [row['rsvp_status'], version + 1]
+        original = current[attendee_id]
+        changes[attendee_id] = {'rsvp_status': [original.rsvp_status, row['rsvp_status']],
+                                'version_id': [original.version_id, version + 1]}
+    if params:
+        session.execute(_SET_RSVP, params)
+        for attendee_id in changes:
+            # Objects loaded earlier in the batch would otherwise keep the old status and version
+            loaded = session.identity_map.get(session.identity_key(Attendee, attendee_id))
+            if loaded is not None:
+                session.expire(loaded)
+        journal_updated(session, 'Attendee', changes)
+        touch_events(session, {current[attendee_id].event_id for attendee_id in changes} - {None})
+    return [SimpleNamespace(id=attendee_id) for attendee_id, _ in updates]
+
+
+# Operations whose runs of consecutive lines are bound into one executemany
+# statement each, instead of one model call (and one row write) per line
+BOUND_OPERATIONS = {
+    'attendee.create': _create_attendees,
+    'activity.create': _create_activities,
+    'attendee.update_rsvp': _update_rsvps,
+}
+
+
+def _runs(chunk):
+    """Split a chunk into runs of consecutive lines with the same operation"""
+    for op, run in itertools.groupby(chunk, key=lambda item: item[1]['op'] if item[2] is None else None):
+        yield op, list(run)
+
+
+def _result(number, operation, obj=None, error=None):
+    result = {'line': number, 'op': operation.get('op') if operation else None, 'ok': error is None}
+    if error is None:
+        result['id'] = obj.id
+    else:
+        result['error'] = str(error) or type(error).__name__
+    return result
+
+
+def _apply_chunk(batch, chunk, refs, held):
+    """Apply a chunk under one savepoint; return its results, or None if any operation failed"""
+    saved_refs = dict(refs)
+    held_count = len(held)
+    done = []
+    savepoint = batch.session.begin_nested()
+    batch.savepoint_per_unit = False
+    try:
+        for op, run in _runs(chunk):
+            bound = BOUND_OPERATIONS.get(op)
+            if bound is not None:
+                batch.session.flush()  # the statement may depend on pending rows
+                objs = bound(batch.session, [operation for _, operation, _ in run], refs)
+                for (_, operation, _), obj in zip(run, objs):
+                    if operation.get('ref'):
+                        refs[operation['ref']] = obj
+            else:
+                objs = [apply_operation(batch.session, operation, refs) if error is None else None
+                        for _, operation, error in run]
+            for (number, operation, error), obj in zip(run, objs):
+                if obj is not None:
+                    held.append(obj)
+                done.append((number, operation, obj, error))
+        batch.session.flush()
+        savepoint.commit()
+    except Exception:
+        savepoint.rollback()
+        refs.clear()
+        refs.update(saved_refs)
+        del held[held_count:]
+        return None
+    finally:
+        batch.savepoint_per_unit = True
+    return [_result(*item) for item in done]
+
+
+def _apply_each(batch, chunk, refs, held):
+    """Apply a chunk one operation at a time, each in its own savepoint"""
+    results = []
+    for number, operation, error in chunk:
+        if error is None:
+            try:
+                obj = apply_operation(batch.session, operation, refs)
+                held.append(obj)
+            except Exception as e:
+                error = e
+        results.append(_result(number, operation, obj if error is None else None, error))
+    return results
+
+
+def replay(lines, dry_run=False, all_or_nothing=False, chunk_size=CHUNK_SIZE):
+    """Apply operations from an iterable of JSONL lines in one transaction.
+
+    Returns (results, committed): one {'line', 'op', 'ok', 'id' or 'error'}
+    dict per operation, and whether the transaction was committed.
+    """
+    parsed = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            parsed.append((number, parse_operation(line), None))
+        except OperationError as e:
+            parsed.append((number, None, e))
+
+    results = []
+    refs = {}
+    # The session only holds weak references; keeping the batch's objects
+    # alive lets later operations on them hit its identity map
+    held = []
+    with write_batch() as batch:
+        for start in range(0, len(parsed), chunk_size):
+            chunk = parsed[start:start + chunk_size]
+            chunk_results = _apply_chunk(batch, chunk, refs, held)
+            if chunk_results is None:
+                chunk_results = _apply_each(batch, chunk, refs, held)
+            results.extend(chunk_results)
+
+        failed = any(not result['ok'] for result in results)
+        batch.rollback_only = dry_run or (all_or_nothing and failed)
+    return results, not batch.rollback_only
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL batch of operations in one transaction")
+    parser.add_argument('path', help="JSONL file of operations ('-' for stdin)")
+    parser.add_argument('--results', help="write per-operation results to this JSONL file")
+    parser.add_argument('--dry-run', action='store_true', help="apply everything, then roll back")
+    parser.add_argument('--all-or-nothing', action='store_true',
+                        help="roll back the whole batch if any operation fails")
+    args = parser.parse_args(argv)
+    upgrade_schema()
+
+    started = clock.perf_counter()
+    if args.path == '-':
+        results, committed = replay(sys.stdin, args.dry_run, args.all_or_nothing)
+    else:
+        with open(args.path) as f:
+            results, committed = replay(f, args.dry_run, args.all_or_nothing)
+    elapsed = clock.perf_counter() - started
+
+    if args.results:
+        with open(args.results, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    failures = [result for result in results if not result['ok']]
+    for result in failures[:20]:
+        print(f"❌ Line {result['line']} ({result['op']}): {result['error']}")
+    if len(failures) > 20:
+        print(f"   ... and {len(failures) - 20} more")
+
+    applied = len(results) - len(failures)
+    outcome = "committed" if committed else "rolled back"
+    icon = "✅" if committed and not failures else "⚠️ "
+    print(f"{icon} {applied}/{len(results)} operations applied, {outcome} in {elapsed:.2f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Versioned cache for event reports and summaries.
+
+Entries are keyed by (tenant, event_id, version, kind), where version is
+Event.get_version(): the event's uid plus its revision. The revision is
+bumped whenever the event or one of its attendees or activities changes,
+and the uid tells apart events that reuse a deleted event's ID, so a
+cached entry can never be stale for its key: looking up an unchanged
+event costs one version lookup plus a dict hit. Entries live in memory
+(LRU-bounded) and on disk, so they survive restarts of the CLI. The
+tenant is the one current when the cache is called (see models.tenants),
+since event IDs are only unique within one organization's database; a
+tenant's files live in a subdirectory named after it.
+"""
+
+import glob
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from models import current_tenant
+
+DEFAULT_CACHE_DIR = os.environ.get('EVENT_PLANNER_CACHE_DIR', '.report_cache')
+DEFAULT_MAX_ENTRIES = 256
+
+
+class ReportCache:
+    """Two-level (memory, disk) cache keyed by (tenant, event_id, version, kind)"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tenant_directory(self, tenant):
+        return self.directory if tenant is None else os.path.join(self.directory, tenant)
+
+    def _path(self, tenant, event_id, version, kind):
+        return os.path.join(self._tenant_directory(tenant), f"event_{event_id}_v{version}_{kind}.json")
+
+    def get(self, event_id, version, kind):
+        """Return the current tenant's cached value, or None"""
+        key = (current_tenant(), event_id, version, kind)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        try:
+            with open(self._path(*key)) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, event_id, version, kind, value):
+        """Store a JSON-serializable value for this version"""
+        tenant = current_tenant()
+        key = (tenant, event_id, version, kind)
+        self._remember(key, value)
+
+        directory = self._tenant_directory(tenant)
+        os.makedirs(directory, exist_ok=True)
+        path = self._path(*key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+        # Older versions of this event ID can never be hit again
+        for old_path in glob.glob(os.path.join(directory, f"event_{event_id}_v*_{kind}.json")):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def get_or_build(self, event_id, version, kind, build):
+        """Return the cached value, calling build() and caching it on a miss"""
+        value = self.get(event_id, version, kind)
+        if value is None:
+            value = build()
+            self.put(event_id, version, kind, value)
+        return value
+
+    def clear(self):
+        """Drop every cached entry of the current tenant from memory and disk"""
+        tenant = current_tenant()
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == tenant]:
+                del self._memory[key]
+        for path in glob.glob(os.path.join(self._tenant_directory(tenant), "event_*.json")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+REPORT_CACHE = ReportCache()
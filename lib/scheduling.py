@@ -0,0 +1,144 @@
+"""
+Track scheduling for event activities.
+
+Packs an event's activities into the minimum number of parallel tracks
+(rooms) using greedy interval partitioning, and reports how many activities
+run at once in each time slot.
+"""
+
+import heapq
+import json
+
+
+def _to_minutes(activity):
+    """Return (start, end) of an activity in minutes since midnight"""
+    start = activity.start_time.hour * 60 + activity.start_time.minute
+    return start, start + activity.duration
+
+
+def _format_minutes(minutes):
+    """Format minutes since midnight as HH:MM (wrapping past midnight)"""
+    minutes %= 24 * 60
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def assign_tracks(activities):
+    """Assign activities to the minimum number of non-overlapping tracks.
+
+    Activities are sorted by start time and each one goes to the track that
+    frees up earliest, kept in a min-heap keyed by end time. A new track is
+    only opened when every existing track is still busy. Runs in O(n log n).
+
+    Returns a list of tracks, each a list of activities in start-time order.
+    """
+    ordered = sorted(activities, key=lambda a: (_to_minutes(a), a.id or 0))
+    tracks = []
+    free_at = []  # heap of (end_minute, track_index)
+
+    for activity in ordered:
+        start, end = _to_minutes(activity)
+        if free_at and free_at[0][0] <= start:
+            _, index = heapq.heappop(free_at)
+        else:
+            index = len(tracks)
+            tracks.append([])
+        tracks[index].append(activity)
+        heapq.heappush(free_at, (end, index))
+
+    return tracks
+
+
+def peak_concurrency(activities, slot_minutes=30):
+    """Return the peak number of overlapping activities in each time slot.
+
+    Sweeps the sorted start/end points once to get the running concurrency,
+    then records the maximum reached inside each slot between the first
+    start and the last end. Returns a list of (slot_start_minute, peak).
+    """
+    if slot_minutes <= 0:
+        raise ValueError("Slot length must be a positive number of minutes")
+
+    points = []
+    for activity in activities:
+        start, end = _to_minutes(activity)
+        points.append((start, 1))
+        points.append((end, -1))
+    if not points:
+        return []
+
+    # Ends sort before starts at the same minute so back-to-back
+    # activities are not counted as overlapping.
+    points.sort()
+
+    first_slot = points[0][0] // slot_minutes * slot_minutes
+    last_end = points[-1][0]
+    peaks = {}
+    current = 0
+    slot = first_slot
+    i = 0
+
+    while slot < last_end:
+        slot_end = slot + slot_minutes
+        # Settle everything that starts or ends right on the boundary first
+        while i < len(points) and points[i][0] <= slot:
+            current += points[i][1]
+            i += 1
+        peak = current
+        while i < len(points) and points[i][0] < slot_end:
+            current += points[i][1]
+            peak = max(peak, current)
+            i += 1
+        peaks[slot] = peak
+        slot = slot_end
+
+    return sorted(peaks.items())
+
+
+def build_track_schedule(activities, slot_minutes=30):
+    """Build a serializable track schedule for a list of activities"""
+    tracks = assign_tracks(activities)
+    slots = peak_concurrency(activities, slot_minutes)
+
+    return {
+        'track_count': len(tracks),
+        'max_concurrency': max((peak for _, peak in slots), default=0),
+        'slot_minutes': slot_minutes,
+        'tracks': [
+            [
+                {
+                    'id': activity.id,
+                    'name': activity.name,
+                    'start': _format_minutes(_to_minutes(activity)[0]),
+                    'end': _format_minutes(_to_minutes(activity)[1]),
+                    'duration': activity.duration,
+                }
+                for activity in track
+            ]
+            for track in tracks
+        ],
+        'peak_concurrency': [
+            {'slot': _format_minutes(slot), 'count': peak}
+            for slot, peak in slots
+        ],
+    }
+
+
+def export_track_schedule(event, path=None, slot_minutes=30):
+    """Export an event's track schedule as JSON.
+
+    Writes to `path` when given and returns the JSON string either way.
+    """
+    schedule = build_track_schedule(event.activities, slot_minutes)
+    schedule = {
+        'event_id': event.id,
+        'event_name': event.name,
+        'date': event.date.strftime('%Y-%m-%d'),
+        **schedule,
+    }
+    data = json.dumps(schedule, indent=2)
+
+    if path:
+        with open(path, 'w') as f:
+            f.write(data)
+
+    return data
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+"""
+Snapshot and restore for the Event Planner database.
+
+snapshot()/restore() use SQLite's online backup API, which copies pages
+under a read lock and so yields a consistent copy even while the CLI is in
+use. export_npz()/import_npz() write one compressed NumPy archive per table
+(one array per column) and reload them with bulk inserts into a scratch
+file, dropping the secondary indexes for the load and rebuilding them
+afterwards, then swap the scratch file in with restore().
+
+    python lib/snapshot.py snapshot backups/today.db
+    python lib/snapshot.py restore backups/today.db
+    python lib/snapshot.py export-npz backups/today/
+    python lib/snapshot.py import-npz backups/today/
+    python lib/snapshot.py --tenant acme snapshot backups/acme-today.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from sqlalchemy import Float, Integer
+
+from models import Base, create_engines, current_engines, set_tenant, upgrade_schema
+from models.event import fill_derived_columns
+from report_cache import REPORT_CACHE
+
+CHUNK_SIZE = 50000
+
+
+def database_path():
+    """Path of the live SQLite database file (the current tenant's, if one is selected)"""
+    return current_engines()[0].url.database
+
+
+def _reset_connections():
+    # Pooled connections and caches may describe the old file contents
+    for engine in current_engines():
+        engine.dispose()
+    # Restored revisions may reuse numbers with different contents
+    REPORT_CACHE.clear()
+
+
+def snapshot(dest_path):
+    """Copy the live database to `dest_path` with the online backup API"""
+    source = sqlite3.connect(database_path())
+    dest = sqlite3.connect(dest_path)
+    try:
+        source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+    return dest_path
+
+
+def restore(src_path):
+    """Replace the live database with the contents of a snapshot file"""
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(f"Snapshot not found: {src_path}")
+
+    _reset_connections()
+    source = sqlite3.connect(src_path)
+    dest = sqlite3.connect(database_path())
+    try:
+        source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+    _reset_connections()
+    # The snapshot may predate columns added since
+    upgrade_schema()
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Columnar export needs NumPy. Install it with: pipenv install --dev")
+    return numpy
+
+
+def _column_kind(column):
+    if isinstance(column.type, Integer):
+        return 'int'
+    if isinstance(column.type, Float):
+        return 'float'
+    return 'str'
+
+
+def export_npz(directory):
+    """Write every table to `directory` as <table>.npz, one array per column.
+
+    Each column is stored as a typed array plus a boolean null mask.
+    Returns a dict of table name to row count.
+    """
+    np = _require_numpy()
+    os.makedirs(directory, exist_ok=True)
+
+    counts = {}
+    conn = sqlite3.connect(database_path())
+    try:
+        for table in Base.metadata.sorted_tables:
+            names = [c.name for c in table.columns]
+            rows = conn.execute(f"SELECT {', '.join(names)} FROM {table.name}").fetchall()
+            arrays = {}
+            for i, column in enumerate(table.columns):
+                values = [row[i] for row in rows]
+                nulls = np.array([v is None for v in values], dtype=bool)
+                kind = _column_kind(column)
+                if kind == 'int':
+                    data = np.array([0 if v is None else v for v in values], dtype=np.int64)
+                elif kind == 'float':
+                    data = np.array([0.0 if v is None else v for v in values], dtype=np.float64)
+                else:
+                    data = np.array(['' if v is None else str(v) for v in values], dtype=str)
+                arrays[f"col__{column.name}"] = data
+                arrays[f"null__{column.name}"] = nulls
+            np.savez_compressed(os.path.join(directory, f"{table.name}.npz"), **arrays)
+            counts[table.name] = len(rows)
+    finally:
+        conn.close()
+    return counts
+
+
+def import_npz(directory):
+    """Replace the database contents with an export_npz() directory.
+
+    The archives are loaded into a scratch file next to the database, with
+    secondary indexes dropped for the load and recreated afterwards, and the
+    result replaces the live database through restore(). A crash mid-import
+    can only damage the scratch file. Returns a dict of table name to row count.
+    """
+    np = _require_numpy()
+    scratch_path = f"{database_path()}.import-{os.getpid()}"
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+
+    tables = [t for t in Base.metadata.sorted_tables
+              if os.path.exists(os.path.join(directory, f"{t.name}.npz"))]
+    counts = {}
+    engines = create_engines(f"sqlite:///{scratch_path}")
+    try:
+        upgrade_schema(engines[1])
+        conn = sqlite3.connect(scratch_path, isolation_level=None)
+        try:
+            # Only the scratch file is at risk if the machine goes down
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("BEGIN IMMEDIATE")
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    conn.execute(f"DROP INDEX IF EXISTS {index.name}")
+
+            for table in tables:
+                with np.load(os.path.join(directory, f"{table.name}.npz")) as archive:
+                    names = [c.name for c in table.columns if f"col__{c.name}" in archive]
+                    columns = []
+                    for name in names:
+                        values = archive[f"col__{name}"].tolist()
+                        nulls = archive[f"null__{name}"]
+                        if nulls.any():
+                            for i in np.flatnonzero(nulls).tolist():
+                                values[i] = None
+                        columns.append(values)
+
+                rows = list(zip(*columns))
+                placeholders = ", ".join("?" for _ in names)
+                statement = f"INSERT INTO {table.name} ({', '.join(names)}) VALUES ({placeholders})"
+                for start in range(0, len(rows), CHUNK_SIZE):
+                    conn.executemany(statement, rows[start:start + CHUNK_SIZE])
+                counts[table.name] = len(rows)
+
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        # Rebuild the indexes in one pass over the loaded data
+        upgrade_schema(engines[1])
+        # Exports from older versions lack the derived event columns
+        with engines[1].begin() as write:
+            fill_derived_columns(write)
+        restore(scratch_path)
+    finally:
+        for engine in engines:
+            engine.dispose()
+        if os.path.exists(scratch_path):
+            os.remove(scratch_path)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot and restore the Event Planner database")
+    parser.add_argument('--tenant', help="organization database to use instead of the shared one")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in [
+        ('snapshot', "copy the live database to a file"),
+        ('restore', "replace the live database with a snapshot file"),
+        ('export-npz', "export every table as compressed NumPy arrays"),
+        ('import-npz', "replace the database contents from an NumPy export"),
+    ]:
+        commands.add_parser(name, help=help_text).add_argument('path')
+    args = parser.parse_args(argv)
+    if args.tenant:
+        set_tenant(args.tenant)
+
+    if args.command == 'snapshot':
+        snapshot(args.path)
+        print(f"✅ Snapshot written to {args.path}")
+    elif args.command == 'restore':
+        restore(args.path)
+        print(f"✅ Database restored from {args.path}")
+    elif args.command == 'export-npz':
+        counts = export_npz(args.path)
+        print(f"✅ Exported {sum(counts.values())} rows from {len(counts)} tables to {args.path}")
+    elif args.command == 'import-npz':
+        counts = import_npz(args.path)
+        print(f"✅ Imported {sum(counts.values())} rows into {len(counts)} tables from {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Buffered table rendering for the CLI.
+
+Column widths are computed once per table and every row is rendered into a
+single string, so a table costs one write instead of one print() per row.
+Tables taller than the terminal are shown a page at a time.
+"""
+
+import shutil
+import sys
+
+CLEAR_SCREEN = "\033[2J\033[3J\033[H"
+DIVIDER_WIDTH = 50
+
+
+def clear_terminal(stream=None):
+    """Clear the screen and scrollback with ANSI escapes"""
+    stream = stream or sys.stdout
+    stream.write(CLEAR_SCREEN)
+    stream.flush()
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+def render_table(columns, rows):
+    """Render rows as fixed-width text lines.
+
+    `columns` is a list of (header, max_width) pairs; a max_width of None
+    leaves the column unbounded. Cells longer than their column are cut to
+    fit, and the last column is never padded.
+    """
+    rows = [[_cell(value) for value in row] for row in rows]
+    widths = []
+    for i, (header, max_width) in enumerate(columns):
+        width = max([len(header)] + [len(row[i]) for row in rows])
+        if max_width is not None:
+            width = min(width, max_width)
+        widths.append(width)
+
+    last = len(columns) - 1
+
+    def format_row(cells):
+        parts = []
+        for i, value in enumerate(cells):
+            value = value[:widths[i]]
+            parts.append(value if i == last else value.ljust(widths[i]))
+        return " ".join(parts).rstrip()
+
+    lines = [format_row([header for header, _ in columns])]
+    lines.append("-" * max(DIVIDER_WIDTH, len(lines[0])))
+    lines.extend(format_row(row) for row in rows)
+    return lines
+
+
+def page_lines(lines, stream=None, page_size=None):
+    """Write lines in one buffered write, paging when they overflow the terminal"""
+    stream = stream or sys.stdout
+    if page_size is None:
+        page_size = shutil.get_terminal_size().lines - 2
+
+    if page_size <= 0 or len(lines) <= page_size or not stream.isatty():
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+        return
+
+    for start in range(0, len(lines), page_size):
+        stream.write("\n".join(lines[start:start + page_size]) + "\n")
+        stream.flush()
+        shown = min(start + page_size, len(lines))
+        if shown >= len(lines):
+            break
+        answer = input(f"-- More ({shown}/{len(lines)}) -- Enter for next page, q to stop: ")
+        if answer.strip().lower() == 'q':
+            break
+
+
+def print_table(columns, rows, stream=None):
+    """Render and write a table, paging it if needed"""
+    page_lines(render_table(columns, rows), stream)
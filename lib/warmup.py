@@ -0,0 +1,121 @@
+"""
+Background warm-up run while the CLI shows its first menu.
+
+The first action after startup otherwise pays for SQLAlchemy mapper
+configuration, compiling each finder's SQL, and reading cold SQLite pages.
+start_warmup() does that work on a background thread while the user reads
+the menu, and prefetches the reports of the next few upcoming events into
+the report cache. Everything it reads is bounded and reused: the upcoming
+events are read with a LIMIT and feed the report prefetch, and the
+dashboard's status counts come back as a handful of rows.
+
+The main thread calls wait() before running the first action so the two
+never overlap. If warm-up is still running after HANDOFF_TIMEOUT, wait()
+cancels it and blocks until the step in progress returns; the remaining
+steps are skipped. Warm-up errors are recorded, not raised, since every
+step is only an optimization.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import configure_mappers
+
+from models import Event, Attendee, Activity
+
+UPCOMING_PREFETCH = 5  # matches the dashboard's "Upcoming Events" list
+HANDOFF_TIMEOUT = 5.0  # seconds the first action waits before cancelling warm-up
+
+
+class Warmup:
+    """Runs the warm-up steps on a daemon thread and records their timings"""
+
+    def __init__(self):
+        self.timings = {}  # step name -> seconds
+        self.error = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cli-warmup', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=HANDOFF_TIMEOUT):
+        """Block until warm-up has stopped; True if it finished within `timeout`.
+
+        After `timeout` seconds the remaining steps are cancelled, but this
+        still returns only once the warm-up thread has stopped working.
+        """
+        if self._done.wait(timeout):
+            return True
+        self._cancel.set()
+        self._done.wait()
+        return False
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _step(self, name, func):
+        if self._cancel.is_set():
+            return None
+        started = time.perf_counter()
+        result = func()
+        self.timings[name] = time.perf_counter() - started
+        return result
+
+    def _run(self):
+        try:
+            self._step('mappers', configure_mappers)
+            self._step('finders', compile_finders)
+            upcoming = self._step('upcoming', upcoming_events)
+            self._step('statuses', Event.count_by_status)
+            self._step('reports', lambda: prefetch_reports(upcoming or [], self._cancel))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+
+def compile_finders():
+    """Run each hot indexed finder once with a key that matches nothing.
+
+    This compiles and caches their SQL without loading any rows. The
+    name searches are left out: LIKE can't use an index, so even a key
+    that matches nothing scans the whole table.
+    """
+    Event.find_by_id(0)
+    Event.get_version(0)
+    Attendee.find_by_id(0)
+    Attendee.find_by_event(0)
+    Attendee.find_by_email('')
+    Activity.find_by_id(0)
+    Activity.find_by_event(0)
+
+
+def upcoming_events(limit=UPCOMING_PREFETCH):
+    """The next `limit` events, read from the date index"""
+    return Event.find_between(datetime.now(), datetime.max, limit=limit)
+
+
+def prefetch_reports(events, cancel=None):
+    """Build and cache the reports of `events`, stopping early once `cancel` is set"""
+    from helpers import get_event_report
+
+    built = 0
+    for event in events:
+        if cancel is not None and cancel.is_set():
+            break
+        get_event_report(event.id)
+        built += 1
+    return built
+
+
+def start_warmup():
+    """Start warming up in the background, unless EVENT_PLANNER_WARMUP=0"""
+    if os.environ.get('EVENT_PLANNER_WARMUP') == '0':
+        return None
+    return Warmup().start()